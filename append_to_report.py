@@ -5,6 +5,9 @@ import os
 def safe_zero(value):
 	return int(value) if int(value)!=0 else 0.1
 
+def throughput(report):
+	return int(report["processed_events"])*1e9/max(int(report["runtime_ns"]),1)
+
 def main():
 	parser = argparse.ArgumentParser(description='Merge data in plot format')
 	parser.add_argument('--summary_size', default=None, type=int)
@@ -18,17 +21,27 @@ def main():
 	parser.add_argument('--fifo_report', default=None, type=str)
 	parser.add_argument('--random_report', default=None, type=str)
 	parser.add_argument('--suse_report', default=None, type=str)
+	parser.add_argument('--combined_report', default=None, type=str, help='Report of a single summary_selector run with --strategy=suse,fifo,random, replaces the per strategy reports')
 	parser.add_argument('--target', default=None, type=str)
 	args = parser.parse_args()
 
-	with open(args.fifo_report) as f:
-		fifo_report = json.load(f)
+	sampled_reports = dict()
+	if args.combined_report:
+		with open(args.combined_report) as f:
+			combined_report = json.load(f)
+		fifo_report = combined_report["fifo"]
+		random_report = combined_report["random"]
+		suse_report = combined_report["suse"]
+		sampled_reports = {int(name.split(':')[1]): report for name, report in combined_report.items() if name.startswith('sampled:')}
+	else:
+		with open(args.fifo_report) as f:
+			fifo_report = json.load(f)
 
-	with open(args.random_report) as f:
-		random_report = json.load(f)
+		with open(args.random_report) as f:
+			random_report = json.load(f)
 
-	with open(args.suse_report) as f:
-		suse_report = json.load(f)
+		with open(args.suse_report) as f:
+			suse_report = json.load(f)
 
 	values = dict()
 	values["Summary Size"] = args.summary_size
@@ -95,6 +108,51 @@ def main():
 	values["Min Latency Random"] = random_report["min_latency_ns"]
 	values["Min Latency FIFO"] = fifo_report["min_latency_ns"]
 
+	# tail latencies and the non-empty buckets of the latency histogram, e.g. for latency CDFs
+	for percentile in ["P50","P90","P99","P99.9","P99.99"]:
+		key = f"{percentile.lower().replace('.','_')}_latency_ns"
+		values[f"{percentile} Latency SuSe"] = suse_report[key]
+		values[f"{percentile} Latency Random"] = random_report[key]
+		values[f"{percentile} Latency FIFO"] = fifo_report[key]
+
+	for name, report in [("SuSe",suse_report),("Random",random_report),("FIFO",fifo_report)]:
+		values[f"Latency Bucket Lower Bounds {name}"] = report["latency_bucket_lower_bounds_ns"]
+		values[f"Latency Bucket Upper Bounds {name}"] = report["latency_bucket_upper_bounds_ns"]
+		values[f"Latency Bucket Counts {name}"] = report["latency_bucket_counts"]
+
+	# events per second, to compare the eviction batch sizes against the recall given by the final matches
+	values["Eviction Batch Size"] = suse_report.get("eviction_batch_size",1)
+	values["Throughput SuSe"] = throughput(suse_report)
+	values["Throughput Random"] = throughput(random_report)
+	values["Throughput FIFO"] = throughput(fifo_report)
+
+	# throughput series of --throughput-every, empty if it was not given or written to a --throughput-file
+	for name, report in [("SuSe",suse_report),("Random",random_report),("FIFO",fifo_report)]:
+		values[f"Throughput Series Processed Events {name}"] = report.get("throughput_processed_events",[])
+		values[f"Throughput Series {name}"] = report.get("throughput_events_per_second",[])
+		values[f"Cache Size Series {name}"] = report.get("throughput_cache_sizes",[])
+
+	# bytes held by the cache, the counters, the replays and the strategy tables, sampled by summary_selector
+	for name, report in [("SuSe",suse_report),("Random",random_report),("FIFO",fifo_report)]:
+		values[f"Peak Memory {name}"] = report.get("memory_peak_bytes")
+		values[f"Average Memory {name}"] = report.get("memory_average_bytes")
+		values[f"Memory {name}"] = report.get("memory",{})
+
+	# time and replays per phase of process_event, empty unless summary_selector was built with SUSE_PROFILE_PHASES
+	values["Phases SuSe"] = suse_report.get("phases",{})
+	values["Phases Random"] = random_report.get("phases",{})
+	values["Phases FIFO"] = fifo_report.get("phases",{})
+
+	# sampled:<k> runs of the combined report, one list entry per sample size k
+	sample_sizes = sorted(sampled_reports.keys())
+	values["Sample Sizes"] = sample_sizes
+	values["Final Sampled Complete Matches"] = [sampled_reports[k]["final_matches"] for k in sample_sizes]
+	values["Total Ratio Sampled/SuSe"] = [int(sampled_reports[k]["final_matches"])/safe_zero(suse_report["final_matches"]) for k in sample_sizes]
+	values["Execution Time Sampled"] = [sampled_reports[k]["runtime_ns"] for k in sample_sizes]
+	values["Average Latency Sampled"] = [sampled_reports[k]["average_latency_ns"] for k in sample_sizes]
+	values["P99 Latency Sampled"] = [sampled_reports[k]["p99_latency_ns"] for k in sample_sizes]
+	values["Throughput Sampled"] = [throughput(sampled_reports[k]) for k in sample_sizes]
+
 	if not os.path.exists(args.target) or os.path.getsize(args.target)<=0:
 		with open(args.target,'w',newline='') as csv:
 			print(*sorted(values.keys()),sep=',',file = csv)
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+MAGIC = b'SUSE'
+VERSION = 1
+MAX_BLOCK_SIZE = 1 << 16
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b''
+
+    number_of_bytes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        number_of_bytes += values >= (np.uint64(1) << np.uint64(shift))
+
+    width = int(number_of_bytes.max())
+    shifts = np.arange(0, 7 * width, 7, dtype=np.uint64)
+    encoded = ((values[:, None] >> shifts) & np.uint64(0x7f)).astype(np.uint8)
+    encoded[np.arange(width) < (number_of_bytes[:, None] - 1)] |= 0x80
+    return encoded[np.arange(width) < number_of_bytes[:, None]].tobytes()
+
+
+class BinaryEventStreamWriter:
+    def __init__(self, output, alphabet) -> None:
+        alphabet = ''.join(alphabet).encode()
+        if len(alphabet) > 255:
+            raise ValueError('The alphabet of a binary event stream is limited to 255 symbols')
+
+        self.output = output
+        self.previous_timestamp = 0
+        self.output.write(MAGIC + bytes([VERSION, len(alphabet)]) + alphabet)
+
+    def write(self, event_types: np.ndarray, timestamps: np.ndarray) -> None:
+        event_types = np.asarray(event_types, dtype=np.uint8)
+        timestamps = np.asarray(timestamps, dtype=np.uint64)
+
+        for block_start in range(0, len(event_types), MAX_BLOCK_SIZE):
+            block_types = event_types[block_start:block_start + MAX_BLOCK_SIZE]
+            block_timestamps = timestamps[block_start:block_start + MAX_BLOCK_SIZE]
+
+            deltas = np.diff(block_timestamps, prepend=np.uint64(self.previous_timestamp))
+            if (block_timestamps[1:] < block_timestamps[:-1]).any() or block_timestamps[0] < self.previous_timestamp:
+                raise ValueError('Timestamps of a binary event stream must not decrease')
+            self.previous_timestamp = int(block_timestamps[-1])
+
+            self.output.write(np.uint32(len(block_types)).astype('<u4').tobytes())
+            self.output.write(block_types.tobytes())
+            self.output.write(encode_varints(deltas))
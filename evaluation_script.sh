@@ -9,6 +9,7 @@ PROB_DISTRIBUTIONS=("zipf" "normal")
 EVAL_TIMESTAMPS_COUNTS=(20)
 EVAL_TIMESTAMPS_PROB_DISTS=("uniform")
 NUM_OF_RUNS=(10)
+SAMPLE_SIZES="" # e.g. "4,16,64" to compare sampled strategies with these sample sizes
 
 rm -f report.csv
 
@@ -39,7 +40,8 @@ do
                                                                                 ${eval_timestamp_count} \
                                                                                 ${eval_timestamp_dist} \
                                                                                 ${RANDOM} \
-                                                                                "${query}" >/dev/null &
+                                                                                "${query}" \
+                                                                                "${SAMPLE_SIZES}" >/dev/null &
                                                                 done
                                                         done
                                                 done
@@ -1,13 +1,20 @@
 import argparse
+from binary_event_stream import BinaryEventStreamWriter
 import matplotlib.pyplot as plt
 import numpy as np
 import re
+import sys
 from scipy.stats import expon, norm, poisson, zipf, binom, gamma, beta, geom
 
 
+DEFAULT_CHUNK_SIZE = 1 << 16
+DIGIT_GROUPS = np.frombuffer(''.join(f'{value:04d}' for value in range(10000)).encode(), dtype=np.uint8).reshape(10000, 4)
+
+
 class EventStreamGenerator:
-    def __init__(self, query: str, distribution_name: str, produce_stream: bool, produce_alphabet_probs: bool, stream_size: int,  random_seed: int) -> None:
+    def __init__(self, query: str, distribution_name: str, produce_stream: bool, produce_alphabet_probs: bool, stream_size: int,  random_seed: int, chunk_size: int = DEFAULT_CHUNK_SIZE, output=None, output_format: str = 'text') -> None:
         self.event_type_universe = sorted(list(set(re.sub(r'[^a-zA-Z0-9]', '', query))))
+        self.event_type_lookup = np.frombuffer(''.join(self.event_type_universe).encode(), dtype=np.uint8)
 
         self.distributions = {
                                 "uniform": self.uniform_distribution,
@@ -33,7 +40,7 @@ class EventStreamGenerator:
             self.get_probabilities()
 
         if produce_stream:
-            self.generate_stream(stream_size=stream_size)
+            self.generate_stream(stream_size=stream_size, chunk_size=chunk_size, output=output, output_format=output_format)
         
         
     def uniform_distribution(self) -> None:
@@ -108,14 +115,55 @@ class EventStreamGenerator:
         return probabilities
 
 
-    def generate_stream(self, stream_size: int, distribution_func=None, **kwargs):
+    def generate_stream(self, stream_size: int, distribution_func=None, chunk_size: int = DEFAULT_CHUNK_SIZE, output=None, output_format: str = 'text', **kwargs):
         distribution_func = distribution_func or self.distribution_func
         probabilities = distribution_func(**kwargs)
-        stream = np.random.choice(self.event_type_universe, size=stream_size, p=probabilities)
-        resulting_stream = ''
-        for timestamp, event in enumerate(stream):
-            resulting_stream += event + " " + str(timestamp) +  " "
-        print(resulting_stream)
+        if output is None:
+            sys.stdout.flush()
+            output = sys.stdout.buffer
+
+        if output_format not in ('text', 'binary'):
+            raise ValueError(f"Invalid output format: {output_format}")
+        binary_writer = BinaryEventStreamWriter(output, self.event_type_universe) if output_format == 'binary' else None
+
+        # drawing the symbols chunk by chunk consumes the same random numbers as a single draw,
+        # so the stream does not depend on the chunk size
+        for chunk_start in range(0, stream_size, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, stream_size)
+            event_types = np.random.choice(len(self.event_type_universe), size=chunk_end - chunk_start, p=probabilities)
+            if binary_writer:
+                binary_writer.write(self.event_type_lookup[event_types], np.arange(chunk_start, chunk_end))
+            else:
+                output.write(self.format_events(event_types, chunk_start))
+
+        if not binary_writer:
+            output.write(b'\n')
+        output.flush()
+
+    def format_events(self, event_types: np.ndarray, first_timestamp: int) -> bytes:
+        formatted = []
+        block_start = first_timestamp
+        block_end = first_timestamp + len(event_types)
+        while block_start < block_end:
+            # within a block every timestamp has the same number of digits and the same digits above the last four,
+            # so each event is a fixed-width row of one byte matrix
+            high, low = divmod(block_start, 10000)
+            next_block_start = (high + 1) * 10000 if high else 10 ** len(str(block_start))
+            block_size = min(block_end, next_block_start) - block_start
+
+            prefix = np.frombuffer(str(high).encode() if high else b'', dtype=np.uint8)
+            digits = DIGIT_GROUPS[low:low + block_size] if high else DIGIT_GROUPS[low:low + block_size, 4 - len(str(low)):]
+
+            rows = np.empty((block_size, len(prefix) + digits.shape[1] + 3), dtype=np.uint8)
+            rows[:, 0] = self.event_type_lookup[event_types[block_start - first_timestamp:block_start - first_timestamp + block_size]]
+            rows[:, 1] = ord(' ')
+            rows[:, 2:2 + len(prefix)] = prefix
+            rows[:, 2 + len(prefix):-1] = digits
+            rows[:, -1] = ord(' ')
+            formatted.append(rows.tobytes())
+
+            block_start += block_size
+        return b''.join(formatted)
 
     def plot_stream_distribution(self, stream: str) -> None:
         counts = {event: stream.count(event) for event in self.event_type_universe}
@@ -143,9 +191,16 @@ def main():
     parser.add_argument('--produce_alphabet_probs', default=False, action='store_true', help='If set, produce alphabet probabilities.')
     parser.add_argument('--stream_size', default=None, type=int, help='If produce stream, set the stream size.')
     parser.add_argument('--random_seed', default=None, type=int, help='Random seed')
+    parser.add_argument('--chunk_size', default=DEFAULT_CHUNK_SIZE, type=int, help='Number of events drawn and written at once.')
+    parser.add_argument('--output', default=None, type=str, help='If set, write the stream to this file instead of stdout.')
+    parser.add_argument('--output_format', default='text', choices=['text', 'binary'], help='Format of the produced stream.')
     args = parser.parse_args()
 
-    EventStreamGenerator(args.query, args.distribution_name, args.produce_stream, args.produce_alphabet_probs, args.stream_size, args.random_seed)
+    if args.output:
+        with open(args.output, 'wb') as output:
+            EventStreamGenerator(args.query, args.distribution_name, args.produce_stream, args.produce_alphabet_probs, args.stream_size, args.random_seed, args.chunk_size, output, args.output_format)
+    else:
+        EventStreamGenerator(args.query, args.distribution_name, args.produce_stream, args.produce_alphabet_probs, args.stream_size, args.random_seed, args.chunk_size, None, args.output_format)
 
     
 if __name__ == "__main__":
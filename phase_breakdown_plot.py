@@ -0,0 +1,54 @@
+import argparse
+import ast
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+PHASES = ["update_window", "purge_expired", "select", "evict", "add_event"]
+COLORS = ['#66C2A5', '#FC8D62', '#8DA0CB', '#E78AC3', '#A6D854']
+
+def main():
+	parser = argparse.ArgumentParser(description='Stacked breakdown of the time per phase of summary_selector (built with SUSE_PROFILE_PHASES) across the rows of a report.csv')
+	parser.add_argument('--report', default='report.csv', type=str)
+	parser.add_argument('--strategy', default='SuSe', choices=['SuSe', 'Random', 'FIFO'])
+	parser.add_argument('--x', default='Summary Size', type=str, help='Column of the swept parameter, rows with the same value are averaged')
+	parser.add_argument('--metric', default='nanoseconds', choices=['nanoseconds', 'calls', 'replays', 'replayed_events'])
+	parser.add_argument('--per_event', action='store_true', help='Divide by the number of calls of update_window, i.e. the processed events')
+	parser.add_argument('--output', default='phase_breakdown.pdf', type=str)
+	args = parser.parse_args()
+
+	df = pd.read_csv(args.report)
+	phases = df[f'Phases {args.strategy}'].apply(ast.literal_eval)
+	if not any(phases):
+		raise SystemExit(f"{args.report} contains no phases, summary_selector has to be built with -DSUSE_PROFILE_PHASES=ON")
+
+	rows = []
+	for x, profile in zip(df[args.x], phases):
+		if not profile:
+			continue
+		events = max(profile["update_window"]["calls"], 1) if args.per_event else 1
+		rows.append({args.x: x, **{phase: profile[phase][args.metric] / events for phase in PHASES}})
+
+	breakdown = pd.DataFrame(rows).groupby(args.x)[PHASES].mean().sort_index()
+	if args.metric == 'nanoseconds':
+		breakdown = breakdown / (1e3 if args.per_event else 1e9)
+
+	metric_name = 'time' if args.metric == 'nanoseconds' else args.metric.replace('_', ' ')
+	if args.metric == 'nanoseconds':
+		ylabel = 'Time per event (µs)' if args.per_event else 'Time (s)'
+	else:
+		ylabel = metric_name.capitalize() + (' per event' if args.per_event else '')
+
+	ax = breakdown.plot(kind='bar', stacked=True, color=COLORS, width=0.7, edgecolor='black', linewidth=1)
+	ax.set_xlabel(args.x)
+	ax.set_ylabel(ylabel)
+	ax.set_title(f'{args.strategy} {metric_name} per phase')
+	ax.legend(title=None, framealpha=0.66)
+	plt.setp(ax.xaxis.get_majorticklabels(), rotation=0)
+
+	plt.grid(axis='y')
+	plt.tight_layout()
+	plt.savefig(args.output, format=args.output.rsplit('.', 1)[-1])
+
+if __name__ == "__main__":
+	main()
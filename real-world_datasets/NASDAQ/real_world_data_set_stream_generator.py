@@ -2,6 +2,12 @@ import argparse
 from collections import Counter
 import matplotlib.pyplot as plt
 import numpy as np
+import os
+import sys
+
+# the binary format writer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from binary_event_stream import BinaryEventStreamWriter
 
 
 class StockData:
@@ -81,7 +87,14 @@ class StockData:
         return objects
     
     @staticmethod
-    def generate_event_stream(stock_data_objects):
+    def generate_event_stream(stock_data_objects, output_format='text'):
+        if output_format == 'binary':
+            event_types = [obj.get_event_type() for obj in stock_data_objects]
+            writer = BinaryEventStreamWriter(sys.stdout.buffer, sorted(set(event_types)))
+            writer.write(np.frombuffer(''.join(event_types).encode(), dtype=np.uint8), np.arange(1, len(event_types) + 1))
+            sys.stdout.buffer.flush()
+            return
+
         event_stream_str = ''
         for idx,obj in enumerate(stock_data_objects):
             event_stream_str += obj.get_event_type() + " " + str(idx+1) + " "
@@ -94,12 +107,13 @@ def main():
     parser.add_argument('--file_name', default="NASDAQ_20151102_1.txt", type=str, help='Enther the NASDAQ file name.')
     parser.add_argument('--produce_stream', default=False, action='store_true', help='If set, produce stream.')
     parser.add_argument('--produce_alphabet_probs', default=False, action='store_true', help='If set, produce alphabet probabilities.')
+    parser.add_argument('--output_format', default='text', choices=['text', 'binary'], help='Format of the produced stream.')
     args = parser.parse_args()
 
     stock_data = StockData.create_objects_from_file(args.file_name)
 
     if args.produce_stream:
-        StockData.generate_event_stream(stock_data)
+        StockData.generate_event_stream(stock_data, args.output_format)
 
     if args.produce_alphabet_probs:
         StockData.get_probability_distribution(stock_data)
@@ -1,6 +1,8 @@
 import argparse
 
 import csv
+import os
+import sys
 
 from datetime import datetime
 
@@ -9,6 +11,10 @@ from collections import Counter
 import matplotlib.pyplot as plt
 import numpy as np
 
+# the binary format writer lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from binary_event_stream import BinaryEventStreamWriter
+
 
 def safe_float(value, default=0.0):
     try:
@@ -157,8 +163,14 @@ class CitiBikeData:
 
 
     @staticmethod
-    def generate_event_stream(citi_bike_data_objects, most_busiest_stations, most_central_stations, most_frequent_routes, average_ride_duration):
+    def generate_event_stream(citi_bike_data_objects, most_busiest_stations, most_central_stations, most_frequent_routes, average_ride_duration, output_format='text'):
         event_stream = [data.classify_event(most_busiest_stations, most_central_stations, most_frequent_routes, average_ride_duration) for data in citi_bike_data_objects]
+        if output_format == 'binary':
+            writer = BinaryEventStreamWriter(sys.stdout.buffer, sorted(set(event_stream)))
+            writer.write(np.frombuffer(''.join(event_stream).encode(), dtype=np.uint8), np.arange(1, len(event_stream) + 1))
+            sys.stdout.buffer.flush()
+            return
+
         event_stream_str = ''
         for idx,event in enumerate(event_stream):
             event_stream_str += event + " " + str(idx+1) + " "
@@ -171,6 +183,7 @@ def main():
     parser.add_argument('--file_name', default="202307-citibike-tripdata.csv", type=str, help='Enther the Citi Bike file name.')
     parser.add_argument('--produce_stream', default=False, action='store_true', help='If set, produce stream.')
     parser.add_argument('--produce_alphabet_probs', default=False, action='store_true', help='If set, produce alphabet probabilities.')
+    parser.add_argument('--output_format', default='text', choices=['text', 'binary'], help='Format of the produced stream.')
     args = parser.parse_args()
 
     citibike_data = CitiBikeData.create_objects_from_file(args.file_name)
@@ -181,7 +194,7 @@ def main():
     most_central_stations = [item[0] for item in most_central_stations]
 
     if args.produce_stream:
-        CitiBikeData.generate_event_stream(citibike_data, most_busiest_stations, most_central_stations, most_frequent_routes, average_ride_duration)
+        CitiBikeData.generate_event_stream(citibike_data, most_busiest_stations, most_central_stations, most_frequent_routes, average_ride_duration, args.output_format)
 
     if args.produce_alphabet_probs:
         CitiBikeData.get_probability_distribution(citibike_data, most_busiest_stations, most_central_stations, most_frequent_routes, average_ride_duration)
@@ -84,6 +84,12 @@ def main():
 	values["Min Latency Random"] = random_report["min_latency_ns"]
 	values["Min Latency FIFO"] = fifo_report["min_latency_ns"]
 
+	# bytes held by the cache, the counters, the replays and the strategy tables, sampled by summary_selector
+	for name, report in [("SuSe",suse_report),("Random",random_report),("FIFO",fifo_report)]:
+		values[f"Peak Memory {name}"] = report.get("memory_peak_bytes")
+		values[f"Average Memory {name}"] = report.get("memory_average_bytes")
+		values[f"Memory {name}"] = report.get("memory",{})
+
 	if not os.path.exists(args.target) or os.path.getsize(args.target)<=0:
 		with open(args.target,'w',newline='') as csv:
 			print(*sorted(values.keys()),sep=',',file = csv)
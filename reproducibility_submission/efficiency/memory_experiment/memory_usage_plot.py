@@ -1,74 +1,121 @@
-import os
-import re
-import pandas as pd
-import matplotlib.pyplot as plt
-from collections import defaultdict
-
-import matplotlib
-
-matplotlib.rcParams['pdf.fonttype'] = 42
-matplotlib.rcParams['ps.fonttype'] = 42
-
-plt.rcParams.update({
-    'text.usetex': True,
-    'font.family': 'serif',
-    'font.serif': ['Palatino'],
-    'axes.labelsize': 25,
-    'axes.titlesize': 25,
-    'xtick.labelsize': 25,
-    'ytick.labelsize': 25,
-    'text.latex.preamble': r'''
-        \usepackage[T1]{fontenc}
-        \usepackage{amsmath}
-        \usepackage{amssymb}
-        \usepackage{bm}
-        \boldmath
-    '''
-})
-
-def extract_max_resident_set_size(file_path):
-    try:
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
-            for line in lines:
-                if "Maximum resident set size" in line:
-                    return int(line.split()[-1]) / 1024  #convert from kilobytes to megabytes
-    except Exception as e:
-        print(f"Error while processing file {file_path}: {e}")
-
-files = [f for f in os.listdir() if re.match(r'memory_metrics_run_\d+_\d+_\d+.txt', f)]
-data = defaultdict(list)
-
-for file in files:
-    summary_size, time_window_size, _ = map(int, re.findall(r'\d+', file)[:3])
-    max_resident_set_size = extract_max_resident_set_size(file)
-    data['Summary Size'].append(summary_size)
-    data['Time Window Size'].append(time_window_size)
-    data['Max Resident Set Size'].append(max_resident_set_size)
-
-df = pd.DataFrame(data)
-df_grouped = df.groupby(['Summary Size', 'Time Window Size']).mean().reset_index()
-
-colors = ['#FFB347', '#77DD77', '#AEC6CF', '#F49AC2', '#AEDFF7', '#B19CD9', '#D1A3DD', '#FFF176', '#BBB1AC']
-markers = ['x', 'o', 's', '^', 'v', '<', '>', 'X', '.']
-
-plt.figure()
-unique_summary_sizes = df_grouped['Summary Size'].unique()
-for idx, summary_size in enumerate(unique_summary_sizes):
-    subset = df_grouped[df_grouped['Summary Size'] == summary_size]
-    plt.plot(subset['Time Window Size'], subset['Max Resident Set Size'], label=fr'$\textbf{{\textsc{{SuSe}}}}$ \textbf{{{summary_size}}}', color=colors[idx % len(colors)], marker=markers[idx % len(markers)], linestyle='--', linewidth=3, markersize=10)
-
-xtick_locations = [10, 100, 250, 500]  
-xtick_labels = [r'\textbf{10}', r'\textbf{100}', r'\textbf{250}', r'\textbf{500}']  
-plt.xticks(xtick_locations, xtick_labels)
-
-plt.yscale('log')
-#plt.ylim(10**1,10**3)
-plt.xlabel(r'Time Window Size $q_\tau$', fontsize=24)
-plt.ylabel('Avg. Max. Memory Usage (MB)', fontsize=24, y=0.45)
-plt.title('Average Maximum Memory Usage', fontsize=22)
-plt.tick_params(axis='both', which='both', labelsize=22)
-plt.grid()
-plt.legend(loc='upper left', ncol=2, columnspacing=0.4, bbox_to_anchor=(0.05, .99), framealpha=0.66, prop={'weight':'bold', 'size':20}, handletextpad=0.3, borderpad=0.15, labelspacing=0.1)
-plt.tight_layout()
-plt.savefig('average_maximum_memory_usage.pdf', format='pdf')
+import ast
+import os
+import re
+import pandas as pd
+import matplotlib.pyplot as plt
+from collections import defaultdict
+
+import matplotlib
+
+matplotlib.rcParams['pdf.fonttype'] = 42
+matplotlib.rcParams['ps.fonttype'] = 42
+
+plt.rcParams.update({
+    'text.usetex': True,
+    'font.family': 'serif',
+    'font.serif': ['Palatino'],
+    'axes.labelsize': 25,
+    'axes.titlesize': 25,
+    'xtick.labelsize': 25,
+    'ytick.labelsize': 25,
+    'text.latex.preamble': r'''
+        \usepackage[T1]{fontenc}
+        \usepackage{amsmath}
+        \usepackage{amssymb}
+        \usepackage{bm}
+        \boldmath
+    '''
+})
+
+def extract_max_resident_set_size(file_path):
+    try:
+        with open(file_path, 'r') as f:
+            lines = f.readlines()
+            for line in lines:
+                if "Maximum resident set size" in line:
+                    return int(line.split()[-1]) / 1024  #convert from kilobytes to megabytes
+    except Exception as e:
+        print(f"Error while processing file {file_path}: {e}")
+
+def read_time_dumps():
+    files = [f for f in os.listdir() if re.match(r'memory_metrics_run_\d+_\d+_\d+.txt', f)]
+    data = defaultdict(list)
+
+    for file in files:
+        summary_size, time_window_size, _ = map(int, re.findall(r'\d+', file)[:3])
+        max_resident_set_size = extract_max_resident_set_size(file)
+        data['Summary Size'].append(summary_size)
+        data['Time Window Size'].append(time_window_size)
+        data['Max Resident Set Size'].append(max_resident_set_size)
+
+    return pd.DataFrame(data)
+
+# the peak of the bytes summary_selector accounts for its structures, runs measured with /usr/bin/time before it reported its memory are read from their text dumps.
+# Both are labelled differently, the accounted bytes leave out the rest of the process and are only sampled every --memory-every events
+if os.path.exists('report.csv') and 'Peak Memory SuSe' in pd.read_csv('report.csv', nrows=0).columns:
+    report = pd.read_csv('report.csv')
+    memory_column = 'Peak Accounted Memory'
+    df = pd.DataFrame({
+        'Summary Size': report['Summary Size'],
+        'Time Window Size': report['Time Window Size'],
+        memory_column: report['Peak Memory SuSe'] / 1024**2
+    })
+    ylabel, title, figure = 'Avg. Peak Accounted Memory (MB)', 'Average Peak Accounted Memory', 'average_peak_accounted_memory.pdf'
+else:
+    report = None
+    memory_column = 'Max Resident Set Size'
+    df = read_time_dumps()
+    ylabel, title, figure = 'Avg. Max. Memory Usage (MB)', 'Average Maximum Memory Usage', 'average_maximum_memory_usage.pdf'
+
+df_grouped = df.groupby(['Summary Size', 'Time Window Size']).mean().reset_index()
+
+colors = ['#FFB347', '#77DD77', '#AEC6CF', '#F49AC2', '#AEDFF7', '#B19CD9', '#D1A3DD', '#FFF176', '#BBB1AC']
+markers = ['x', 'o', 's', '^', 'v', '<', '>', 'X', '.']
+
+plt.figure()
+unique_summary_sizes = df_grouped['Summary Size'].unique()
+for idx, summary_size in enumerate(unique_summary_sizes):
+    subset = df_grouped[df_grouped['Summary Size'] == summary_size]
+    plt.plot(subset['Time Window Size'], subset[memory_column], label=fr'$\textbf{{\textsc{{SuSe}}}}$ \textbf{{{summary_size}}}', color=colors[idx % len(colors)], marker=markers[idx % len(markers)], linestyle='--', linewidth=3, markersize=10)
+
+xtick_locations = [10, 100, 250, 500]  
+xtick_labels = [r'\textbf{10}', r'\textbf{100}', r'\textbf{250}', r'\textbf{500}']  
+plt.xticks(xtick_locations, xtick_labels)
+
+plt.yscale('log')
+#plt.ylim(10**1,10**3)
+plt.xlabel(r'Time Window Size $q_\tau$', fontsize=24)
+plt.ylabel(ylabel, fontsize=24, y=0.45)
+plt.title(title, fontsize=22)
+plt.tick_params(axis='both', which='both', labelsize=22)
+plt.grid()
+plt.legend(loc='upper left', ncol=2, columnspacing=0.4, bbox_to_anchor=(0.05, .99), framealpha=0.66, prop={'weight':'bold', 'size':20}, handletextpad=0.3, borderpad=0.15, labelspacing=0.1)
+plt.tight_layout()
+plt.savefig(figure, format='pdf')
+
+# the average bytes of each structure of SuSe for the largest time window, to tie the memory to the structures holding it
+if report is not None:
+    parts = ['cache', 'cache_changes', 'cached_counters', 'per_event_counters', 'replay_windows', 'strategy']
+    part_labels = {'cache': 'Cache', 'cache_changes': 'Change Log', 'cached_counters': 'Cached Counters', 'per_event_counters': 'Window Counters', 'replay_windows': 'Replay Windows', 'strategy': 'Strategy Tables'}
+    largest_time_window_size = report['Time Window Size'].max()
+    subset = report[report['Time Window Size'] == largest_time_window_size]
+
+    breakdown = defaultdict(list)
+    for summary_size, memory in zip(subset['Summary Size'], subset['Memory SuSe'].apply(ast.literal_eval)):
+        breakdown['Summary Size'].append(summary_size)
+        for part in parts:
+            # reports of older builds have no change log
+            breakdown[part_labels[part]].append(memory.get(part, {'average_bytes': 0})['average_bytes'] / 1024**2)
+    breakdown = pd.DataFrame(breakdown).groupby('Summary Size').mean()
+
+    plt.figure()
+    ax = breakdown.plot(kind='bar', stacked=True, color=colors[:len(parts)], edgecolor='black', linewidth=1, width=0.7)
+    ax.set_xlabel(r'Summary Size $|\mathcal{S}|$', fontsize=24)
+    ax.set_ylabel('Avg. Memory Usage (MB)', fontsize=24)
+    ax.set_title(fr'Memory per Structure, $q_\tau$ = {largest_time_window_size}', fontsize=22)
+    ax.tick_params(axis='both', which='both', labelsize=22)
+    plt.setp(ax.xaxis.get_majorticklabels(), rotation=0)
+    ax.legend(loc='upper left', framealpha=0.66, prop={'weight':'bold', 'size':16}, handletextpad=0.3, borderpad=0.15, labelspacing=0.1)
+    plt.grid(axis='y')
+    plt.tight_layout()
+    plt.savefig('memory_usage_per_structure.pdf', format='pdf')
@@ -58,7 +58,7 @@ do
 	report_files[${strategy}]=${temp_report_file}
 	trap "rm -f ${temp_report_file}" 0 2 3 15
 
-	/usr/bin/time -v bash -c "python3 event_stream_generator.py \
+	bash -c "python3 event_stream_generator.py \
 		--query='${QUERY}' \
 		--distribution_name=${PROB_DISTRIBUTION} \
 		--produce_stream \
@@ -72,7 +72,7 @@ do
 		--time-window-size=${TIME_WINDOW_SIZE} \
 		--time-to-live=${TIME_TO_LIVE} \
 		--evaluation-timestamps=${EVAL_TIMESTAMPS} \
-		--report='${temp_report_file}' > /dev/null" 2> "memory_metrics_run_${SUMMARY_SIZE}_${TIME_WINDOW_SIZE}_${RANDOM_SEED}.txt"
+		--report='${temp_report_file}' > /dev/null"
 
 	cat ${temp_report_file}
 done
@@ -0,0 +1,84 @@
+import ast
+from collections import Counter
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+import matplotlib
+
+matplotlib.rcParams['pdf.fonttype'] = 42
+matplotlib.rcParams['ps.fonttype'] = 42
+
+plt.rcParams.update({
+    'text.usetex': True,
+    'font.family': 'serif',
+    'font.serif': ['Palatino'],
+    'axes.labelsize': 25,
+    'axes.titlesize': 25,
+    'xtick.labelsize': 25,
+    'ytick.labelsize': 25,
+    'text.latex.preamble': r'''
+        \usepackage[T1]{fontenc}
+        \usepackage{amsmath}
+        \usepackage{amssymb}
+        \usepackage{bm}
+        \boldmath
+    '''
+})
+
+# tail latency CDFs from the latency histograms of summary_selector, the runs of each summary size are merged
+df = pd.read_csv('report.csv')
+
+summary_sizes = [50, 100, 250, 500, 1000, 2500, 5000]
+time_window_size = 500
+alphabet_probability_distribution = "uniform"
+strategy = "SuSe"
+
+colors = ['#66C2A5', '#FC8D62', '#8DA0CB', '#E78AC3', '#A6D854', '#FFD92F', '#E5C494']
+tail_percentiles = [0.5, 0.9, 0.99, 0.999, 0.9999]
+
+fig, ax = plt.subplots()
+
+for color, summary_size in zip(colors, summary_sizes):
+    filtered_df = df[
+        (df['Summary Size'] == summary_size) &
+        (df['Time Window Size'] == time_window_size) &
+        (df['Alphabet Probability Distribution'] == alphabet_probability_distribution)
+    ]
+    if filtered_df.empty:
+        continue
+
+    # buckets are identified by their upper bound, the same bounds are used by every run
+    counts = Counter()
+    for upper_bounds, bucket_counts in zip(filtered_df[f'Latency Bucket Upper Bounds {strategy}'], filtered_df[f'Latency Bucket Counts {strategy}']):
+        for upper_bound, count in zip(ast.literal_eval(upper_bounds), ast.literal_eval(bucket_counts)):
+            counts[upper_bound] += count
+
+    total = sum(counts.values())
+    latencies = sorted(counts.keys())
+    seen = 0
+    exceeding = []
+    for latency in latencies:
+        seen += counts[latency]
+        exceeding.append(max(1 - seen / total, 1 / (10 * total)))
+
+    latencies_s = [latency / 1e9 for latency in latencies]
+    ax.step(latencies_s, exceeding, where='post', color=color, linewidth=3, label=fr"$\textbf{{|\mathcal{{S}}| = {summary_size}}}$")
+
+for percentile in tail_percentiles:
+    ax.axhline(1 - percentile, color='grey', linestyle='--', linewidth=1)
+    ax.text(1.02, 1 - percentile, fr"$p{100 * percentile:g}$", transform=ax.get_yaxis_transform(), fontsize=14, va='center')
+
+ax.set_xscale("log")
+ax.set_yscale("log")
+ax.set_xlabel('Latency (s) Per Element', fontsize=24)
+ax.set_ylabel(r'Fraction of Elements $>$ Latency', fontsize=24)
+ax.set_title(r'\textsc{SuSe} Tail Latency per Element', fontsize=22, y=1.025)
+ax.tick_params(axis='both', which='major', labelsize=22)
+
+ax.legend(title=None, loc='lower left', ncols=2, framealpha=0.66, prop={'weight': 'bold', 'size': 16}, columnspacing=0.4, labelspacing=0.05, handletextpad=0.3, borderpad=0.1)
+
+plt.grid()
+plt.tight_layout()
+plt.savefig('latency_cdf.pdf', format='pdf')
+plt.show()
@@ -0,0 +1,111 @@
+#!/bin/bash
+
+# like run_test.sh, but takes comma separated lists of summary sizes and time window sizes
+# and evaluates every combination on one generated stream with a single summary_selector run
+SUMMARY_SIZES=$1
+TIME_WINDOW_SIZES=$2
+STREAM_SIZE=$3
+TIME_TO_LIVE=$4
+PROB_DISTRIBUTION=$5
+EVAL_TIMESTAMPS_COUNT=$6
+EVAL_TIMESTAMPS_PROB_DIST=$7
+RANDOM_SEED=$8
+QUERY=$9
+
+echo "Running test with: "
+echo "summary_sizes=${SUMMARY_SIZES}"
+echo "time_window_sizes=${TIME_WINDOW_SIZES}"
+echo "stream_size=${STREAM_SIZE}"
+echo "time_to_live=${TIME_TO_LIVE}"
+echo "prob_distribution=${PROB_DISTRIBUTION}"
+echo "eval_timestamp_count=${EVAL_TIMESTAMPS_COUNT}"
+echo "eval_timestamp_prob_dist=${EVAL_TIMESTAMPS_PROB_DIST}"
+echo "random_seed=${RANDOM_SEED}"
+echo "query=${QUERY}"
+
+# all configurations are evaluated at the same timestamps, drawn after the smallest summary is filled
+MIN_SUMMARY_SIZE=$(echo ${SUMMARY_SIZES} | tr ',' '\n' | sort -n | head -n 1)
+
+EVAL_TIMESTAMPS=$(python3 evaluation_timestamp_generator.py \
+	--summary_size=${MIN_SUMMARY_SIZE} \
+	--stream_size=${STREAM_SIZE} \
+	--number_of_evaluation_timestamps=${EVAL_TIMESTAMPS_COUNT} \
+	--distribution_name=${EVAL_TIMESTAMPS_PROB_DIST} \
+	--random_seed=${RANDOM_SEED}
+)
+
+echo "Selected Timestamps: [${EVAL_TIMESTAMPS}]"
+
+QUERY_CHARS=$(echo ${QUERY//[^[:alpha:]]} | grep -o . | sort | uniq | tr -d "\n")
+echo "Symbols in query: ${QUERY_CHARS}"
+
+PROB_FILENAME=$(mktemp)
+echo "Storing probabilities in: ${PROB_FILENAME}"
+
+python3 event_stream_generator.py \
+	--query="${QUERY}" \
+	--distribution_name=${PROB_DISTRIBUTION} \
+	--produce_alphabet_probs \
+	--stream_size=${STREAM_SIZE} \
+	--random_seed=${RANDOM_SEED} \
+> ${PROB_FILENAME}
+
+STREAM_FILENAME=$(mktemp)
+echo "Storing event stream in: ${STREAM_FILENAME}"
+
+python3 event_stream_generator.py \
+	--query="${QUERY}" \
+	--distribution_name=${PROB_DISTRIBUTION} \
+	--produce_stream \
+	--stream_size=${STREAM_SIZE} \
+	--random_seed=${RANDOM_SEED} \
+	--output_format=binary \
+	--output=${STREAM_FILENAME}
+
+REPORT_DIRECTORY=$(mktemp -d)
+echo "Created temporary report directory ${REPORT_DIRECTORY}"
+trap "rm -rf ${REPORT_DIRECTORY}" 0 2 3 15
+
+./summary_selector \
+	--query="${QUERY}" \
+	--input=${STREAM_FILENAME} \
+	--input-format=binary \
+	--strategy=suse,fifo,random \
+	--probabilities-file=${PROB_FILENAME} \
+	--summary-size=${SUMMARY_SIZES} \
+	--time-window-size=${TIME_WINDOW_SIZES} \
+	--time-to-live=${TIME_TO_LIVE} \
+	--evaluation-timestamps=${EVAL_TIMESTAMPS} \
+	--threads=$(nproc) \
+	--report="${REPORT_DIRECTORY}/report_{summary_size}_{time_window_size}.json" \
+	--seed=${RANDOM_SEED}
+
+echo "All done, merging into report..."
+for summary_size in ${SUMMARY_SIZES//,/ }
+do
+	for time_window_size in ${TIME_WINDOW_SIZES//,/ }
+	do
+		REPORT_FILENAME="${REPORT_DIRECTORY}/report_${summary_size}_${time_window_size}.json"
+		cat ${REPORT_FILENAME}
+
+		flock --verbose report.csv python3 append_to_report.py \
+			--summary_size=${summary_size} \
+			--time_window_size=${time_window_size} \
+			--stream_size=${STREAM_SIZE} \
+			--time_to_live=${TIME_TO_LIVE} \
+			--query="${QUERY}" \
+			--distribution_name="${PROB_DISTRIBUTION}" \
+			--timestamp_distribution_name="${EVAL_TIMESTAMPS_PROB_DIST}" \
+			--random_seed=${RANDOM_SEED} \
+			--combined_report="${REPORT_FILENAME}" \
+			--target="report.csv"
+	done
+done
+
+echo "Done, deleting temporary files"
+
+rm -r ${REPORT_DIRECTORY}
+rm ${PROB_FILENAME}
+rm ${STREAM_FILENAME}
+
+echo "..done. Bye :)"
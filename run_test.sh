@@ -9,6 +9,8 @@ EVAL_TIMESTAMPS_COUNT=$6
 EVAL_TIMESTAMPS_PROB_DIST=$7
 RANDOM_SEED=$8
 QUERY=$9
+SAMPLE_SIZES=${10} # optional comma separated list of sample sizes for the sampled strategy
+EVICTION_BATCH_SIZE=${11:-1} # optional number of events evicted at once
 
 echo "Running test with: "
 echo "summary_size=${SUMMARY_SIZE}"
@@ -20,6 +22,8 @@ echo "eval_timestamp_count=${EVAL_TIMESTAMPS_COUNT}"
 echo "eval_timestamp_prob_dist=${EVAL_TIMESTAMPS_PROB_DIST}"
 echo "random_seed=${RANDOM_SEED}"
 echo "query=${QUERY}"
+echo "sample_sizes=${SAMPLE_SIZES}"
+echo "eviction_batch_size=${EVICTION_BATCH_SIZE}"
 
 EVAL_TIMESTAMPS=$(python3 evaluation_timestamp_generator.py \
 	--summary_size=${SUMMARY_SIZE} \
@@ -45,34 +49,44 @@ python3 event_stream_generator.py \
 	--random_seed=${RANDOM_SEED} \
 > ${PROB_FILENAME}
 
-declare -A report_files
-for strategy in "suse" "fifo" "random"
+STREAM_FILENAME=$(mktemp)
+echo "Storing event stream in: ${STREAM_FILENAME}"
+
+python3 event_stream_generator.py \
+	--query="${QUERY}" \
+	--distribution_name=${PROB_DISTRIBUTION} \
+	--produce_stream \
+	--stream_size=${STREAM_SIZE} \
+	--random_seed=${RANDOM_SEED} \
+	--output_format=binary \
+	--output=${STREAM_FILENAME}
+
+STRATEGIES=suse,fifo,random
+for SAMPLE_SIZE in ${SAMPLE_SIZES//,/ }
 do
-	temp_report_file=$(mktemp)
-	echo "Created temporary report file ${temp_report_file}"
-	report_files[${strategy}]=${temp_report_file}
-	trap "rm -f ${temp_report_file}" 0 2 3 15
-
-	python3 event_stream_generator.py \
-		--query="${QUERY}" \
-		--distribution_name=${PROB_DISTRIBUTION} \
-		--produce_stream \
-		--stream_size=${STREAM_SIZE} \
-		--random_seed=${RANDOM_SEED} \
-		| ./summary_selector \
-		--query="${QUERY}" \
-		--strategy=${strategy} \
-		--probabilities-file=${PROB_FILENAME} \
-		--summary-size=${SUMMARY_SIZE} \
-		--time-window-size=${TIME_WINDOW_SIZE} \
-		--time-to-live=${TIME_TO_LIVE} \
-		--evaluation-timestamps=${EVAL_TIMESTAMPS} \
-		--report="${temp_report_file}" \
-        --seed=${RANDOM_SEED}
-
-	cat ${temp_report_file}
+	STRATEGIES="${STRATEGIES},sampled:${SAMPLE_SIZE}"
 done
 
+REPORT_FILENAME=$(mktemp)
+echo "Created temporary report file ${REPORT_FILENAME}"
+trap "rm -f ${REPORT_FILENAME}" 0 2 3 15
+
+./summary_selector \
+	--query="${QUERY}" \
+	--input=${STREAM_FILENAME} \
+	--input-format=binary \
+	--strategy=${STRATEGIES} \
+	--probabilities-file=${PROB_FILENAME} \
+	--summary-size=${SUMMARY_SIZE} \
+	--time-window-size=${TIME_WINDOW_SIZE} \
+	--time-to-live=${TIME_TO_LIVE} \
+	--eviction-batch-size=${EVICTION_BATCH_SIZE} \
+	--evaluation-timestamps=${EVAL_TIMESTAMPS} \
+	--report="${REPORT_FILENAME}" \
+	--seed=${RANDOM_SEED}
+
+cat ${REPORT_FILENAME}
+
 echo "All done, merging into report..."
 flock --verbose report.csv python3 append_to_report.py \
 	--summary_size=${SUMMARY_SIZE} \
@@ -83,18 +97,13 @@ flock --verbose report.csv python3 append_to_report.py \
 	--distribution_name="${PROB_DISTRIBUTION}" \
 	--timestamp_distribution_name="${EVAL_TIMESTAMPS_PROB_DIST}" \
 	--random_seed=${RANDOM_SEED} \
-	--fifo_report="${report_files[fifo]}" \
-	--random_report="${report_files[random]}" \
-	--suse_report="${report_files[suse]}" \
+	--combined_report="${REPORT_FILENAME}" \
 	--target="report.csv"
 
 echo "Done, deleting temporary files"
 
-for strategy in "suse" "fifo" "random"
-do
-	echo ${report_files[${strategy}]}
-	rm ${report_files[${strategy}]}
-done
+rm ${REPORT_FILENAME}
 rm ${PROB_FILENAME}
+rm ${STREAM_FILENAME}
 
 echo "..done. Bye :)"
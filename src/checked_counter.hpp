@@ -0,0 +1,158 @@
+#ifndef SUSE_CHECKED_COUNTER_HPP
+#define SUSE_CHECKED_COUNTER_HPP
+
+#include <compare>
+#include <ostream>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
+
+namespace suse
+{
+	struct counter_overflow: std::overflow_error
+	{
+		using std::overflow_error::overflow_error;
+	};
+
+	// a counter would become negative, so the counters are inconsistent, a larger width does not help
+	struct counter_underflow: std::underflow_error
+	{
+		using std::underflow_error::underflow_error;
+	};
+
+#ifdef __SIZEOF_INT128__
+	__extension__ typedef unsigned __int128 native_uint128;
+#endif
+
+	template <typename T>
+	class checked_uint;
+
+	template <typename T>
+	inline constexpr bool is_checked_uint = false;
+
+	template <typename T>
+	inline constexpr bool is_checked_uint<checked_uint<T>> = true;
+
+	/*
+		Unsigned integer that throws counter_overflow or counter_underflow instead of wrapping around.
+		T is expected to be a builtin unsigned integer type (including unsigned __int128).
+	*/
+	template <typename T>
+	class checked_uint
+	{
+		public:
+		using value_type = T;
+
+		constexpr checked_uint(T value = 0):
+			value_{value}
+		{}
+
+		template <typename other_type>
+		explicit constexpr checked_uint(const checked_uint<other_type>& other):
+			value_{static_cast<T>(other.value())}
+		{
+			static_assert(sizeof(other_type)<=sizeof(T),"checked_uint can only be widened");
+		}
+
+		static constexpr checked_uint max() { return checked_uint{static_cast<T>(~T{0})}; }
+
+		constexpr T value() const { return value_; }
+
+		template <typename target_type> requires (!is_checked_uint<target_type> && std::is_constructible_v<target_type,T>)
+		explicit constexpr operator target_type() const { return static_cast<target_type>(value_); }
+
+#if defined(__GNUC__) || defined(__clang__)
+		checked_uint& operator+=(const checked_uint& other)
+		{
+			T result;
+			if(__builtin_add_overflow(value_,other.value_,&result))
+				throw counter_overflow{"Counter overflow in addition"};
+
+			value_ = result;
+			return *this;
+		}
+
+		checked_uint& operator-=(const checked_uint& other)
+		{
+			T result;
+			if(__builtin_sub_overflow(value_,other.value_,&result))
+				throw counter_underflow{"Counter underflow in subtraction"};
+
+			value_ = result;
+			return *this;
+		}
+
+		checked_uint& operator*=(const checked_uint& other)
+		{
+			T result;
+			if(__builtin_mul_overflow(value_,other.value_,&result))
+				throw counter_overflow{"Counter overflow in multiplication"};
+
+			value_ = result;
+			return *this;
+		}
+#else
+		checked_uint& operator+=(const checked_uint& other)
+		{
+			if(other.value_>max().value_-value_)
+				throw counter_overflow{"Counter overflow in addition"};
+
+			value_+=other.value_;
+			return *this;
+		}
+
+		checked_uint& operator-=(const checked_uint& other)
+		{
+			if(other.value_>value_)
+				throw counter_underflow{"Counter underflow in subtraction"};
+
+			value_-=other.value_;
+			return *this;
+		}
+
+		checked_uint& operator*=(const checked_uint& other)
+		{
+			if(value_!=0 && other.value_>max().value_/value_)
+				throw counter_overflow{"Counter overflow in multiplication"};
+
+			value_*=other.value_;
+			return *this;
+		}
+#endif
+
+		checked_uint& operator++() { return *this+=1; }
+
+		friend checked_uint operator+(checked_uint lhs, const checked_uint& rhs) { return lhs+=rhs; }
+		friend checked_uint operator-(checked_uint lhs, const checked_uint& rhs) { return lhs-=rhs; }
+		friend checked_uint operator*(checked_uint lhs, const checked_uint& rhs) { return lhs*=rhs; }
+
+		friend constexpr bool operator==(const checked_uint&, const checked_uint&) = default;
+		friend constexpr std::strong_ordering operator<=>(const checked_uint& lhs, const checked_uint& rhs)
+		{
+			return lhs.value_<=>rhs.value_;
+		}
+
+		friend std::ostream& operator<<(std::ostream& out, const checked_uint& counter)
+		{
+			return out<<to_string(counter.value_);
+		}
+
+		private:
+		T value_;
+
+		static std::string to_string(T value)
+		{
+			std::string digits;
+			do
+			{
+				digits.insert(digits.begin(),static_cast<char>('0'+static_cast<int>(value%10)));
+				value/=10;
+			}
+			while(value!=0);
+
+			return digits;
+		}
+	};
+}
+
+#endif
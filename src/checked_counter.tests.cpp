@@ -0,0 +1,54 @@
+#include "checked_counter.hpp"
+
+#include <doctest/doctest.h>
+
+#include <cstdint>
+#include <sstream>
+
+TEST_SUITE("suse::checked_uint")
+{
+	TEST_CASE("arithmetic")
+	{
+		using counter_type = suse::checked_uint<std::uint8_t>;
+
+		counter_type counter{200};
+		counter+=50;
+		CHECK(counter==counter_type{250});
+		CHECK(counter-counter_type{10}==counter_type{240});
+		CHECK(counter_type{12}*counter_type{21}==counter_type{252});
+		CHECK(++counter==counter_type{251});
+		CHECK(counter>counter_type{3});
+		CHECK(static_cast<int>(counter)==251);
+	}
+
+	TEST_CASE("overflow")
+	{
+		using counter_type = suse::checked_uint<std::uint8_t>;
+
+		counter_type counter = counter_type::max();
+		CHECK_THROWS_AS(counter+=1,suse::counter_overflow);
+		CHECK_THROWS_AS(++counter,suse::counter_overflow);
+		CHECK_THROWS_AS(counter_type{16}*counter_type{16},suse::counter_overflow);
+		CHECK_THROWS_AS(counter_type{1}-counter_type{2},suse::counter_underflow);
+		CHECK_NOTHROW(counter_type{15}*counter_type{17});
+	}
+
+	TEST_CASE("widening")
+	{
+		const suse::checked_uint<std::uint32_t> narrow{4000000000u};
+		suse::checked_uint<std::uint64_t> wide{narrow};
+		CHECK_NOTHROW(wide+=suse::checked_uint<std::uint64_t>{narrow});
+		CHECK(wide.value()==8000000000u);
+	}
+
+#ifdef __SIZEOF_INT128__
+	TEST_CASE("printing")
+	{
+		const suse::checked_uint<suse::native_uint128> counter = suse::checked_uint<suse::native_uint128>{~std::uint64_t{0}}*suse::checked_uint<suse::native_uint128>{1000};
+
+		std::ostringstream out;
+		out<<counter<<' '<<suse::checked_uint<std::uint64_t>{0};
+		CHECK(out.str()=="18446744073709551615000 0");
+	}
+#endif
+}
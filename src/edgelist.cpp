@@ -1,5 +1,7 @@
 #include "edgelist.hpp"
 
+#include <algorithm>
+
 namespace suse
 {
 	std::span<const edge> edgelist::edges_for(char symbol) const
@@ -7,8 +9,17 @@ namespace suse
 		const auto range = character_to_range_[symbol];
 		return {edges_.begin()+range.start,range.size};
 	}
+
+	std::span<const std::uint32_t> edgelist::sources_for(char symbol) const
+	{
+		if(source_masks_.empty())
+			return {};
+
+		const auto matrix_idx = character_to_matrix_[static_cast<unsigned char>(symbol)];
+		return {source_masks_.begin()+matrix_idx*number_of_states_,number_of_states_};
+	}
 	
-	edgelist compute_edges_per_character(const nfa& automaton)
+	edgelist compute_edges_per_character(const nfa& automaton, std::size_t dense_states)
 	{
 		std::unordered_map<char,std::vector<edge>> collected_edges;
 		for(std::size_t source_id=0;source_id<automaton.number_of_states();++source_id)
@@ -28,6 +39,43 @@ namespace suse
 			result.character_to_range_[symbol] = {result.edges_.size(),edges.size()};
 			result.edges_.insert(result.edges_.end(),edges.begin(),edges.end());
 		}
+
+		if(automaton.number_of_states()==0 || automaton.number_of_states()>std::min(dense_states,edgelist::max_dense_states))
+			return result;
+
+		result.number_of_states_ = automaton.number_of_states();
+		// a bitmask cannot count parallel edges (e.g. a symbol and the wildcard between the same states), those automata keep the edges only
+		bool has_parallel_edges = false;
+		const auto add_matrix = [&](const std::vector<edge>& edges)
+		{
+			result.source_masks_.resize(result.source_masks_.size()+result.number_of_states_,0);
+			const auto matrix = std::span{result.source_masks_}.last(result.number_of_states_);
+			const auto add_edge = [&](const edge& e)
+			{
+				const auto source_bit = std::uint32_t{1}<<e.from;
+				has_parallel_edges |= (matrix[e.to]&source_bit)!=0;
+				matrix[e.to]|=source_bit;
+			};
+
+			std::ranges::for_each(edges,add_edge);
+			std::ranges::for_each(result.edges_for(nfa::wildcard_symbol),add_edge);
+		};
+
+		add_matrix({});
+		for(const auto& [symbol,edges]: collected_edges)
+		{
+			if(symbol==nfa::wildcard_symbol)
+				continue;
+
+			result.character_to_matrix_[static_cast<unsigned char>(symbol)] = result.source_masks_.size()/result.number_of_states_;
+			add_matrix(edges);
+		}
+
+		if(has_parallel_edges)
+		{
+			result.number_of_states_ = 0;
+			result.source_masks_.clear();
+		}
 		
 		return result;
 	}
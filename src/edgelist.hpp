@@ -4,9 +4,11 @@
 #include "nfa.hpp"
 
 #include <array>
+#include <span>
 #include <vector>
 
 #include <cstddef>
+#include <cstdint>
 
 namespace suse
 {
@@ -17,13 +19,26 @@ namespace suse
 		friend constexpr auto operator<=>(const edge&, const edge&) = default;
 	};
 
+	/*
+		Transitions of an automaton grouped by symbol.
+		Small automata additionally get a dense matrix per symbol with the wildcard transitions merged in,
+		stored as one bitmask of source states per target state.
+	*/
 	class edgelist
 	{
 		public:
-		friend edgelist compute_edges_per_character(const nfa& automaton);
+		static constexpr std::size_t max_dense_states = 32; // the bits of a source mask
+		// beyond this, the transitions of a symbol are too sparse for the dense matrices to pay off
+		static constexpr std::size_t default_dense_states = 8;
 
+		friend edgelist compute_edges_per_character(const nfa& automaton, std::size_t dense_states);
+
+		// ordered by source state
 		std::span<const edge> edges_for(char symbol) const;
-		
+
+		// empty if the automaton has too many states for dense matrices
+		std::span<const std::uint32_t> sources_for(char symbol) const;
+
 		private:
 		struct range
 		{
@@ -35,10 +50,15 @@ namespace suse
 		
 		std::vector<edge> edges_;
 
+		std::size_t number_of_states_ = 0;
+		std::array<std::size_t,256> character_to_matrix_{}; // symbols without own transitions use the wildcard matrix at 0
+		std::vector<std::uint32_t> source_masks_;
+
 		friend bool operator<=>(const edgelist&, const edgelist&) = default;
 	};
 
-	edgelist compute_edges_per_character(const nfa& automaton);
+	// automata with up to dense_states states (at most max_dense_states) get dense matrices, 0 disables them
+	edgelist compute_edges_per_character(const nfa& automaton, std::size_t dense_states = edgelist::default_dense_states);
 }
 
 #endif
@@ -0,0 +1,71 @@
+#include "event_stream.hpp"
+
+#include <doctest/doctest.h>
+
+#include <nanobench.h>
+
+#include <random>
+#include <sstream>
+#include <string>
+#include <vector>
+
+TEST_SUITE("suse::event_stream")
+{
+	TEST_CASE("text vs binary parsing")
+	{
+		constexpr std::size_t number_of_events = 1000000;
+
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::vector<suse::event> events;
+		for(std::size_t i=0;i<number_of_events;++i)
+			events.push_back({static_cast<char>('A'+type_dist(random_gen)),i});
+
+		std::string text;
+		for(const auto& e: events)
+			text += std::string(1,e.type)+" "+std::to_string(e.timestamp)+" ";
+
+		std::ostringstream binary_out;
+		suse::binary_event_writer writer{binary_out,"ABCD"};
+		writer.write(events);
+		const auto binary = binary_out.str();
+
+		const auto read_all = [](auto& reader)
+		{
+			std::size_t checksum = 0;
+			for(suse::event e; reader.next(e);)
+				checksum += e.timestamp+e.type;
+
+			return checksum;
+		};
+
+		auto b = ankerl::nanobench::Bench();
+		b.relative(true).batch(number_of_events).unit("event");
+
+		b.run("text", [&]()
+		{
+			std::istringstream in{text};
+			suse::text_event_reader reader{in};
+			ankerl::nanobench::doNotOptimizeAway(read_all(reader));
+		});
+
+		b.run("binary", [&]()
+		{
+			std::istringstream in{binary};
+			suse::binary_event_reader reader{in};
+			ankerl::nanobench::doNotOptimizeAway(read_all(reader));
+		});
+
+		b.run("text in memory", [&]()
+		{
+			suse::text_event_parser parser{text};
+			ankerl::nanobench::doNotOptimizeAway(read_all(parser));
+		});
+
+		b.run("binary in memory", [&]()
+		{
+			suse::binary_event_parser parser{binary};
+			ankerl::nanobench::doNotOptimizeAway(read_all(parser));
+		});
+	}
+}
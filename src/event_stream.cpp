@@ -0,0 +1,245 @@
+#include "event_stream.hpp"
+
+#include <algorithm>
+#include <charconv>
+#include <string>
+
+namespace suse
+{
+	namespace
+	{
+		constexpr std::size_t binary_header_size = binary_stream_magic.size()+2;
+		constexpr std::size_t block_size_bytes = 4;
+
+		std::size_t check_binary_header(std::span<const char> header)
+		{
+			if(header.size()!=binary_header_size || !std::equal(binary_stream_magic.begin(),binary_stream_magic.end(),header.begin()))
+				throw stream_format_error{"Input is not a binary event stream"};
+
+			if(static_cast<std::uint8_t>(header[binary_stream_magic.size()])!=binary_stream_version)
+				throw stream_format_error{"Unsupported binary event stream version"};
+
+			return static_cast<std::uint8_t>(header.back());
+		}
+
+		std::uint32_t decode_block_size(const char* bytes)
+		{
+			std::uint32_t count = 0;
+			for(std::size_t i=0;i<block_size_bytes;++i)
+				count |= std::uint32_t{static_cast<std::uint8_t>(bytes[i])}<<(8*i);
+
+			return count;
+		}
+
+		bool is_space(char c)
+		{
+			return c==' ' || c=='\n' || c=='\t' || c=='\r' || c=='\v' || c=='\f';
+		}
+	}
+
+	input_format parse_input_format(std::string_view name)
+	{
+		if(name=="text")
+			return input_format::text;
+		if(name=="binary")
+			return input_format::binary;
+
+		throw stream_format_error{"Unknown input format '"+std::string{name}+"', must be one of text or binary"};
+	}
+
+	text_event_reader::text_event_reader(std::istream& in):
+		in_{&in}
+	{}
+
+	bool text_event_reader::next(event& e)
+	{
+		return static_cast<bool>(*in_>>e);
+	}
+
+	binary_event_reader::binary_event_reader(std::istream& in):
+		in_{in.rdbuf()}
+	{
+		std::array<char,binary_header_size> header;
+		const auto header_size = in_->sgetn(header.data(),header.size());
+		alphabet_.resize(check_binary_header(std::span{header}.first(static_cast<std::size_t>(header_size))));
+		if(in_->sgetn(alphabet_.data(),alphabet_.size())!=static_cast<std::streamsize>(alphabet_.size()))
+			throw stream_format_error{"Truncated binary event stream header"};
+	}
+
+	bool binary_event_reader::next(event& e)
+	{
+		if(next_in_block_==block_types_.size() && !read_block())
+			return false;
+
+		e.type = block_types_[next_in_block_++];
+		e.timestamp = previous_timestamp_+=read_varint();
+		return true;
+	}
+
+	bool binary_event_reader::read_block()
+	{
+		std::array<char,block_size_bytes> count_bytes;
+		const auto read = in_->sgetn(count_bytes.data(),count_bytes.size());
+		if(read==0)
+			return false;
+		if(read!=static_cast<std::streamsize>(count_bytes.size()))
+			throw stream_format_error{"Truncated binary event stream block"};
+
+		const auto count = decode_block_size(count_bytes.data());
+		block_types_.resize(count);
+		next_in_block_ = 0;
+		if(in_->sgetn(block_types_.data(),count)!=static_cast<std::streamsize>(count))
+			throw stream_format_error{"Truncated binary event stream block"};
+
+		return count>0 || read_block();
+	}
+
+	std::size_t binary_event_reader::read_varint()
+	{
+		std::size_t value = 0;
+		for(unsigned shift=0;shift<64;shift+=7)
+		{
+			const auto byte = in_->sbumpc();
+			if(byte==std::streambuf::traits_type::eof())
+				throw stream_format_error{"Truncated binary event stream block"};
+
+			value |= std::size_t{static_cast<std::uint8_t>(byte) & 0x7fu}<<shift;
+			if((byte & 0x80)==0)
+				return value;
+		}
+
+		throw stream_format_error{"Malformed timestamp in binary event stream"};
+	}
+
+	text_event_parser::text_event_parser(std::span<const char> bytes):
+		position_{bytes.data()},
+		end_{bytes.data()+bytes.size()}
+	{}
+
+	bool text_event_parser::next(event& e)
+	{
+		position_ = std::find_if_not(position_,end_,is_space);
+		if(position_==end_)
+			return false;
+
+		e.type = *position_++;
+		position_ = std::find_if_not(position_,end_,is_space);
+
+		const auto [timestamp_end, error] = std::from_chars(position_,end_,e.timestamp);
+		if(error!=std::errc{})
+			throw stream_format_error{"Malformed timestamp in text event stream"};
+
+		position_ = timestamp_end;
+		return true;
+	}
+
+	binary_event_parser::binary_event_parser(std::span<const char> bytes):
+		position_{bytes.data()},
+		end_{bytes.data()+bytes.size()}
+	{
+		const auto alphabet_size = check_binary_header(bytes.first(std::min(bytes.size(),binary_header_size)));
+		position_ += binary_header_size;
+		if(static_cast<std::size_t>(end_-position_)<alphabet_size)
+			throw stream_format_error{"Truncated binary event stream header"};
+
+		alphabet_ = {position_,alphabet_size};
+		position_ += alphabet_size;
+	}
+
+	bool binary_event_parser::next(event& e)
+	{
+		if(remaining_in_block_==0 && !read_block())
+			return false;
+
+		--remaining_in_block_;
+		e.type = *block_types_++;
+		e.timestamp = previous_timestamp_+=read_varint();
+		return true;
+	}
+
+	bool binary_event_parser::read_block()
+	{
+		for(;;)
+		{
+			if(position_==end_)
+				return false;
+			if(static_cast<std::size_t>(end_-position_)<block_size_bytes)
+				throw stream_format_error{"Truncated binary event stream block"};
+
+			remaining_in_block_ = decode_block_size(position_);
+			position_ += block_size_bytes;
+			if(static_cast<std::size_t>(end_-position_)<remaining_in_block_)
+				throw stream_format_error{"Truncated binary event stream block"};
+
+			block_types_ = position_;
+			position_ += remaining_in_block_;
+			if(remaining_in_block_>0)
+				return true;
+		}
+	}
+
+	std::size_t binary_event_parser::read_varint()
+	{
+		std::size_t value = 0;
+		for(unsigned shift=0;shift<64;shift+=7)
+		{
+			if(position_==end_)
+				throw stream_format_error{"Truncated binary event stream block"};
+
+			const auto byte = static_cast<std::uint8_t>(*position_++);
+			value |= std::size_t{byte & 0x7fu}<<shift;
+			if((byte & 0x80)==0)
+				return value;
+		}
+
+		throw stream_format_error{"Malformed timestamp in binary event stream"};
+	}
+
+	binary_event_writer::binary_event_writer(std::ostream& out, std::string_view alphabet):
+		out_{&out}
+	{
+		if(alphabet.size()>255)
+			throw stream_format_error{"Alphabet of a binary event stream is limited to 255 symbols"};
+
+		out_->write(binary_stream_magic.data(),binary_stream_magic.size());
+		out_->put(static_cast<char>(binary_stream_version));
+		out_->put(static_cast<char>(alphabet.size()));
+		out_->write(alphabet.data(),alphabet.size());
+	}
+
+	void binary_event_writer::write(std::span<const event> events)
+	{
+		constexpr std::size_t max_block_size = std::size_t{1}<<16;
+		for(;events.size()>max_block_size;events=events.subspan(max_block_size))
+			write_block(events.first(max_block_size));
+
+		if(!events.empty())
+			write_block(events);
+	}
+
+	void binary_event_writer::write_block(std::span<const event> events)
+	{
+		if(events.front().timestamp<previous_timestamp_ || !std::is_sorted(events.begin(),events.end(),[](const auto& lhs, const auto& rhs){ return lhs.timestamp<rhs.timestamp; }))
+			throw stream_format_error{"Timestamps of a binary event stream must not decrease"};
+
+		const auto count = static_cast<std::uint32_t>(events.size());
+		for(std::size_t i=0;i<4;++i)
+			out_->put(static_cast<char>((count>>(8*i)) & 0xffu));
+
+		for(const auto& e: events)
+			out_->put(e.type);
+
+		for(const auto& e: events)
+		{
+			auto delta = e.timestamp-previous_timestamp_;
+			previous_timestamp_ = e.timestamp;
+			do
+			{
+				const auto low_bits = static_cast<char>(delta & 0x7fu);
+				delta >>= 7;
+				out_->put(delta==0?low_bits:static_cast<char>(low_bits | 0x80));
+			}
+			while(delta!=0);
+		}
+	}
+}
@@ -0,0 +1,159 @@
+#ifndef SUSE_EVENT_STREAM_HPP
+#define SUSE_EVENT_STREAM_HPP
+
+#include "event.hpp"
+
+#include <array>
+#include <iostream>
+#include <span>
+#include <stdexcept>
+#include <string>
+#include <string_view>
+#include <vector>
+
+#include <cstddef>
+#include <cstdint>
+
+namespace suse
+{
+	/*
+		Binary event stream format:
+
+		header: "SUSE" | version (1 byte) | alphabet size n (1 byte) | n alphabet symbols
+		blocks: event count k (u32, little endian) | k event types (1 byte each) | k timestamp deltas (LEB128 varints)
+
+		Each timestamp is stored as the difference to the previous one (the first one to 0),
+		so timestamps have to be non-decreasing. The stream ends with the last complete block.
+	*/
+	inline constexpr std::array<char,4> binary_stream_magic{'S','U','S','E'};
+	inline constexpr std::uint8_t binary_stream_version = 1;
+
+	enum class input_format
+	{
+		text,
+		binary
+	};
+
+	struct stream_format_error: std::runtime_error
+	{
+		using std::runtime_error::runtime_error;
+	};
+
+	input_format parse_input_format(std::string_view name);
+
+	class text_event_reader
+	{
+		public:
+		explicit text_event_reader(std::istream& in);
+
+		bool next(event& e);
+
+		private:
+		std::istream* in_;
+	};
+
+	class binary_event_reader
+	{
+		public:
+		explicit binary_event_reader(std::istream& in);
+
+		const std::string& alphabet() const { return alphabet_; }
+
+		bool next(event& e);
+
+		private:
+		std::streambuf* in_;
+		std::string alphabet_;
+
+		std::vector<char> block_types_;
+		std::size_t next_in_block_ = 0;
+		std::size_t previous_timestamp_ = 0;
+
+		bool read_block();
+		std::size_t read_varint();
+	};
+
+	/*
+		The parsers read events directly from an in-memory stream, e.g. a mapped_file,
+		without copying the underlying bytes.
+	*/
+	class text_event_parser
+	{
+		public:
+		explicit text_event_parser(std::span<const char> bytes);
+
+		bool next(event& e);
+
+		private:
+		const char* position_;
+		const char* end_;
+	};
+
+	class binary_event_parser
+	{
+		public:
+		explicit binary_event_parser(std::span<const char> bytes);
+
+		std::string_view alphabet() const { return alphabet_; }
+
+		bool next(event& e);
+
+		private:
+		const char* position_;
+		const char* end_;
+		std::string_view alphabet_;
+
+		const char* block_types_ = nullptr;
+		std::size_t remaining_in_block_ = 0;
+		std::size_t previous_timestamp_ = 0;
+
+		bool read_block();
+		std::size_t read_varint();
+	};
+
+	class binary_event_writer
+	{
+		public:
+		binary_event_writer(std::ostream& out, std::string_view alphabet);
+
+		void write(std::span<const event> events);
+
+		private:
+		std::ostream* out_;
+		std::size_t previous_timestamp_ = 0;
+
+		void write_block(std::span<const event> events);
+	};
+
+	template <typename callback_type>
+	void with_event_reader(input_format format, std::istream& in, callback_type&& callback)
+	{
+		if(format==input_format::binary)
+		{
+			binary_event_reader reader{in};
+			callback(reader);
+		}
+		else
+		{
+			text_event_reader reader{in};
+			callback(reader);
+		}
+	}
+
+	template <typename callback_type>
+	void with_event_parser(input_format format, std::span<const char> bytes, callback_type&& callback)
+	{
+		if(format==input_format::binary)
+		{
+			binary_event_parser parser{bytes};
+			callback(parser);
+		}
+		else
+		{
+			text_event_parser parser{bytes};
+			callback(parser);
+		}
+	}
+}
+
+#endif
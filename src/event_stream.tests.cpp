@@ -0,0 +1,144 @@
+#include "event_stream.hpp"
+#include "mapped_file.hpp"
+
+#include <doctest/doctest.h>
+
+#include <filesystem>
+#include <fstream>
+#include <sstream>
+#include <system_error>
+#include <vector>
+
+namespace
+{
+	template <typename reader_type>
+	std::vector<suse::event> read_all(reader_type& reader)
+	{
+		std::vector<suse::event> events;
+		for(suse::event e; reader.next(e);)
+			events.push_back(e);
+
+		return events;
+	}
+}
+
+TEST_SUITE("suse::event_stream")
+{
+	TEST_CASE("text")
+	{
+		std::istringstream in{"a 0 b 1 c 17 a 100000000000 \n"};
+		suse::text_event_reader reader{in};
+
+		const std::vector<suse::event> expected{{'a',0},{'b',1},{'c',17},{'a',100000000000}};
+		CHECK(read_all(reader)==expected);
+	}
+
+	TEST_CASE("binary round trip")
+	{
+		std::vector<suse::event> events;
+		for(std::size_t i=0;i<200000;++i)
+			events.push_back({static_cast<char>('a'+i%3),i*i/7});
+
+		std::stringstream buffer;
+		suse::binary_event_writer writer{buffer,"abc"};
+		writer.write(std::span{events}.first(10));
+		writer.write(std::span{events}.subspan(10));
+
+		suse::binary_event_reader reader{buffer};
+		CHECK(reader.alphabet()=="abc");
+		CHECK(read_all(reader)==events);
+	}
+
+	TEST_CASE("binary empty stream")
+	{
+		std::stringstream buffer;
+		suse::binary_event_writer writer{buffer,"ab"};
+
+		suse::binary_event_reader reader{buffer};
+		CHECK(read_all(reader).empty());
+	}
+
+	TEST_CASE("binary errors")
+	{
+		std::istringstream text{"a 0 b 1 "};
+		CHECK_THROWS_AS(suse::binary_event_reader{text},suse::stream_format_error);
+
+		std::stringstream decreasing;
+		suse::binary_event_writer writer{decreasing,"a"};
+		const std::vector<suse::event> events{{'a',5},{'a',4}};
+		CHECK_THROWS_AS(writer.write(events),suse::stream_format_error);
+
+		std::stringstream truncated;
+		suse::binary_event_writer truncated_writer{truncated,"a"};
+		const std::vector<suse::event> large{{'a',1000000}};
+		truncated_writer.write(large);
+		auto bytes = truncated.str();
+		bytes.pop_back();
+
+		std::istringstream in{bytes};
+		suse::binary_event_reader reader{in};
+		suse::event e;
+		CHECK_THROWS_AS(reader.next(e),suse::stream_format_error);
+	}
+
+	TEST_CASE("text parser")
+	{
+		const std::string_view text{"a 0 b 1\nc 17\ta 100000000000 \n"};
+		suse::text_event_parser parser{text};
+
+		const std::vector<suse::event> expected{{'a',0},{'b',1},{'c',17},{'a',100000000000}};
+		CHECK(read_all(parser)==expected);
+
+		suse::text_event_parser malformed{std::string_view{"a 0 b x "}};
+		suse::event e;
+		CHECK(malformed.next(e));
+		CHECK_THROWS_AS(malformed.next(e),suse::stream_format_error);
+	}
+
+	TEST_CASE("binary parser")
+	{
+		std::vector<suse::event> events;
+		for(std::size_t i=0;i<200000;++i)
+			events.push_back({static_cast<char>('a'+i%3),i*i/7});
+
+		std::ostringstream buffer;
+		suse::binary_event_writer writer{buffer,"abc"};
+		writer.write(events);
+		const auto bytes = buffer.str();
+
+		suse::binary_event_parser parser{bytes};
+		CHECK(parser.alphabet()=="abc");
+		CHECK(read_all(parser)==events);
+
+		suse::binary_event_parser truncated{std::string_view{bytes}.substr(0,bytes.size()-1)};
+		CHECK_THROWS_AS(read_all(truncated),suse::stream_format_error);
+		CHECK_THROWS_AS(suse::binary_event_parser{std::string_view{"SUS"}},suse::stream_format_error);
+	}
+
+	TEST_CASE("mapped file")
+	{
+		const auto path = std::filesystem::temp_directory_path()/"suse_mapped_file_test.txt";
+		{
+			std::ofstream out{path};
+			out<<"a 1 b 2 c 3 \n";
+		}
+
+		{
+			suse::mapped_file file{path};
+			suse::text_event_parser parser{file.bytes()};
+
+			const std::vector<suse::event> expected{{'a',1},{'b',2},{'c',3}};
+			CHECK(read_all(parser)==expected);
+		}
+
+		std::filesystem::remove(path);
+		CHECK_THROWS_AS(suse::mapped_file{path},std::system_error);
+	}
+
+	TEST_CASE("input format names")
+	{
+		CHECK(suse::parse_input_format("text")==suse::input_format::text);
+		CHECK(suse::parse_input_format("binary")==suse::input_format::binary);
+		CHECK_THROWS_AS(suse::parse_input_format("csv"),suse::stream_format_error);
+	}
+}
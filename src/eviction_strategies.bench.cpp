@@ -0,0 +1,65 @@
+#include "eviction_strategies.hpp"
+#include "log_double.hpp"
+#include "summary_selector.hpp"
+
+#include <boost/multiprecision/cpp_bin_float.hpp>
+#include <boost/multiprecision/cpp_int.hpp>
+
+#include <doctest/doctest.h>
+
+#include <nanobench.h>
+
+#include <random>
+#include <string>
+#include <type_traits>
+#include <unordered_map>
+#include <vector>
+
+TEST_SUITE("suse::eviction_strategies")
+{
+	TEST_CASE("suse factor precision")
+	{
+		using counter_type = boost::multiprecision::uint128_t;
+
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::vector<suse::event> events;
+		for(std::size_t i=0;i<2000;++i)
+			events.push_back({static_cast<char>('a'+type_dist(random_gen)),i});
+
+		const auto run = [&]<typename factor_type>(std::type_identity<factor_type>)
+		{
+			suse::summary_selector<counter_type> selector{"a(b|c)*d",100,200};
+			const std::unordered_map<char,factor_type> probabilities{{'a',0.25},{'b',0.25},{'c',0.25},{'d',0.25},{suse::nfa::wildcard_symbol,1}};
+			const suse::eviction_strategies::suse<counter_type,factor_type> strategy{selector,probabilities};
+
+			for(const auto& e: events)
+				selector.process_event(e,strategy);
+
+			return selector.number_of_contained_complete_matches();
+		};
+
+		auto b = ankerl::nanobench::Bench();
+		b.relative(true).batch(events.size()).unit("event");
+
+		b.run("cpp_bin_float_50", [&]()
+		{
+			ankerl::nanobench::doNotOptimizeAway(run(std::type_identity<boost::multiprecision::cpp_bin_float_50>{}));
+		});
+
+		b.run("double", [&]()
+		{
+			ankerl::nanobench::doNotOptimizeAway(run(std::type_identity<double>{}));
+		});
+
+		b.run("long double", [&]()
+		{
+			ankerl::nanobench::doNotOptimizeAway(run(std::type_identity<long double>{}));
+		});
+
+		b.run("log_double", [&]()
+		{
+			ankerl::nanobench::doNotOptimizeAway(run(std::type_identity<suse::log_double>{}));
+		});
+	}
+}
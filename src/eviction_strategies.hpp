@@ -5,8 +5,12 @@
 #include "event.hpp"
 #include "summary_selector.hpp"
 
+#include <algorithm>
+#include <numeric>
 #include <optional>
+#include <utility>
 #include <random>
+#include <set>
 #include <unordered_map>
 #include <vector>
 
@@ -14,18 +18,47 @@
 
 namespace suse::eviction_strategies
 {
-	inline auto fifo = [](auto...) -> std::size_t
+	// batch_size distinct indices below size in ascending order, each set of indices being equally likely
+	inline std::vector<std::size_t> random_indices(std::size_t size, std::size_t batch_size, std::mt19937& random_gen);
+
+	inline constexpr struct
 	{
-		return 0;
-	};
+		std::size_t operator()(auto...) const
+		{
+			return 0;
+		}
 
-	inline auto random = []<typename counter_type>(const summary_selector<counter_type>& selector, const event&)
+		template <typename counter_type>
+		std::vector<std::size_t> select(const summary_selector<counter_type>& selector, const event&, std::size_t batch_size) const
+		{
+			std::vector<std::size_t> oldest(std::min(batch_size,selector.cached_events().size()));
+			std::iota(oldest.begin(),oldest.end(),std::size_t{0});
+			return oldest;
+		}
+	} fifo;
+
+	inline constexpr struct
 	{
-		static std::mt19937 random_gen(std::random_device{}());
-		std::uniform_int_distribution<std::size_t> dist(0,selector.cached_events().size()-1);
+		template <typename counter_type>
+		std::size_t operator()(const summary_selector<counter_type>& selector, const event&) const
+		{
+			std::uniform_int_distribution<std::size_t> dist(0,selector.cached_events().size()-1);
+			return dist(random_gen());
+		}
 
-		return dist(random_gen);
-	};
+		template <typename counter_type>
+		std::vector<std::size_t> select(const summary_selector<counter_type>& selector, const event&, std::size_t batch_size) const
+		{
+			return random_indices(selector.cached_events().size(),batch_size,random_gen());
+		}
+
+		private:
+		static std::mt19937& random_gen()
+		{
+			static std::mt19937 random_gen(std::random_device{}());
+			return random_gen;
+		}
+	} random;
 
 	class seeded_pseudorandom
 	{
@@ -41,6 +74,12 @@ namespace suse::eviction_strategies
 			return dist(random_gen_);
 		}
 
+		template <typename counter_type>
+		std::vector<std::size_t> select(const summary_selector<counter_type>& selector, const event& event, std::size_t batch_size) const
+		{
+			return random_indices(selector.cached_events().size(),batch_size,random_gen_);
+		}
+
 		private:
 		mutable std::mt19937 random_gen_;
 	};
@@ -55,6 +94,43 @@ namespace suse::eviction_strategies
 		explicit suse(const selector_type& selector, const std::unordered_map<char,factor_type>& probabilities);
 
 		std::optional<std::size_t> select(const selector_type& selector, const event& event) const;
+		// the batch_size entries with the lowest benefits, as far as they are lower than the one of the new event
+		std::vector<std::size_t> select(const selector_type& selector, const event& event, std::size_t batch_size) const;
+
+		// bytes of the tables of expected changes
+		std::size_t memory_usage() const;
+
+		protected:
+		struct scan_state
+		{
+			scan_state() = default;
+			explicit scan_state(std::size_t batch_size):
+				batch_size{batch_size}
+			{}
+
+			std::optional<factor_type> lowest_benefit;
+			std::size_t lowest_idx = 0;
+			std::size_t oldest_initiator = 0, newest_initiator = 0;
+
+			// for a batch, a max-heap of the (benefit, index) pairs of the batch_size lowest benefits instead
+			std::size_t batch_size = 0;
+			std::vector<std::pair<factor_type,std::size_t>> lowest;
+		};
+
+		// continues the search for the entry with the lowest benefit at first_idx
+		void scan(const selector_type& selector, std::size_t first_idx, scan_state& state) const;
+		void track_initiator(const selector_type& selector, std::size_t idx, scan_state& state) const;
+		void consider(const selector_type& selector, std::size_t idx, scan_state& state) const;
+		std::optional<std::size_t> decide(const selector_type& selector, const event& new_event, const scan_state& state) const;
+		std::vector<std::size_t> decide_batch(const selector_type& selector, const event& new_event, const scan_state& state) const;
+		factor_type benefit_if_added(const selector_type& selector, const event& new_event, const scan_state& state) const;
+
+		bool is_initiator(const selector_type& selector, char symbol) const;
+
+		// the counters are converted to factor_type once per candidate, not once per multiplication
+		using factor_counter_type = execution_state_counter<factor_type>;
+
+		factor_type current_benefit(const selector_type& selector,const factor_counter_type& counts) const;
 
 		private:
 		struct state_change
@@ -65,10 +141,87 @@ namespace suse::eviction_strategies
 
 		state_change determine_followup(const state_change& previous, const selector_type& selector,const std::unordered_map<char,factor_type>& probabilities) const;
 
-		factor_type apply(const state_counter_type& counts, const execution_state_counter<factor_type>& factors) const;
+		factor_type apply(const factor_counter_type& counts, const factor_counter_type& factors) const;
+
+		factor_type expected_future_benefit(const selector_type& selector,const factor_counter_type& counts, std::size_t min_remaining, std::size_t max_remaining) const;
+	};
+
+	/*
+		Makes the same decisions as suse, but keeps the benefits of the cached events before the active time window in an index.
+		Those benefits only change when the selector replays their counters, so only the active time window is scanned per event.
+		An instance follows the changes of one selector and must be used for every eviction decision of that selector.
+	*/
+	template <typename counter_type, typename factor_type>
+	class indexed_suse: private suse<counter_type,factor_type>
+	{
+		using base = suse<counter_type,factor_type>;
+		using selector_type = summary_selector<counter_type>;
+
+		public:
+		explicit indexed_suse(const selector_type& selector, const std::unordered_map<char,factor_type>& probabilities);
+
+		std::optional<std::size_t> select(const selector_type& selector, const event& event) const;
+		std::vector<std::size_t> select(const selector_type& selector, const event& event, std::size_t batch_size) const;
+
+		// bytes of the tables and of the index, the nodes of the index are estimated
+		std::size_t memory_usage() const;
+
+		private:
+		struct indexed_entry
+		{
+			std::size_t id;
+			factor_type benefit;
+			bool modified;
+		};
+
+		// aligned with the cache of the selector, the ids grow with the position in the cache
+		mutable std::vector<indexed_entry> entries_;
+		mutable std::size_t next_id_ = 0;
+		mutable bool synchronized_ = false;
+
+		// (benefit, id) of the entries before the active time window, the first element is the leftmost entry with the lowest benefit
+		mutable std::set<std::pair<factor_type,std::size_t>> index_;
+		mutable std::size_t indexed_prefix_ = 0;
+
+		void synchronize(const selector_type& selector) const;
+		void rebuild(const selector_type& selector) const;
+		void resize_prefix(const selector_type& selector, std::size_t prefix) const;
+		void update_benefit(const selector_type& selector, std::size_t idx) const;
+		std::size_t index_of(std::size_t id) const;
+	};
+
+	enum class sampling_method
+	{
+		uniform,
+		stratified // one candidate from each of sample_size equally sized age groups of the cache
+	};
+
+	/*
+		Evaluates the benefit of suse for sample_size randomly chosen cached events only and evicts the worst of them.
+		The cost per event does not grow with the summary size, with a sample size of at least the summary size it behaves like suse.
+	*/
+	template <typename counter_type, typename factor_type>
+	class sampled_suse: private suse<counter_type,factor_type>
+	{
+		using base = suse<counter_type,factor_type>;
+		using selector_type = summary_selector<counter_type>;
+
+		public:
+		explicit sampled_suse(const selector_type& selector, const std::unordered_map<char,factor_type>& probabilities, std::size_t sample_size, sampling_method method, std::mt19937::result_type seed);
+
+		std::optional<std::size_t> select(const selector_type& selector, const event& event) const;
+		std::vector<std::size_t> select(const selector_type& selector, const event& event, std::size_t batch_size) const;
+
+		using base::memory_usage;
+
+		private:
+		std::size_t sample_size_;
+		sampling_method method_;
+		mutable std::mt19937 random_gen_;
 
-		factor_type current_benefit(const selector_type& selector,const state_counter_type& counts) const;
-		factor_type expected_future_benefit(const selector_type& selector,const state_counter_type& counts, std::size_t min_remaining, std::size_t max_remaining) const;
+		// sorted cache indices
+		std::vector<std::size_t> sample(std::size_t cache_size) const;
+		void scan_sample(const selector_type& selector, typename base::scan_state& state) const;
 	};
 }
 
@@ -1,8 +1,14 @@
 #include "eviction_strategies.hpp"
+#include "log_double.hpp"
 #include "summary_selector.hpp"
 
+#include <boost/multiprecision/cpp_bin_float.hpp>
+
 #include <doctest/doctest.h>
 
+#include <random>
+#include <tuple>
+#include <vector>
 #include <unordered_map>
 
 TEST_SUITE("suse::eviction_strategies")
@@ -22,4 +28,221 @@ TEST_SUITE("suse::eviction_strategies")
 
 		CHECK(selector==correct_selector);
 	}
+
+	TEST_CASE_TEMPLATE("suse with reduced factor precision",factor_type,double,long double,suse::log_double)
+	{
+		using reference_factor_type = boost::multiprecision::cpp_bin_float_50;
+		const std::string_view input = "aabbcbcbcacbccbabcdeacbdeabdadedbcbcdacdeacbdacaaacbcabcdbcacbcdacbadcbacdbcacbdabdacbdacbcbcecbacbbcbbcbbcacbdcabcaaaaabddccbacbcadcbbedacccadcbcbcdabdbacdabdacbcbcbcbabcecbadcbecbacbdcbacbcbabdab";
+
+		suse::summary_selector<std::size_t> reference_selector{"a(b|c)*d",20,30};
+		suse::summary_selector<std::size_t> selector{"a(b|c)*d",20,30};
+
+		const std::unordered_map<char,reference_factor_type> reference_probabilities{{'a',0.2},{'b',0.3},{'c',0.4},{'d',0.1}};
+		const std::unordered_map<char,factor_type> probabilities{{'a',0.2},{'b',0.3},{'c',0.4},{'d',0.1}};
+
+		const suse::eviction_strategies::suse<std::size_t,reference_factor_type> reference_strategy{reference_selector,reference_probabilities};
+		const suse::eviction_strategies::suse<std::size_t,factor_type> strategy{selector,probabilities};
+
+		for(std::size_t idx=0; auto c: input)
+		{
+			reference_selector.process_event({c,idx},reference_strategy);
+			selector.process_event({c,idx++},strategy);
+		}
+
+		CHECK(selector==reference_selector);
+	}
+
+	TEST_CASE("indexed suse chooses the same victims as suse")
+	{
+		using counter_type = boost::multiprecision::uint128_t;
+		using factor_type = boost::multiprecision::cpp_bin_float_50;
+
+		const std::unordered_map<char,factor_type> probabilities{{'a',0.2},{'b',0.3},{'c',0.4},{'d',0.1},{suse::nfa::wildcard_symbol,1}};
+
+		std::mt19937 random_gen{7};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::uniform_int_distribution<std::size_t> gap_dist(0,2);
+
+		for(const auto [summary_size,time_window_size,time_to_live]: {std::tuple<std::size_t,std::size_t,std::size_t>{40,10,1000},{40,60,1000},{25,15,60},{300,20,1000}})
+		{
+			CAPTURE(summary_size);
+			CAPTURE(time_window_size);
+			CAPTURE(time_to_live);
+
+			suse::summary_selector<counter_type> selector{"a(b|c)*d",summary_size,time_window_size,time_to_live};
+			suse::summary_selector<counter_type> reference_selector{"a(b|c)*d",summary_size,time_window_size,time_to_live};
+
+			const suse::eviction_strategies::indexed_suse<counter_type,factor_type> indexed{selector,probabilities};
+			const suse::eviction_strategies::suse<counter_type,factor_type> full_scan{reference_selector,probabilities};
+
+			std::size_t decisions = 0, evictions = 0;
+			const auto compare = [&](const auto& current_selector, const suse::event& e)
+			{
+				const auto victim = indexed.select(current_selector,e);
+				CHECK(victim==full_scan.select(current_selector,e));
+
+				++decisions;
+				evictions += victim.has_value();
+				return victim;
+			};
+
+			for(std::size_t timestamp=0, i=0;i<600;++i,timestamp+=gap_dist(random_gen))
+			{
+				const suse::event e{static_cast<char>('a'+type_dist(random_gen)),timestamp};
+				selector.process_event(e,compare);
+				reference_selector.process_event(e,full_scan);
+			}
+
+			CHECK(selector==reference_selector);
+			CHECK(evictions>0);
+			CHECK(evictions<decisions);
+		}
+	}
+
+	TEST_CASE("batch eviction")
+	{
+		using counter_type = boost::multiprecision::uint128_t;
+		using factor_type = boost::multiprecision::cpp_bin_float_50;
+
+		const std::unordered_map<char,factor_type> probabilities{{'a',0.2},{'b',0.3},{'c',0.4},{'d',0.1},{suse::nfa::wildcard_symbol,1}};
+
+		std::mt19937 random_gen{5};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::uniform_int_distribution<std::size_t> gap_dist(1,2);
+		std::vector<suse::event> events;
+		for(std::size_t timestamp=0, i=0;i<500;++i,timestamp+=gap_dist(random_gen))
+			events.push_back({static_cast<char>('a'+type_dist(random_gen)),timestamp});
+
+		SUBCASE("a batch of one behaves like single evictions")
+		{
+			suse::summary_selector<counter_type> selector{"a(b|c)*d",30,20};
+			suse::summary_selector<counter_type> reference_selector{"a(b|c)*d",30,20};
+			const suse::eviction_strategies::suse<counter_type,factor_type> batched{selector,probabilities}, single{reference_selector,probabilities};
+			for(const auto& e: events)
+			{
+				selector.process_event(e,batched,1);
+				reference_selector.process_event(e,single);
+			}
+
+			CHECK(selector==reference_selector);
+		}
+
+		SUBCASE("indexed suse chooses the same batches as suse")
+		{
+			suse::summary_selector<counter_type> selector{"a(b|c)*d",30,20};
+			suse::summary_selector<counter_type> reference_selector{"a(b|c)*d",30,20};
+			const suse::eviction_strategies::indexed_suse<counter_type,factor_type> indexed{selector,probabilities};
+			const suse::eviction_strategies::suse<counter_type,factor_type> full_scan{reference_selector,probabilities};
+
+			struct compared
+			{
+				const suse::eviction_strategies::indexed_suse<counter_type,factor_type>& indexed;
+				const suse::eviction_strategies::suse<counter_type,factor_type>& full_scan;
+				std::size_t& evictions;
+
+				std::vector<std::size_t> select(const suse::summary_selector<counter_type>& selector, const suse::event& e, std::size_t batch_size) const
+				{
+					auto victims = indexed.select(selector,e,batch_size);
+					CHECK(victims==full_scan.select(selector,e,batch_size));
+					CHECK(victims.size()<=batch_size);
+
+					evictions+=victims.size()>1;
+					return victims;
+				}
+			};
+
+			std::size_t batch_evictions = 0;
+			const compared compare{indexed,full_scan,batch_evictions};
+			for(const auto& e: events)
+			{
+				selector.process_event(e,compare,4);
+				reference_selector.process_event(e,full_scan,4);
+			}
+
+			CHECK(selector==reference_selector);
+			CHECK(batch_evictions>0);
+		}
+
+		SUBCASE("fifo keeps the newest events")
+		{
+			suse::summary_selector<counter_type> selector{"a(b|c)*d",30,20};
+			for(const auto& e: events)
+			{
+				selector.process_event(e,suse::eviction_strategies::fifo,8);
+				CHECK(selector.cached_events().size()>=std::min<std::size_t>(&e-events.data()+1,23));
+			}
+
+			const auto kept = selector.cached_events().size();
+			suse::summary_selector<counter_type> correct_selector{"a(b|c)*d",30,20};
+			for(auto i=events.size()-kept;i<events.size();++i)
+				correct_selector.process_event(events[i]);
+
+			CHECK(selector==correct_selector);
+		}
+
+		SUBCASE("random")
+		{
+			suse::summary_selector<counter_type> selector{"a(b|c)*d",30,20};
+			const suse::eviction_strategies::seeded_pseudorandom random{3};
+			for(const auto& e: events)
+				selector.process_event(e,random,5);
+
+			CHECK(selector.cached_events().size()>=26);
+			CHECK(std::ranges::is_sorted(selector.cached_events(),{},[](const auto& entry){ return entry.cached_event.timestamp; }));
+		}
+	}
+
+	TEST_CASE("sampled suse")
+	{
+		using counter_type = boost::multiprecision::uint128_t;
+		using factor_type = boost::multiprecision::cpp_bin_float_50;
+
+		const std::unordered_map<char,factor_type> probabilities{{'a',0.2},{'b',0.3},{'c',0.4},{'d',0.1},{suse::nfa::wildcard_symbol,1}};
+
+		std::mt19937 random_gen{11};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::vector<suse::event> events;
+		for(std::size_t i=0;i<400;++i)
+			events.push_back({static_cast<char>('a'+type_dist(random_gen)),i});
+
+		suse::summary_selector<counter_type> reference_selector{"a(b|c)*d",30,20};
+		const suse::eviction_strategies::suse<counter_type,factor_type> full_scan{reference_selector,probabilities};
+		for(const auto& e: events)
+			reference_selector.process_event(e,full_scan);
+
+		SUBCASE("a sample of the whole cache behaves like suse")
+		{
+			for(const auto method: {suse::eviction_strategies::sampling_method::uniform,suse::eviction_strategies::sampling_method::stratified})
+			{
+				suse::summary_selector<counter_type> selector{"a(b|c)*d",30,20};
+				const suse::eviction_strategies::sampled_suse<counter_type,factor_type> sampled{selector,probabilities,30,method,1};
+				for(const auto& e: events)
+					selector.process_event(e,sampled);
+
+				CHECK(selector==reference_selector);
+			}
+		}
+
+		SUBCASE("small samples")
+		{
+			for(const auto method: {suse::eviction_strategies::sampling_method::uniform,suse::eviction_strategies::sampling_method::stratified})
+			{
+				suse::summary_selector<counter_type> selector{"a(b|c)*d",30,20};
+				const suse::eviction_strategies::sampled_suse<counter_type,factor_type> sampled{selector,probabilities,4,method,1};
+				std::size_t evictions = 0;
+				const auto count_evictions = [&](const auto& current_selector, const suse::event& e)
+				{
+					const auto victim = sampled.select(current_selector,e);
+					evictions += victim.has_value();
+					return victim;
+				};
+
+				for(const auto& e: events)
+					selector.process_event(e,count_evictions);
+
+				CHECK(selector.cached_events().size()==30);
+				CHECK(evictions>0);
+			}
+		}
+	}
 }
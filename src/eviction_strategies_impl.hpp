@@ -5,12 +5,28 @@
 */
 
 #include <algorithm>
+#include <numeric>
 
 #include <cstddef>
 
 namespace suse::eviction_strategies
 {
 
+inline std::vector<std::size_t> random_indices(std::size_t size, std::size_t batch_size, std::mt19937& random_gen)
+{
+	// selection sampling, each index is picked with the share of the remaining ones that still has to be picked
+	std::vector<std::size_t> indices;
+	indices.reserve(std::min(batch_size,size));
+	for(std::size_t idx=0;idx<size && indices.size()<batch_size;++idx)
+	{
+		std::uniform_int_distribution<std::size_t> dist(0,size-idx-1);
+		if(dist(random_gen)<batch_size-indices.size())
+			indices.push_back(idx);
+	}
+
+	return indices;
+}
+
 template <typename counter_type, typename factor_type>
 suse<counter_type,factor_type>::suse(const selector_type& selector,const std::unordered_map<char,factor_type>& probabilities)
 {
@@ -54,85 +70,166 @@ auto suse<counter_type,factor_type>::determine_followup(const state_change& prev
 template <typename counter_type, typename factor_type>
 std::optional<std::size_t> suse<counter_type,factor_type>::select(const selector_type& selector, const event& new_event) const
 {
-	const auto is_initiator = [&](char symbol)
+	scan_state state;
+	scan(selector,0,state);
+
+	return decide(selector,new_event,state);
+}
+
+template <typename counter_type, typename factor_type>
+std::vector<std::size_t> suse<counter_type,factor_type>::select(const selector_type& selector, const event& new_event, std::size_t batch_size) const
+{
+	scan_state state{batch_size};
+	scan(selector,0,state);
+
+	return decide_batch(selector,new_event,state);
+}
+
+template <typename counter_type, typename factor_type>
+std::size_t suse<counter_type,factor_type>::memory_usage() const
+{
+	auto bytes = expected_change_at_distance_.capacity()*sizeof(state_change);
+	for(const auto& change: expected_change_at_distance_)
 	{
-		const auto& automaton = selector.automaton();
-		const auto& initial_state = automaton.states()[automaton.initial_state_id()];
-		
-		return initial_state.transitions.count(nfa::wildcard_symbol)>0 || initial_state.transitions.count(symbol)>0;
-	};
+		bytes+=change.factors_per_state.capacity()*sizeof(factor_counter_type);
+		for(const auto& factors: change.factors_per_state)
+			bytes+=factors.heap_bytes();
+	}
+
+	return bytes;
+}
+
+template <typename counter_type, typename factor_type>
+bool suse<counter_type,factor_type>::is_initiator(const selector_type& selector, char symbol) const
+{
+	const auto& automaton = selector.automaton();
+	const auto& initial_state = automaton.states()[automaton.initial_state_id()];
 	
+	return initial_state.transitions.count(nfa::wildcard_symbol)>0 || initial_state.transitions.count(symbol)>0;
+}
+
+template <typename counter_type, typename factor_type>
+void suse<counter_type,factor_type>::scan(const selector_type& selector, std::size_t first_idx, scan_state& state) const
+{
+	for(std::size_t idx=first_idx;idx<selector.cached_events().size();++idx)
+	{
+		if(idx>=selector.active_window().start_idx)
+			track_initiator(selector,idx,state);
+
+		consider(selector,idx,state);
+	}
+}
+
+template <typename counter_type, typename factor_type>
+void suse<counter_type,factor_type>::track_initiator(const selector_type& selector, std::size_t idx, scan_state& state) const
+{
+	if(is_initiator(selector,selector.cached_events()[idx].cached_event.type))
+	{
+		state.oldest_initiator = state.oldest_initiator==0?idx:state.oldest_initiator;
+		state.newest_initiator = idx;
+	}
+}
+
+template <typename counter_type, typename factor_type>
+void suse<counter_type,factor_type>::consider(const selector_type& selector, std::size_t idx, scan_state& state) const
+{
 	const auto& events = selector.cached_events();
 	const auto& window = selector.active_window();
-	
-	std::size_t oldest_initiator = 0, newest_initiator = 0;
+	const auto& event = events[idx];
+
+	const auto min_time_used = selector.current_time() - events[state.newest_initiator].cached_event.timestamp;
+	const auto max_time_used = selector.current_time() - events[state.oldest_initiator].cached_event.timestamp;
+	const auto min_time_left = max_time_used>selector.time_window_size()?0:selector.time_window_size()-max_time_used;
+	const auto max_time_left = min_time_used>selector.time_window_size()?0:selector.time_window_size()-min_time_used;
+
+	auto benefit = current_benefit(selector,factor_counter_type{*event.state_counter});
+	if(idx>=window.start_idx)
+		benefit += expected_future_benefit(selector,factor_counter_type{window.per_event_counters[idx-window.start_idx]},min_time_left,max_time_left);
 
-	std::optional<factor_type> lowest_benefit = std::nullopt;
-	std::size_t lowest_idx = 0;
-	for(std::size_t idx=0;idx<events.size();++idx)
+	if(state.batch_size>0)
 	{
-		const auto& event = events[idx];
-		if(idx>=window.start_idx && is_initiator(event.cached_event.type))
+		auto& lowest = state.lowest;
+		if(lowest.size()==state.batch_size)
 		{
-			oldest_initiator = oldest_initiator==0?idx:oldest_initiator;
-			newest_initiator = idx;
-		}
+			if(!(std::pair{benefit,idx}<lowest.front()))
+				return;
 
-		const auto min_time_used = selector.current_time() - events[newest_initiator].cached_event.timestamp;
-		const auto max_time_used = selector.current_time() - events[oldest_initiator].cached_event.timestamp;
-		const auto min_time_left = max_time_used>selector.time_window_size()?0:selector.time_window_size()-max_time_used;
-		const auto max_time_left = min_time_used>selector.time_window_size()?0:selector.time_window_size()-min_time_used;
+			std::ranges::pop_heap(lowest);
+			lowest.pop_back();
+		}
 
-		auto benefit = current_benefit(selector,event.state_counter);
-		if(idx>=window.start_idx)
-			benefit += expected_future_benefit(selector,window.per_event_counters[idx-window.start_idx],min_time_left,max_time_left);
+		lowest.emplace_back(std::move(benefit),idx);
+		std::ranges::push_heap(lowest);
+		return;
+	}
 
-		if(!lowest_benefit || benefit<*lowest_benefit)
-		{
-			lowest_benefit = std::move(benefit);
-			lowest_idx = idx;
-		}
+	if(!state.lowest_benefit || benefit<*state.lowest_benefit)
+	{
+		state.lowest_benefit = std::move(benefit);
+		state.lowest_idx = idx;
 	}
-	
-	const auto new_counters = advance(selector.active_counts(),selector.automaton(), new_event.type);
-	auto newest_init_time = is_initiator(new_event.type)?new_event.timestamp:events[newest_initiator].cached_event.timestamp;
-	const auto min_time_used = selector.current_time() - newest_init_time;
-	const auto max_time_used = selector.current_time() - events[oldest_initiator].cached_event.timestamp;
-	const auto min_time_left = max_time_used>selector.time_window_size()?0:selector.time_window_size()-max_time_used;
-	const auto max_time_left = min_time_used>selector.time_window_size()?0:selector.time_window_size()-min_time_used;
+}
 
-	const auto benefit_if_added = current_benefit(selector,new_counters) + expected_future_benefit(selector,new_counters,min_time_left, max_time_left);
-	if(benefit_if_added>*lowest_benefit)
-		return lowest_idx;
+template <typename counter_type, typename factor_type>
+std::optional<std::size_t> suse<counter_type,factor_type>::decide(const selector_type& selector, const event& new_event, const scan_state& state) const
+{
+	if(benefit_if_added(selector,new_event,state)>*state.lowest_benefit)
+		return state.lowest_idx;
 
 	return std::nullopt;
 }
 
 template <typename counter_type, typename factor_type>
-factor_type suse<counter_type,factor_type>::apply(const state_counter_type& counts, const execution_state_counter<factor_type>& factors) const
+std::vector<std::size_t> suse<counter_type,factor_type>::decide_batch(const selector_type& selector, const event& new_event, const scan_state& state) const
 {
-	const auto multiply = [](const factor_type& factor, const counter_type& counter)
+	const auto benefit = benefit_if_added(selector,new_event,state);
+
+	std::vector<std::size_t> to_evict;
+	for(const auto& [lowest_benefit,idx]: state.lowest)
 	{
-		return factor*static_cast<factor_type>(counter);
-	};
+		if(benefit>lowest_benefit)
+			to_evict.push_back(idx);
+	}
+
+	std::ranges::sort(to_evict);
+	return to_evict;
+}
+
+template <typename counter_type, typename factor_type>
+factor_type suse<counter_type,factor_type>::benefit_if_added(const selector_type& selector, const event& new_event, const scan_state& state) const
+{
+	const auto& events = selector.cached_events();
 
-	return std::inner_product(factors.begin(),factors.end(),counts.begin(),factor_type{0},std::plus<>{},multiply);
+	const factor_counter_type new_counters{advance(selector.active_counts(),selector.automaton(), new_event.type)};
+	auto newest_init_time = is_initiator(selector,new_event.type)?new_event.timestamp:events[state.newest_initiator].cached_event.timestamp;
+	const auto min_time_used = selector.current_time() - newest_init_time;
+	const auto max_time_used = selector.current_time() - events[state.oldest_initiator].cached_event.timestamp;
+	const auto min_time_left = max_time_used>selector.time_window_size()?0:selector.time_window_size()-max_time_used;
+	const auto max_time_left = min_time_used>selector.time_window_size()?0:selector.time_window_size()-min_time_used;
+
+	return current_benefit(selector,new_counters) + expected_future_benefit(selector,new_counters,min_time_left, max_time_left);
+}
+
+template <typename counter_type, typename factor_type>
+factor_type suse<counter_type,factor_type>::apply(const factor_counter_type& counts, const factor_counter_type& factors) const
+{
+	return std::inner_product(factors.begin(),factors.end(),counts.begin(),factor_type{0});
 }
 
 template <typename counter_type, typename factor_type>
-factor_type suse<counter_type,factor_type>::current_benefit(const selector_type& selector,const state_counter_type& counts) const
+factor_type suse<counter_type,factor_type>::current_benefit(const selector_type& selector,const factor_counter_type& counts) const
 {
 	factor_type sum{};
 	for(std::size_t idx=0;idx<counts.size();++idx)
 	{
 		if(selector.automaton().states()[idx].is_final)
-			sum += static_cast<factor_type>(counts[idx]);
+			sum += counts[idx];
 	}
 	return sum;
 }
 
 template <typename counter_type, typename factor_type>
-factor_type suse<counter_type,factor_type>::expected_future_benefit(const selector_type& selector,const state_counter_type& counts, std::size_t min_remaining, std::size_t max_remaining) const
+factor_type suse<counter_type,factor_type>::expected_future_benefit(const selector_type& selector,const factor_counter_type& counts, std::size_t min_remaining, std::size_t max_remaining) const
 {
 	const auto& min_factors = expected_change_at_distance_[min_remaining].factors_per_state;
 	const auto& max_factors = expected_change_at_distance_[max_remaining].factors_per_state;
@@ -146,4 +243,220 @@ factor_type suse<counter_type,factor_type>::expected_future_benefit(const select
 	return sum - current_benefit(selector,counts);
 }
 
+template <typename counter_type, typename factor_type>
+indexed_suse<counter_type,factor_type>::indexed_suse(const selector_type& selector, const std::unordered_map<char,factor_type>& probabilities):
+	base{selector,probabilities}
+{}
+
+template <typename counter_type, typename factor_type>
+std::optional<std::size_t> indexed_suse<counter_type,factor_type>::select(const selector_type& selector, const event& new_event) const
+{
+	synchronize(selector);
+
+	typename base::scan_state state;
+	if(!index_.empty())
+	{
+		const auto& [benefit,id] = *index_.begin();
+		state.lowest_benefit = benefit;
+		state.lowest_idx = index_of(id);
+	}
+	base::scan(selector,indexed_prefix_,state);
+
+	return base::decide(selector,new_event,state);
+}
+
+template <typename counter_type, typename factor_type>
+std::vector<std::size_t> indexed_suse<counter_type,factor_type>::select(const selector_type& selector, const event& new_event, std::size_t batch_size) const
+{
+	synchronize(selector);
+
+	// the lowest benefits of the prefix are the first ones of the index, they are ordered by their position among equal benefits
+	typename base::scan_state state{batch_size};
+	for(auto it=index_.begin();it!=index_.end() && state.lowest.size()<batch_size;++it)
+		state.lowest.emplace_back(it->first,index_of(it->second));
+	std::ranges::make_heap(state.lowest);
+
+	base::scan(selector,indexed_prefix_,state);
+
+	return base::decide_batch(selector,new_event,state);
+}
+
+template <typename counter_type, typename factor_type>
+std::size_t indexed_suse<counter_type,factor_type>::memory_usage() const
+{
+	// a node of the red-black tree holds the colour and three pointers besides its element
+	constexpr auto index_node_bytes = sizeof(typename decltype(index_)::value_type)+4*sizeof(void*);
+	return base::memory_usage()+entries_.capacity()*sizeof(indexed_entry)+index_.size()*index_node_bytes;
+}
+
+template <typename counter_type, typename factor_type>
+void indexed_suse<counter_type,factor_type>::synchronize(const selector_type& selector) const
+{
+	if(!synchronized_ || selector.cache_changes_dropped())
+	{
+		rebuild(selector);
+		return;
+	}
+
+	std::vector<std::size_t> modified_ids;
+	for(const auto& change: selector.cache_changes())
+	{
+		switch(change.type)
+		{
+			case cache_change::kind::appended:
+				entries_.push_back({next_id_++,factor_type{},false});
+				break;
+			case cache_change::kind::erased:
+				for(auto idx=change.begin;idx<std::min(change.end,indexed_prefix_);++idx)
+					index_.erase({entries_[idx].benefit,entries_[idx].id});
+				indexed_prefix_-=std::min(change.end,indexed_prefix_)-std::min(change.begin,indexed_prefix_);
+				entries_.erase(entries_.begin()+change.begin,entries_.begin()+change.end);
+				break;
+			case cache_change::kind::modified:
+				for(auto idx=change.begin;idx<std::min(change.end,indexed_prefix_);++idx)
+				{
+					if(!entries_[idx].modified)
+						modified_ids.push_back(entries_[idx].id);
+					entries_[idx].modified = true;
+				}
+				break;
+		}
+	}
+
+	if(entries_.size()!=selector.cached_events().size())
+	{
+		rebuild(selector);
+		return;
+	}
+
+	// the positions only match the cache once all changes are applied
+	for(const auto id: modified_ids)
+	{
+		const auto it = std::lower_bound(entries_.begin(),entries_.end(),id,[](const auto& entry, std::size_t id){ return entry.id<id; });
+		if(it==entries_.end() || it->id!=id)
+			continue;
+
+		const auto idx = static_cast<std::size_t>(it-entries_.begin());
+		it->modified = false;
+		if(idx<indexed_prefix_)
+		{
+			index_.erase({it->benefit,id});
+			update_benefit(selector,idx);
+		}
+	}
+
+	resize_prefix(selector,selector.active_window().start_idx);
+}
+
+template <typename counter_type, typename factor_type>
+void indexed_suse<counter_type,factor_type>::rebuild(const selector_type& selector) const
+{
+	entries_.clear();
+	index_.clear();
+	indexed_prefix_ = 0;
+
+	for(std::size_t idx=0;idx<selector.cached_events().size();++idx)
+		entries_.push_back({next_id_++,factor_type{},false});
+
+	resize_prefix(selector,selector.active_window().start_idx);
+	synchronized_ = true;
+}
+
+template <typename counter_type, typename factor_type>
+void indexed_suse<counter_type,factor_type>::resize_prefix(const selector_type& selector, std::size_t prefix) const
+{
+	for(;indexed_prefix_<prefix;++indexed_prefix_)
+		update_benefit(selector,indexed_prefix_);
+
+	for(;indexed_prefix_>prefix;--indexed_prefix_)
+		index_.erase({entries_[indexed_prefix_-1].benefit,entries_[indexed_prefix_-1].id});
+}
+
+template <typename counter_type, typename factor_type>
+void indexed_suse<counter_type,factor_type>::update_benefit(const selector_type& selector, std::size_t idx) const
+{
+	auto& entry = entries_[idx];
+	entry.benefit = base::current_benefit(selector,typename base::factor_counter_type{*selector.cached_events()[idx].state_counter});
+	index_.emplace(entry.benefit,entry.id);
+}
+
+template <typename counter_type, typename factor_type>
+std::size_t indexed_suse<counter_type,factor_type>::index_of(std::size_t id) const
+{
+	return std::lower_bound(entries_.begin(),entries_.end(),id,[](const auto& entry, std::size_t id){ return entry.id<id; })-entries_.begin();
+}
+
+template <typename counter_type, typename factor_type>
+sampled_suse<counter_type,factor_type>::sampled_suse(const selector_type& selector, const std::unordered_map<char,factor_type>& probabilities, std::size_t sample_size, sampling_method method, std::mt19937::result_type seed):
+	base{selector,probabilities},
+	sample_size_{sample_size},
+	method_{method},
+	random_gen_{seed}
+{}
+
+template <typename counter_type, typename factor_type>
+std::optional<std::size_t> sampled_suse<counter_type,factor_type>::select(const selector_type& selector, const event& new_event) const
+{
+	typename base::scan_state state;
+	scan_sample(selector,state);
+
+	return base::decide(selector,new_event,state);
+}
+
+template <typename counter_type, typename factor_type>
+std::vector<std::size_t> sampled_suse<counter_type,factor_type>::select(const selector_type& selector, const event& new_event, std::size_t batch_size) const
+{
+	typename base::scan_state state{batch_size};
+	scan_sample(selector,state);
+
+	return base::decide_batch(selector,new_event,state);
+}
+
+template <typename counter_type, typename factor_type>
+void sampled_suse<counter_type,factor_type>::scan_sample(const selector_type& selector, typename base::scan_state& state) const
+{
+	const auto cache_size = selector.cached_events().size();
+	const auto window_start = selector.active_window().start_idx;
+
+	// the initiators are tracked through the whole active time window, which only looks at the event types
+	auto tracked_idx = window_start;
+	for(const auto idx: sample(cache_size))
+	{
+		for(;tracked_idx<=idx && idx>=window_start;++tracked_idx)
+			base::track_initiator(selector,tracked_idx,state);
+
+		base::consider(selector,idx,state);
+	}
+
+	for(;tracked_idx<cache_size;++tracked_idx)
+		base::track_initiator(selector,tracked_idx,state);
+}
+
+template <typename counter_type, typename factor_type>
+std::vector<std::size_t> sampled_suse<counter_type,factor_type>::sample(std::size_t cache_size) const
+{
+	std::vector<std::size_t> indices;
+	if(sample_size_>=cache_size)
+	{
+		indices.resize(cache_size);
+		std::iota(indices.begin(),indices.end(),std::size_t{0});
+		return indices;
+	}
+
+	indices.reserve(sample_size_);
+	for(std::size_t i=0;i<sample_size_;++i)
+	{
+		const auto [first,last] = method_==sampling_method::stratified?
+			std::pair{i*cache_size/sample_size_,(i+1)*cache_size/sample_size_}:
+			std::pair{std::size_t{0},cache_size};
+
+		std::uniform_int_distribution<std::size_t> dist(first,last-1);
+		indices.push_back(dist(random_gen_));
+	}
+
+	std::sort(indices.begin(),indices.end());
+	indices.erase(std::unique(indices.begin(),indices.end()),indices.end());
+	return indices;
+}
+
 }
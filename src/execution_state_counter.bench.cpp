@@ -8,6 +8,11 @@
 
 #include <nanobench.h>
 
+#include <cstdint>
+#include <random>
+#include <string>
+#include <utility>
+
 TEST_SUITE("suse::execution_state_counter")
 {
 	TEST_CASE("check vs counter_check")
@@ -100,4 +105,48 @@ TEST_SUITE("suse::execution_state_counter")
 			ankerl::nanobench::doNotOptimizeAway(counter_check_edgelist(input)); 
 		});
 	}
+
+	TEST_CASE("dense vs edge-list advance")
+	{
+		using counter_type = std::uint64_t;
+
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::string input;
+		for(std::size_t i=0;i<1000;++i)
+			input.push_back(static_cast<char>('a'+type_dist(random_gen)));
+
+		// every group adds states, and the loops keep many of them occupied
+		for(const std::size_t groups: {1,3,7,15})
+		{
+			std::string query;
+			for(std::size_t i=0;i<groups;++i)
+				query+="(a|b(c|d)*)";
+			query+="d*";
+
+			const auto sample = suse::parse_regex(query);
+			const auto dense_edges = suse::compute_edges_per_character(sample,suse::edgelist::max_dense_states);
+			const auto sparse_edges = suse::compute_edges_per_character(sample,0);
+
+			auto b = ankerl::nanobench::Bench();
+			b.title(std::to_string(sample.number_of_states())+" states").relative(true).batch(input.size()).unit("event");
+
+			for(const auto& [name,edges]: {std::pair{"edgelist",&sparse_edges},std::pair{"dense",&dense_edges}})
+			{
+				b.run(name, [&]()
+				{
+					auto counter = suse::execution_state_counter<counter_type>(sample.number_of_states());
+					auto followup = counter;
+					for(auto c: input)
+					{
+						counter[sample.initial_state_id()] = 1;
+						advance(counter,*edges,c,followup);
+						counter+=followup;
+					}
+
+					ankerl::nanobench::doNotOptimizeAway(counter);
+				});
+			}
+		}
+	}
 }
@@ -4,32 +4,100 @@
 #include "edgelist.hpp"
 #include "nfa.hpp"
 
+#include <algorithm>
+#include <iterator>
 #include <type_traits>
 #include <unordered_map>
 #include <vector>
 
 #include <cstddef>
+#include <cstdint>
 
 namespace suse
 {
+	/*
+		The number of runs in each state of an automaton.
+		Counters of automata with many states switch to a sparse form once few states are occupied,
+		storing only the occupied states and their counts in ascending order. advance, += and -= then only touch those states.
+	*/
 	template <typename underlying_counter_type>
 	struct execution_state_counter
 	{
 		public:
+		using state_index = std::uint32_t;
+
+		// smaller counters always use the dense form
+		static constexpr std::size_t sparse_min_states = 16;
+
 		explicit execution_state_counter(std::size_t number_of_states):
-			counters_(number_of_states,0)
-		{}
+			size_{number_of_states},
+			sparse_{number_of_states>=sparse_min_states}
+		{
+			if(!sparse_)
+				values_.resize(size_,0);
+		}
+
+		template <typename other_counter_type>
+		explicit execution_state_counter(const execution_state_counter<other_counter_type>& other):
+			size_{other.size_},
+			sparse_{other.sparse_},
+			indices_{other.indices_}
+		{
+			values_.reserve(other.values_.size());
+			for(const auto& counter: other.values_)
+				values_.push_back(static_cast<underlying_counter_type>(counter));
+		}
+
+		std::size_t size() const { return size_; }
+		bool is_sparse() const { return sparse_; }
+		bool is_zero() const { return std::all_of(values_.begin(),values_.end(),[](const auto& v){ return v==underlying_counter_type{0}; }); }
+
+		// switching the form keeps the storage for reuse, this releases what the current form does not need
+		void shrink_to_fit();
+		// the storage of the values and the indices of the occupied states
+		std::size_t heap_bytes() const { return values_.capacity()*sizeof(underlying_counter_type)+indices_.capacity()*sizeof(state_index); }
+
+		// in the sparse form, this adds the state if it is not occupied yet
+		underlying_counter_type& operator[](std::size_t idx);
+		const underlying_counter_type& operator[](std::size_t idx) const;
+
+		class const_iterator
+		{
+			public:
+			using iterator_category = std::forward_iterator_tag;
+			using value_type = underlying_counter_type;
+			using difference_type = std::ptrdiff_t;
+			using pointer = const underlying_counter_type*;
+			using reference = const underlying_counter_type&;
+
+			const_iterator() = default;
+
+			reference operator*() const;
+			pointer operator->() const { return &**this; }
 
-		std::size_t size() const { return counters_.size(); }
+			const_iterator& operator++();
+			const_iterator operator++(int) { auto copy = *this; ++*this; return copy; }
 
-		underlying_counter_type& operator[](std::size_t idx) { return counters_[idx]; }
-		const underlying_counter_type& operator[](std::size_t idx) const { return counters_[idx]; }
+			friend bool operator==(const const_iterator& lhs, const const_iterator& rhs) { return lhs.idx_==rhs.idx_; }
 
-		auto begin() const { return counters_.begin(); }
-		auto end() const { return counters_.end(); }
+			private:
+			const execution_state_counter* counter_ = nullptr;
+			std::size_t idx_ = 0, sparse_idx_ = 0;
 
-		auto begin() { return counters_.begin(); }
-		auto end() { return counters_.end(); }
+			const_iterator(const execution_state_counter* counter, std::size_t idx, std::size_t sparse_idx):
+				counter_{counter}, idx_{idx}, sparse_idx_{sparse_idx}
+			{}
+
+			friend struct execution_state_counter;
+		};
+
+		// visits every state, including the unoccupied ones of the sparse form
+		const_iterator begin() const { return {this,0,0}; }
+		const_iterator end() const { return {this,size_,indices_.size()}; }
+
+		// switch to the dense form
+		auto begin() { make_dense(); return values_.begin(); }
+		auto end() { make_dense(); return values_.end(); }
 
 		execution_state_counter& operator+=(const execution_state_counter& other);
 		execution_state_counter& operator-=(const execution_state_counter& other);
@@ -55,10 +123,36 @@ namespace suse
 			return rhs*=lhs;
 		}
 
-		friend auto operator<=>(const execution_state_counter&, const execution_state_counter&) = default;
+		// independent of the form
+		friend bool operator==(const execution_state_counter& lhs, const execution_state_counter& rhs)
+		{
+			if(!lhs.sparse_ && !rhs.sparse_)
+				return lhs.values_==rhs.values_;
+
+			return lhs.size_==rhs.size_ && std::equal(lhs.begin(),lhs.end(),rhs.begin());
+		}
 
 		private:
-		std::vector<underlying_counter_type> counters_;
+		std::size_t size_;
+		bool sparse_;
+		std::vector<underlying_counter_type> values_; // a value per state, or per occupied state in the sparse form
+		std::vector<state_index> indices_; // the occupied states of the sparse form
+
+		inline static const underlying_counter_type zero_{0};
+
+		void make_dense();
+		void make_sparse();
+		// picks the form by the number of occupied states, with some slack to not switch back and forth
+		void adapt();
+
+		template <typename operation>
+		void combine(const execution_state_counter& other, operation op);
+
+		template <typename other_counter_type>
+		friend struct execution_state_counter;
+
+		template <typename underlying>
+		friend void advance(const execution_state_counter<underlying>& counter, const edgelist& per_character_edges, char symbol, execution_state_counter<underlying>& followup);
 	};
 
 	template <typename underlying_counter_type>
@@ -66,6 +160,10 @@ namespace suse
 
 	template <typename underlying_counter_type>
 	execution_state_counter<underlying_counter_type> advance(const execution_state_counter<underlying_counter_type>& counter, const edgelist& per_character_edges, char symbol);
+
+	// same as above, but overwrites followup instead of allocating a new counter, so it must be a distinct counter of the same size
+	template <typename underlying_counter_type>
+	void advance(const execution_state_counter<underlying_counter_type>& counter, const edgelist& per_character_edges, char symbol, execution_state_counter<underlying_counter_type>& followup);
 }
 
 #include "execution_state_counter_impl.hpp"
@@ -1,5 +1,6 @@
 #include "execution_state_counter.hpp"
 
+#include "checked_counter.hpp"
 #include "regex.hpp"
 
 #include <boost/multiprecision/cpp_int.hpp>
@@ -7,6 +8,13 @@
 
 #include <doctest/doctest.h>
 
+#include <algorithm>
+#include <random>
+#include <utility>
+#include <vector>
+
+#include <cstdint>
+
 TEST_SUITE("suse::execution_state_counter")
 {
 	TEST_CASE("advance check")
@@ -67,4 +75,157 @@ TEST_SUITE("suse::execution_state_counter")
 		CHECK(sample.check("acde")==counter_check("acde"));
 		CHECK(sample.check("ade")==counter_check("ade"));
 	}
+
+	TEST_CASE("advance in place")
+	{
+		const auto sample = suse::parse_regex("a(b|c)*d");
+		const auto edges = suse::compute_edges_per_character(sample);
+
+		auto counter = suse::execution_state_counter<int>(sample.number_of_states());
+		counter[sample.initial_state_id()] = 1;
+		auto followup = suse::execution_state_counter<int>(sample.number_of_states());
+		for(auto c: std::string_view{"abcbxd"})
+		{
+			// the destination is overwritten, so stale values from the previous step must not leak into it
+			advance(counter,edges,c,followup);
+			CHECK(followup==advance(counter,edges,c));
+			counter+=followup;
+		}
+	}
+
+	TEST_CASE_TEMPLATE("dense advance matches edgelist",counter_type,std::uint64_t,std::uint8_t,suse::checked_uint<std::uint64_t>,boost::multiprecision::uint256_t)
+	{
+		const auto sample = suse::parse_regex("a(b|c|.a)*de?");
+		const auto dense_edges = suse::compute_edges_per_character(sample,suse::edgelist::max_dense_states);
+		const auto sparse_edges = suse::compute_edges_per_character(sample,0);
+		REQUIRE(!dense_edges.sources_for('a').empty());
+		REQUIRE(sparse_edges.sources_for('a').empty());
+
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,5);
+
+		auto counter = suse::execution_state_counter<counter_type>(sample.number_of_states());
+		counter[sample.initial_state_id()] = 1;
+		auto dense = counter, sparse = counter;
+		for(std::size_t i=0;i<200;++i)
+		{
+			const auto symbol = static_cast<char>('a'+type_dist(random_gen));
+			advance(counter,dense_edges,symbol,dense);
+			advance(counter,sparse_edges,symbol,sparse);
+			REQUIRE(dense==sparse);
+			counter+=dense;
+
+			// restart now and then, so the checked counters stay below their limit
+			if(i%20==19)
+			{
+				counter*=0;
+				counter[sample.initial_state_id()] = 1;
+			}
+		}
+	}
+
+	TEST_CASE("dense advance detects overflow")
+	{
+		using counter_type = suse::checked_uint<std::uint64_t>;
+
+		const auto sample = suse::parse_regex("(a|b)b*");
+		const auto edges = suse::compute_edges_per_character(sample);
+
+		auto counter = suse::execution_state_counter<counter_type>(sample.number_of_states());
+		for(auto& c: counter)
+			c = counter_type::max();
+		auto followup = counter;
+
+		CHECK_THROWS_AS(advance(counter,edges,'b',followup),suse::counter_overflow);
+		CHECK(suse::compute_edges_per_character(suse::parse_regex("a(b|.)"),suse::edgelist::max_dense_states).sources_for('b').empty()); // parallel edges for b
+	}
+
+	TEST_CASE("sparse form")
+	{
+		using counter_type = std::uint64_t;
+
+		auto counter = suse::execution_state_counter<counter_type>(20);
+		REQUIRE(counter.is_sparse());
+		counter[17] = 2;
+		counter[3] = 5;
+
+		std::vector<counter_type> expected(20,0);
+		expected[3] = 5;
+		expected[17] = 2;
+		CHECK(std::equal(std::as_const(counter).begin(),std::as_const(counter).end(),expected.begin(),expected.end()));
+		CHECK(std::as_const(counter)[4]==0);
+
+		auto dense = counter;
+		for(auto& c: dense)
+			++c;
+		REQUIRE(!dense.is_sparse());
+
+		auto sum = counter;
+		sum+=dense;
+		CHECK(sum==counter+counter+suse::execution_state_counter<counter_type>{dense}-counter);
+		sum-=dense;
+		CHECK(sum==counter);
+		CHECK(sum.is_sparse());
+
+		dense-=counter;
+		dense+=counter;
+		CHECK(dense==counter+dense-counter);
+
+		sum-=counter;
+		CHECK(sum==suse::execution_state_counter<counter_type>(20));
+		CHECK(sum.is_sparse());
+	}
+
+	TEST_CASE_TEMPLATE("sparse advance matches a dense reference",counter_type,std::uint64_t,boost::multiprecision::uint128_t)
+	{
+		const auto sample = suse::parse_regex("(ab|cd)*(ef|gh)(ij|kl)*(mn|op)(qr|st)*(uv|wx)");
+		const auto edges = suse::compute_edges_per_character(sample);
+		REQUIRE(sample.number_of_states()>=suse::execution_state_counter<counter_type>::sparse_min_states);
+
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,23);
+
+		auto counter = suse::execution_state_counter<counter_type>(sample.number_of_states());
+		std::vector<counter_type> expected(sample.number_of_states(),0);
+		counter[sample.initial_state_id()] = 1;
+		expected[sample.initial_state_id()] = 1;
+
+		auto snapshot = counter;
+		auto expected_snapshot = expected;
+		bool was_sparse = false, was_dense = false;
+		for(std::size_t i=0;i<300;++i)
+		{
+			const auto symbol = static_cast<char>('a'+type_dist(random_gen));
+			const auto followup = advance(counter,edges,symbol);
+
+			std::vector<counter_type> expected_followup(sample.number_of_states(),0);
+			for(const auto& e: edges.edges_for(symbol))
+				expected_followup[e.to]+=expected[e.from];
+			REQUIRE(std::equal(followup.begin(),followup.end(),expected_followup.begin(),expected_followup.end()));
+
+			counter+=followup;
+			for(std::size_t state=0;state<expected.size();++state)
+				expected[state]+=expected_followup[state];
+
+			// the counters only grow, so this subtracts at most what was there
+			if(i%25==24)
+			{
+				counter-=snapshot;
+				for(std::size_t state=0;state<expected.size();++state)
+					expected[state]-=expected_snapshot[state];
+
+				counter[sample.initial_state_id()] = 1;
+				expected[sample.initial_state_id()] = 1;
+				snapshot = counter;
+				expected_snapshot = expected;
+			}
+
+			REQUIRE(std::equal(std::as_const(counter).begin(),std::as_const(counter).end(),expected.begin(),expected.end()));
+			was_sparse |= counter.is_sparse();
+			was_dense |= !counter.is_sparse();
+		}
+
+		CHECK(was_sparse);
+		CHECK(was_dense);
+	}
 }
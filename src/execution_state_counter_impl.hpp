@@ -4,18 +4,210 @@
 	interface and implementation despite the template.
 */
 
+#include <algorithm>
+#include <bit>
 #include <cassert>
+#include <utility>
 
 namespace suse
 {
 	
 template <typename underlying>
-execution_state_counter<underlying>& execution_state_counter<underlying>::operator+=(const execution_state_counter<underlying>& other)
+underlying& execution_state_counter<underlying>::operator[](std::size_t idx)
+{
+	assert(idx<size_);
+
+	if(!sparse_)
+		return values_[idx];
+
+	const auto it = std::lower_bound(indices_.begin(),indices_.end(),idx);
+	const auto sparse_idx = it-indices_.begin();
+	if(it==indices_.end() || *it!=idx)
+	{
+		indices_.insert(it,static_cast<state_index>(idx));
+		values_.insert(values_.begin()+sparse_idx,underlying{0});
+	}
+
+	return values_[sparse_idx];
+}
+
+template <typename underlying>
+const underlying& execution_state_counter<underlying>::operator[](std::size_t idx) const
+{
+	assert(idx<size_);
+
+	if(!sparse_)
+		return values_[idx];
+
+	const auto it = std::lower_bound(indices_.begin(),indices_.end(),idx);
+	return it!=indices_.end() && *it==idx?values_[it-indices_.begin()]:zero_;
+}
+
+template <typename underlying>
+auto execution_state_counter<underlying>::const_iterator::operator*() const -> reference
+{
+	if(!counter_->sparse_)
+		return counter_->values_[idx_];
+
+	const auto& indices = counter_->indices_;
+	return sparse_idx_<indices.size() && indices[sparse_idx_]==idx_?counter_->values_[sparse_idx_]:zero_;
+}
+
+template <typename underlying>
+auto execution_state_counter<underlying>::const_iterator::operator++() -> const_iterator&
+{
+	const auto& indices = counter_->indices_;
+	if(sparse_idx_<indices.size() && indices[sparse_idx_]==idx_)
+		++sparse_idx_;
+	++idx_;
+
+	return *this;
+}
+
+template <typename underlying>
+void execution_state_counter<underlying>::make_dense()
+{
+	if(!sparse_)
+		return;
+
+	// the occupied states are ascending, so moving them to their slots from the back overwrites nothing still needed
+	values_.resize(size_,underlying{0});
+	for(auto i=indices_.size();i-->0;)
+	{
+		if(indices_[i]!=i)
+		{
+			values_[indices_[i]] = std::move(values_[i]);
+			values_[i] = underlying{0};
+		}
+	}
+
+	indices_.clear();
+	sparse_ = false;
+}
+
+template <typename underlying>
+void execution_state_counter<underlying>::make_sparse()
+{
+	if(sparse_)
+		return;
+
+	std::size_t occupied = 0;
+	for(std::size_t i=0;i<size_;++i)
+	{
+		if(values_[i]!=underlying{0})
+		{
+			indices_.push_back(static_cast<state_index>(i));
+			if(occupied!=i)
+				values_[occupied] = std::move(values_[i]);
+			++occupied;
+		}
+	}
+
+	values_.resize(occupied);
+	sparse_ = true;
+}
+
+template <typename underlying>
+void execution_state_counter<underlying>::shrink_to_fit()
+{
+	values_.shrink_to_fit();
+	indices_.shrink_to_fit();
+}
+
+template <typename underlying>
+void execution_state_counter<underlying>::adapt()
+{
+	if(size_<sparse_min_states)
+		return;
+
+	if(sparse_)
+	{
+		if(values_.size()*2>size_)
+			make_dense();
+	}
+	else if(static_cast<std::size_t>(std::count_if(values_.begin(),values_.end(),[](const auto& v){ return v!=underlying{0}; }))*4<=size_)
+		make_sparse();
+}
+
+template <typename underlying>
+template <typename operation>
+void execution_state_counter<underlying>::combine(const execution_state_counter<underlying>& other, operation op)
 {
 	assert(size()==other.size());
 
-	for(std::size_t i=0;i<counters_.size();++i)
-		counters_[i]+=other.counters_[i];
+	if(!other.sparse_)
+	{
+		make_dense();
+		for(std::size_t i=0;i<size_;++i)
+			op(values_[i],other.values_[i]);
+
+		adapt();
+		return;
+	}
+
+	if(!sparse_)
+	{
+		for(std::size_t i=0;i<other.indices_.size();++i)
+			op(values_[other.indices_[i]],other.values_[i]);
+
+		return;
+	}
+
+	// merges both sorted forms from the back into the grown storage, then moves the result to the front dropping the zeros
+	const auto old_size = indices_.size();
+	indices_.resize(old_size+other.indices_.size());
+	values_.resize(indices_.size());
+
+	auto own = old_size, others = other.indices_.size(), write = indices_.size();
+	while(others>0)
+	{
+		--write;
+		if(own>0 && indices_[own-1]>=other.indices_[others-1])
+		{
+			--own;
+			if(indices_[own]==other.indices_[others-1])
+				op(values_[own],other.values_[--others]);
+
+			indices_[write] = indices_[own];
+			values_[write] = std::move(values_[own]);
+		}
+		else
+		{
+			--others;
+			indices_[write] = other.indices_[others];
+			values_[write] = underlying{0};
+			op(values_[write],other.values_[others]);
+		}
+	}
+
+	std::size_t occupied = 0;
+	const auto keep = [&](std::size_t from)
+	{
+		if(values_[from]==underlying{0})
+			return;
+
+		if(from!=occupied)
+		{
+			indices_[occupied] = indices_[from];
+			values_[occupied] = std::move(values_[from]);
+		}
+		++occupied;
+	};
+
+	for(std::size_t i=0;i<own;++i)
+		keep(i);
+	for(auto i=write;i<indices_.size();++i)
+		keep(i);
+
+	indices_.resize(occupied);
+	values_.resize(occupied);
+	adapt();
+}
+
+template <typename underlying>
+execution_state_counter<underlying>& execution_state_counter<underlying>::operator+=(const execution_state_counter<underlying>& other)
+{
+	combine(other,[](underlying& lhs, const underlying& rhs){ lhs+=rhs; });
 
 	return *this;
 }
@@ -23,10 +215,7 @@ execution_state_counter<underlying>& execution_state_counter<underlying>::operat
 template <typename underlying>
 execution_state_counter<underlying>& execution_state_counter<underlying>::operator-=(const execution_state_counter<underlying>& other)
 {
-	assert(size()==other.size());
-
-	for(std::size_t i=0;i<counters_.size();++i)
-		counters_[i]-=other.counters_[i];
+	combine(other,[](underlying& lhs, const underlying& rhs){ lhs-=rhs; });
 
 	return *this;
 }
@@ -34,8 +223,17 @@ execution_state_counter<underlying>& execution_state_counter<underlying>::operat
 template <typename underlying>
 execution_state_counter<underlying>& execution_state_counter<underlying>::operator*=(const underlying &other)
 {
-	for(std::size_t i=0;i<counters_.size();++i)
-		counters_[i]*=other;
+	// clearing a large counter keeps the storage, so counters reset for every event do not reallocate
+	if(other==underlying{0} && size_>=sparse_min_states)
+	{
+		indices_.clear();
+		values_.clear();
+		sparse_ = true;
+		return *this;
+	}
+
+	for(auto& value: values_)
+		value*=other;
 
 	return *this;
 }
@@ -71,17 +269,73 @@ template <typename underlying>
 execution_state_counter<underlying> advance(const execution_state_counter<underlying>& counter, const edgelist& per_character_edges, char symbol)
 {
 	auto followup = execution_state_counter<underlying>{counter.size()};
+	advance(counter,per_character_edges,symbol,followup);
+	
+	return followup;
+}
+
+template <typename underlying>
+void advance(const execution_state_counter<underlying>& counter, const edgelist& per_character_edges, char symbol, execution_state_counter<underlying>& followup)
+{
+	assert(counter.size()==followup.size() && &counter!=&followup);
+
+	if(counter.sparse_)
+	{
+		// the edges of a symbol are ordered by their source, so only the ones leaving occupied states are visited
+		followup.indices_.clear();
+		followup.values_.clear();
+		followup.sparse_ = true;
+
+		const auto add_for = [&](auto s)
+		{
+			const auto edges = per_character_edges.edges_for(s);
+			for(std::size_t i=0;i<counter.indices_.size();++i)
+			{
+				if(counter.values_[i]==underlying{0})
+					continue;
+
+				const auto leaving = std::ranges::equal_range(edges,std::size_t{counter.indices_[i]},{},&edge::from);
+				for(const auto& e: leaving)
+					followup[e.to]+=counter.values_[i];
+			}
+		};
+
+		add_for(symbol);
+		add_for(nfa::wildcard_symbol);
+		followup.adapt();
+		return;
+	}
+
+	followup.make_dense();
+	if(const auto sources = per_character_edges.sources_for(symbol); !sources.empty())
+	{
+		assert(sources.size()==counter.size());
+
+		// a single pass over the merged matrix, which also skips clearing the followup before adding to it
+		for(std::size_t to=0;to<counter.size();++to)
+		{
+			underlying sum{0};
+			for(auto remaining=sources[to];remaining!=0;remaining&=remaining-1)
+				sum+=counter.values_[std::countr_zero(remaining)];
+
+			followup.values_[to] = std::move(sum);
+		}
+
+		followup.adapt();
+		return;
+	}
+
+	std::fill(followup.values_.begin(),followup.values_.end(),underlying{0});
 
 	const auto add_for = [&](auto s)
 	{
 		for(const auto& e: per_character_edges.edges_for(s))
-			followup[e.to]+=counter[e.from];
+			followup.values_[e.to]+=counter.values_[e.from];
 	};
 
 	add_for(symbol);
 	add_for(nfa::wildcard_symbol);
-	
-	return followup;
+	followup.adapt();
 }
 
 }
@@ -0,0 +1,91 @@
+#ifndef SUSE_LATENCY_HISTOGRAM_HPP
+#define SUSE_LATENCY_HISTOGRAM_HPP
+
+#include <algorithm>
+#include <array>
+#include <bit>
+#include <cmath>
+#include <limits>
+
+#include <cstddef>
+#include <cstdint>
+
+namespace suse
+{
+	/*
+		Counts of non-negative values (e.g. latencies in ns) in logarithmic buckets like a HDR histogram.
+		Values below 2*sub_buckets get a bucket each, above that every power of two is split into sub_buckets equally wide buckets,
+		so a bucket is at most 1/sub_buckets of its lower bound wide. Recording a value is a few bit operations and an increment.
+	*/
+	class latency_histogram
+	{
+		public:
+		static constexpr std::size_t sub_bucket_bits = 4;
+		static constexpr std::size_t sub_buckets = std::size_t{1}<<sub_bucket_bits;
+		static constexpr std::size_t bucket_count = (std::numeric_limits<std::uint64_t>::digits-sub_bucket_bits+1)*sub_buckets;
+
+		void record(std::uint64_t value)
+		{
+			++counts_[bucket_of(value)];
+			++total_;
+			max_ = std::max(max_,value);
+		}
+
+		void merge(const latency_histogram& other)
+		{
+			for(std::size_t idx=0;idx<bucket_count;++idx)
+				counts_[idx]+=other.counts_[idx];
+			total_+=other.total_;
+			max_ = std::max(max_,other.max_);
+		}
+
+		std::uint64_t count(std::size_t bucket) const { return counts_[bucket]; }
+		std::uint64_t total() const { return total_; }
+		std::uint64_t max() const { return max_; }
+
+		// the highest value of the bucket containing the value of the given rank, at most the largest recorded value
+		std::uint64_t percentile(double percent) const
+		{
+			if(total_==0)
+				return 0;
+
+			const auto rank = std::max<std::uint64_t>(1,static_cast<std::uint64_t>(std::ceil(percent/100*static_cast<double>(total_))));
+			std::uint64_t seen = 0;
+			for(std::size_t idx=0;idx<bucket_count;++idx)
+			{
+				seen+=counts_[idx];
+				if(seen>=rank)
+					return std::min(upper_bound(idx)-1,max_);
+			}
+
+			return max_;
+		}
+
+		static std::size_t bucket_of(std::uint64_t value)
+		{
+			const auto shift = std::max<int>(std::bit_width(value)-static_cast<int>(sub_bucket_bits)-1,0);
+			return static_cast<std::size_t>(shift)*sub_buckets+static_cast<std::size_t>(value>>shift);
+		}
+
+		static std::uint64_t lower_bound(std::size_t bucket)
+		{
+			if(bucket<2*sub_buckets)
+				return bucket;
+
+			const auto shift = bucket/sub_buckets-1;
+			return static_cast<std::uint64_t>(bucket%sub_buckets+sub_buckets)<<shift;
+		}
+
+		// exclusive, saturates for the last bucket
+		static std::uint64_t upper_bound(std::size_t bucket)
+		{
+			return bucket+1<bucket_count?lower_bound(bucket+1):std::numeric_limits<std::uint64_t>::max();
+		}
+
+		private:
+		std::array<std::uint64_t,bucket_count> counts_{};
+		std::uint64_t total_ = 0, max_ = 0;
+	};
+}
+
+#endif
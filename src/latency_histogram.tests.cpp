@@ -0,0 +1,79 @@
+#include "latency_histogram.hpp"
+
+#include <doctest/doctest.h>
+
+#include <algorithm>
+#include <limits>
+#include <random>
+#include <vector>
+
+#include <cmath>
+#include <cstdint>
+
+TEST_SUITE("suse::latency_histogram")
+{
+	TEST_CASE("buckets")
+	{
+		for(std::size_t bucket=0;bucket+1<suse::latency_histogram::bucket_count;++bucket)
+		{
+			CAPTURE(bucket);
+			const auto lower = suse::latency_histogram::lower_bound(bucket);
+			const auto upper = suse::latency_histogram::upper_bound(bucket);
+
+			REQUIRE(lower<upper);
+			REQUIRE(suse::latency_histogram::bucket_of(lower)==bucket);
+			REQUIRE(suse::latency_histogram::bucket_of(upper-1)==bucket);
+			REQUIRE((upper-lower)*suse::latency_histogram::sub_buckets<=std::max<std::uint64_t>(lower,suse::latency_histogram::sub_buckets));
+		}
+
+		REQUIRE(suse::latency_histogram::bucket_of(std::numeric_limits<std::uint64_t>::max())==suse::latency_histogram::bucket_count-1);
+	}
+
+	TEST_CASE("percentiles")
+	{
+		suse::latency_histogram histogram;
+		REQUIRE(histogram.percentile(50)==0);
+
+		std::mt19937 gen(42);
+		std::lognormal_distribution<double> dist(8,2);
+		std::vector<std::uint64_t> values(10000);
+		for(auto& value: values)
+		{
+			value = static_cast<std::uint64_t>(dist(gen));
+			histogram.record(value);
+		}
+
+		std::ranges::sort(values);
+		REQUIRE(histogram.total()==values.size());
+		REQUIRE(histogram.max()==values.back());
+		REQUIRE(histogram.percentile(100)==values.back());
+
+		for(double percent: {0.0,1.0,50.0,90.0,99.0,99.9,99.99})
+		{
+			CAPTURE(percent);
+			const auto rank = std::max<std::size_t>(1,static_cast<std::size_t>(std::ceil(percent/100*values.size())));
+			const auto exact = values[rank-1];
+			const auto reported = histogram.percentile(percent);
+
+			// the highest value of the bucket of the exact percentile
+			REQUIRE(reported>=exact);
+			REQUIRE(suse::latency_histogram::bucket_of(reported)==suse::latency_histogram::bucket_of(exact));
+		}
+	}
+
+	TEST_CASE("merge")
+	{
+		suse::latency_histogram lhs, rhs, both;
+		for(std::uint64_t value=0;value<1000;++value)
+		{
+			(value%3==0?lhs:rhs).record(value*value);
+			both.record(value*value);
+		}
+
+		lhs.merge(rhs);
+		REQUIRE(lhs.total()==both.total());
+		REQUIRE(lhs.max()==both.max());
+		for(std::size_t bucket=0;bucket<suse::latency_histogram::bucket_count;++bucket)
+			REQUIRE(lhs.count(bucket)==both.count(bucket));
+	}
+}
@@ -0,0 +1,106 @@
+#ifndef SUSE_LOG_DOUBLE_HPP
+#define SUSE_LOG_DOUBLE_HPP
+
+#include <algorithm>
+#include <cmath>
+#include <compare>
+#include <limits>
+#include <ostream>
+#include <type_traits>
+
+namespace suse
+{
+	/*
+		Non-negative number stored as the natural logarithm of its value.
+		Products of many factors stay representable long after a plain double would have overflowed,
+		which is what the expected benefits of the SuSe strategy need for very long time windows.
+		Subtracting a larger from a smaller value yields zero.
+	*/
+	class log_double
+	{
+		public:
+		constexpr log_double() = default;
+
+		template <typename T> requires std::is_arithmetic_v<T>
+		log_double(T value):
+			log_{std::log(static_cast<double>(value))}
+		{}
+
+		// counter types (e.g. boost::multiprecision or suse::checked_uint) are converted via double
+		template <typename T> requires (!std::is_arithmetic_v<T> && !std::is_same_v<T,log_double>)
+		explicit log_double(const T& value):
+			log_double{static_cast<double>(value)}
+		{}
+
+		static log_double from_log(double log_value)
+		{
+			log_double result;
+			result.log_ = log_value;
+			return result;
+		}
+
+		double log() const { return log_; }
+		double value() const { return std::exp(log_); }
+
+		explicit operator double() const { return value(); }
+
+		log_double& operator+=(const log_double& other)
+		{
+			if(other.log_==zero_log)
+				return *this;
+			if(log_==zero_log)
+				return *this = other;
+
+			const auto larger = std::max(log_,other.log_);
+			const auto smaller = std::min(log_,other.log_);
+			log_ = larger+std::log1p(std::exp(smaller-larger));
+			return *this;
+		}
+
+		log_double& operator-=(const log_double& other)
+		{
+			if(other.log_==zero_log)
+				return *this;
+			if(other.log_>=log_)
+				return *this = log_double{};
+
+			log_ += std::log1p(-std::exp(other.log_-log_));
+			return *this;
+		}
+
+		log_double& operator*=(const log_double& other)
+		{
+			log_ += other.log_;
+			return *this;
+		}
+
+		log_double& operator/=(const log_double& other)
+		{
+			log_ -= other.log_;
+			return *this;
+		}
+
+		friend log_double operator+(log_double lhs, const log_double& rhs) { return lhs+=rhs; }
+		friend log_double operator-(log_double lhs, const log_double& rhs) { return lhs-=rhs; }
+		friend log_double operator*(log_double lhs, const log_double& rhs) { return lhs*=rhs; }
+		friend log_double operator/(log_double lhs, const log_double& rhs) { return lhs/=rhs; }
+
+		friend bool operator==(const log_double&, const log_double&) = default;
+		friend std::partial_ordering operator<=>(const log_double& lhs, const log_double& rhs)
+		{
+			return lhs.log_<=>rhs.log_;
+		}
+
+		friend std::ostream& operator<<(std::ostream& out, const log_double& number)
+		{
+			return out<<"exp("<<number.log_<<")";
+		}
+
+		private:
+		static constexpr double zero_log = -std::numeric_limits<double>::infinity();
+
+		double log_ = zero_log;
+	};
+}
+
+#endif
@@ -0,0 +1,44 @@
+#include "log_double.hpp"
+
+#include <doctest/doctest.h>
+
+#include <cmath>
+
+TEST_SUITE("suse::log_double")
+{
+	TEST_CASE("arithmetic")
+	{
+		const suse::log_double a{3}, b{4};
+
+		CHECK((a+b).value()==doctest::Approx(7));
+		CHECK((b-a).value()==doctest::Approx(1));
+		CHECK((a*b).value()==doctest::Approx(12));
+		CHECK((b/a).value()==doctest::Approx(4.0/3));
+		CHECK(a<b);
+		CHECK(b>a);
+	}
+
+	TEST_CASE("zero")
+	{
+		const suse::log_double zero{}, one{1};
+
+		CHECK(zero==suse::log_double{0});
+		CHECK((zero+one)==one);
+		CHECK((one+zero)==one);
+		CHECK((zero+zero)==zero);
+		CHECK((one-one)==zero);
+		CHECK((one-suse::log_double{2})==zero);
+		CHECK((zero*one)==zero);
+		CHECK(zero<one);
+	}
+
+	TEST_CASE("beyond double")
+	{
+		const auto huge = suse::log_double::from_log(1000);
+		const auto sum = huge+huge;
+
+		CHECK(std::isinf(sum.value()));
+		CHECK(sum.log()==doctest::Approx(1000+std::log(2.0)));
+		CHECK((sum/huge).value()==doctest::Approx(2));
+	}
+}
@@ -0,0 +1,71 @@
+#include "mapped_file.hpp"
+
+#include <fstream>
+#include <iterator>
+#include <system_error>
+
+#if __has_include(<sys/mman.h>)
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <fcntl.h>
+#include <unistd.h>
+#define SUSE_HAS_MMAP 1
+#endif
+
+#include <cerrno>
+
+namespace suse
+{
+#ifdef SUSE_HAS_MMAP
+	mapped_file::mapped_file(const std::filesystem::path& path)
+	{
+		const int fd = ::open(path.c_str(),O_RDONLY);
+		if(fd<0)
+			throw std::system_error{errno,std::generic_category(),"Could not open '"+path.string()+"'"};
+
+		struct stat file_info{};
+		if(::fstat(fd,&file_info)!=0)
+		{
+			const auto error = errno;
+			::close(fd);
+			throw std::system_error{error,std::generic_category(),"Could not stat '"+path.string()+"'"};
+		}
+
+		size_ = static_cast<std::size_t>(file_info.st_size);
+		if(size_>0)
+		{
+			void* mapping = ::mmap(nullptr,size_,PROT_READ,MAP_PRIVATE,fd,0);
+			if(mapping==MAP_FAILED)
+			{
+				const auto error = errno;
+				::close(fd);
+				throw std::system_error{error,std::generic_category(),"Could not map '"+path.string()+"'"};
+			}
+
+			::madvise(mapping,size_,MADV_SEQUENTIAL);
+			data_ = static_cast<const char*>(mapping);
+		}
+
+		::close(fd);
+	}
+
+	mapped_file::~mapped_file()
+	{
+		if(data_!=nullptr)
+			::munmap(const_cast<char*>(data_),size_);
+	}
+#else
+	mapped_file::mapped_file(const std::filesystem::path& path)
+	{
+		std::ifstream in{path,std::ios::binary};
+		if(!in)
+			throw std::system_error{std::make_error_code(std::errc::no_such_file_or_directory),"Could not open '"+path.string()+"'"};
+
+		fallback_buffer_.assign(std::istreambuf_iterator<char>{in},std::istreambuf_iterator<char>{});
+		data_ = fallback_buffer_.data();
+		size_ = fallback_buffer_.size();
+	}
+
+	mapped_file::~mapped_file() = default;
+#endif
+}
@@ -0,0 +1,34 @@
+#ifndef SUSE_MAPPED_FILE_HPP
+#define SUSE_MAPPED_FILE_HPP
+
+#include <filesystem>
+#include <span>
+#include <string>
+
+#include <cstddef>
+
+namespace suse
+{
+	/*
+		Read-only view of a whole file. On POSIX systems the file is memory-mapped,
+		elsewhere its contents are read into memory once.
+	*/
+	class mapped_file
+	{
+		public:
+		explicit mapped_file(const std::filesystem::path& path);
+		~mapped_file();
+
+		mapped_file(const mapped_file&) = delete;
+		mapped_file& operator=(const mapped_file&) = delete;
+
+		std::span<const char> bytes() const { return {data_,size_}; }
+
+		private:
+		const char* data_ = nullptr;
+		std::size_t size_ = 0;
+		std::string fallback_buffer_;
+	};
+}
+
+#endif
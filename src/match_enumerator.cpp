@@ -1,9 +1,8 @@
 #include "event.hpp"
+#include "event_stream.hpp"
 #include "nfa.hpp"
 #include "regex.hpp"
 
-#include <boost/multiprecision/cpp_int.hpp>
-
 #include <cxxopts.hpp>
 
 #include <fmt/color.h>
@@ -18,6 +17,8 @@
 #include <string_view>
 #include <vector>
 
+#include <cstdint>
+
 namespace
 {
 	std::optional<suse::nfa> try_compile(std::string_view line)
@@ -41,15 +42,18 @@ namespace
 	}
 }
 
-using counter_type = boost::multiprecision::uint256_t;
-template <> struct fmt::formatter<counter_type>: fmt::ostream_formatter {};
+// matches are counted one by one while they are enumerated, 64 bit are out of reach for any feasible stream
+using counter_type = std::uint64_t;
 
 int main(int argc, char* argv[]) try
 {
+	std::ios_base::sync_with_stdio(false);
+
 	cxxopts::Options options("match_enumerator", "Enumerates all matches in a stream");
 	options.add_options()
 		("query,q","Regex/Query to evaluate",cxxopts::value<std::string>())
 		("count,c","Count only, don't output matches")
+		("input-format","Format of the event stream read from stdin. Must be one of text or binary. Default is text",cxxopts::value<std::string>()->default_value("text"))
 		("help,h","Display this help meassage");
 
 	options.parse_positional("query");
@@ -72,6 +76,8 @@ int main(int argc, char* argv[]) try
 		}
 	}
 
+	const auto input_format = suse::parse_input_format(parsed_args["input-format"].template as<std::string>());
+
 	const auto query = parsed_args["query"].template as<std::string>();
 	auto nfa = try_compile(query);
 	if(!nfa)
@@ -154,16 +160,19 @@ int main(int argc, char* argv[]) try
 				add_followups(state_id,target);
 	};
 
-	for(suse::event next_event; std::cin>>next_event;)
+	suse::with_event_reader(input_format,std::cin,[&](auto& reader)
 	{
-		events.push_back(next_event);
+		for(suse::event next_event; reader.next(next_event);)
+		{
+			events.push_back(next_event);
 
-		for(std::size_t state_id = 0; state_id<nfa->number_of_states(); ++state_id)
-			advance_all(state_id, next_event.type);
+			for(std::size_t state_id = 0; state_id<nfa->number_of_states(); ++state_id)
+				advance_all(state_id, next_event.type);
 
-		for(std::size_t state_id = 0; state_id<nfa->number_of_states(); ++state_id)
-			number_of_partial_matches_per_state[state_id] = partial_matches_per_state[state_id].size();
-	}
+			for(std::size_t state_id = 0; state_id<nfa->number_of_states(); ++state_id)
+				number_of_partial_matches_per_state[state_id] = partial_matches_per_state[state_id].size();
+		}
+	});
 
 	if(parsed_args.count("count")>0)
 		fmt::print("{}\n",number_of_matches);
@@ -175,3 +184,8 @@ catch(const cxxopts::exceptions::exception& e)
 	fmt::print(stderr,"Error parsing arguments: {}\n", e.what());
 	return 1;
 }
+catch(const suse::stream_format_error& e)
+{
+	fmt::print(stderr,"Error reading event stream: {}\n", e.what());
+	return 1;
+}
@@ -0,0 +1,106 @@
+#ifndef SUSE_PHASE_PROFILE_HPP
+#define SUSE_PHASE_PROFILE_HPP
+
+#include <array>
+#include <chrono>
+#include <optional>
+#include <string_view>
+#include <utility>
+
+#include <cstddef>
+#include <cstdint>
+
+namespace suse
+{
+#ifdef SUSE_PROFILE_PHASES
+	inline constexpr bool phase_profiling = true;
+#else
+	inline constexpr bool phase_profiling = false;
+#endif
+
+	// the steps of summary_selector::process_event
+	enum class phase
+	{
+		update_window, // including the replay of the active time window when an initiator leaves it
+		purge_expired,
+		select,
+		evict, // removing the selected events and replaying the entries affected by them
+		add_event
+	};
+
+	inline constexpr std::array<std::string_view,5> phase_names{"update_window","purge_expired","select","evict","add_event"};
+
+	struct phase_totals
+	{
+		std::uint64_t nanoseconds = 0, calls = 0;
+		// the replays of counters during the phase and the cached events they went through
+		std::uint64_t replays = 0, replayed_events = 0;
+	};
+
+	/*
+		Time spent in each phase and the replays done by it, recorded only if SUSE_PROFILE_PHASES is defined.
+		Otherwise scopes and replays are not recorded and the totals stay zero, so the hot path is not slowed down.
+	*/
+	class phase_profile
+	{
+		public:
+		class scope
+		{
+			public:
+			scope(phase_profile& profile, phase entered)
+			{
+				if constexpr(phase_profiling)
+				{
+					profile_ = &profile;
+					entered_ = entered;
+					enclosing_ = std::exchange(profile.current_,entered);
+					start_ = std::chrono::steady_clock::now();
+				}
+			}
+
+			scope(const scope&) = delete;
+			scope& operator=(const scope&) = delete;
+
+			~scope()
+			{
+				if constexpr(phase_profiling)
+				{
+					auto& totals = profile_->totals_[static_cast<std::size_t>(entered_)];
+					totals.nanoseconds+=static_cast<std::uint64_t>(std::chrono::nanoseconds{std::chrono::steady_clock::now()-start_}.count());
+					++totals.calls;
+					profile_->current_ = enclosing_;
+				}
+			}
+
+			private:
+			phase_profile* profile_ = nullptr;
+			phase entered_{};
+			std::optional<phase> enclosing_;
+			std::chrono::steady_clock::time_point start_;
+		};
+
+		[[nodiscard]] scope enter(phase entered) { return {*this,entered}; }
+
+		// attributed to the innermost entered phase, replays outside of any phase are not recorded
+		void count_replay(std::size_t replayed_events)
+		{
+			if constexpr(phase_profiling)
+			{
+				if(!current_ || replayed_events==0)
+					return;
+
+				auto& totals = totals_[static_cast<std::size_t>(*current_)];
+				++totals.replays;
+				totals.replayed_events+=replayed_events;
+			}
+		}
+
+		const phase_totals& operator[](phase p) const { return totals_[static_cast<std::size_t>(p)]; }
+
+		private:
+		std::array<phase_totals,phase_names.size()> totals_{};
+		std::optional<phase> current_;
+	};
+}
+
+#endif
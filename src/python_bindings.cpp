@@ -0,0 +1,142 @@
+#include "eviction_strategies.hpp"
+#include "nfa.hpp"
+#include "summary_selector.hpp"
+
+#include <boost/multiprecision/cpp_int.hpp>
+#include <boost/multiprecision/cpp_bin_float.hpp>
+
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+
+#include <limits>
+#include <optional>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+#include <cstddef>
+#include <cstdint>
+
+namespace py = pybind11;
+
+namespace
+{
+	using counter_type = boost::multiprecision::uint128_t;
+	using factor_type = boost::multiprecision::cpp_bin_float_50;
+	using selector_type = suse::summary_selector<counter_type>;
+
+	// suse::eviction_strategies::fifo is an object of an unnamed type, python needs a named type to dispatch on
+	struct fifo_strategy
+	{
+		std::size_t select(const selector_type& selector, const suse::event& e) const
+		{
+			return suse::eviction_strategies::fifo(selector,e);
+		}
+	};
+
+	using seeded_pseudorandom_strategy = suse::eviction_strategies::seeded_pseudorandom;
+	using suse_strategy = suse::eviction_strategies::suse<counter_type,factor_type>;
+
+	// the counters exceed 64 bit, so they are handed to python via their decimal representation
+	py::int_ to_python(const counter_type& value)
+	{
+		return py::reinterpret_steal<py::int_>(PyLong_FromString(value.str().c_str(),nullptr,10));
+	}
+
+	std::unordered_map<char,factor_type> convert_probabilities(const selector_type& selector, const std::optional<std::unordered_map<char,double>>& probabilities)
+	{
+		std::unordered_map<char,factor_type> converted;
+		if(probabilities)
+		{
+			for(const auto& [symbol,probability]: *probabilities)
+				converted[symbol] = probability;
+		}
+		else
+		{
+			for(const auto& state: selector.automaton().states())
+				for(const auto& [symbol,_]: state.transitions)
+					if(symbol!=suse::nfa::wildcard_symbol)
+						converted[symbol] = {};
+
+			const auto uniform_fraction = factor_type{1} / converted.size();
+			for(auto& [_,probability]: converted)
+				probability = uniform_fraction;
+		}
+
+		converted[suse::nfa::wildcard_symbol] = 1;
+		return converted;
+	}
+
+	template <typename strategy_type>
+	void process_events(selector_type& selector, py::array_t<std::uint8_t,py::array::c_style | py::array::forcecast> types, py::array_t<std::uint64_t,py::array::c_style | py::array::forcecast> timestamps, const strategy_type& strategy)
+	{
+		if(types.ndim()!=1 || timestamps.ndim()!=1 || types.shape(0)!=timestamps.shape(0))
+			throw py::value_error("types and timestamps must be one dimensional arrays of the same length");
+
+		const auto type_view = types.template unchecked<1>();
+		const auto timestamp_view = timestamps.template unchecked<1>();
+
+		py::gil_scoped_release release;
+		for(py::ssize_t i=0;i<type_view.shape(0);++i)
+			selector.process_event({static_cast<char>(type_view(i)),timestamp_view(i)},strategy);
+	}
+
+	template <typename strategy_type>
+	void add_strategy_overloads(py::class_<selector_type>& selector_class)
+	{
+		selector_class
+			.def("process_event",[](selector_type& selector, char type, std::size_t timestamp, const strategy_type& strategy)
+			{
+				selector.process_event({type,timestamp},strategy);
+			},py::arg("type"),py::arg("timestamp"),py::arg("strategy"))
+			.def("process_events",&process_events<strategy_type>,py::arg("types"),py::arg("timestamps"),py::arg("strategy"),
+				"Processes a batch of events given as numpy arrays of event types (uint8) and timestamps (uint64). The GIL is released while processing.");
+	}
+}
+
+PYBIND11_MODULE(suse, m)
+{
+	m.doc() = "Summary selection for regular expression subsequence aggregation over streams. "
+		"Only the baseline strategies (Fifo, SeededPseudorandom, Suse) with single event eviction and the default replay engine are exposed.";
+
+	py::class_<fifo_strategy>(m,"Fifo")
+		.def(py::init<>());
+
+	py::class_<seeded_pseudorandom_strategy>(m,"SeededPseudorandom")
+		.def(py::init<std::mt19937::result_type>(),py::arg("seed"));
+
+	py::class_<selector_type> selector_class(m,"SummarySelector");
+	selector_class
+		.def(py::init<std::string_view,std::size_t,std::size_t,std::size_t>(),
+			py::arg("query"),py::arg("summary_size"),py::arg("time_window_size"),py::arg("time_to_live") = std::numeric_limits<std::size_t>::max())
+		.def("process_event",[](selector_type& selector, char type, std::size_t timestamp)
+		{
+			selector.process_event({type,timestamp});
+		},py::arg("type"),py::arg("timestamp"))
+		.def("number_of_contained_complete_matches",[](const selector_type& selector){ return to_python(selector.number_of_contained_complete_matches()); })
+		.def("number_of_contained_partial_matches",[](const selector_type& selector){ return to_python(selector.number_of_contained_partial_matches()); })
+		.def("number_of_detected_complete_matches",[](const selector_type& selector){ return to_python(selector.number_of_detected_complete_matches()); })
+		.def("number_of_detected_partial_matches",[](const selector_type& selector){ return to_python(selector.number_of_detected_partial_matches()); })
+		.def("cached_events",[](const selector_type& selector)
+		{
+			std::vector<std::pair<char,std::size_t>> events;
+			for(const auto& entry: selector.cached_events())
+				events.emplace_back(entry.cached_event.type,entry.cached_event.timestamp);
+
+			return events;
+		})
+		.def_property_readonly("current_time",&selector_type::current_time)
+		.def_property_readonly("time_window_size",&selector_type::time_window_size);
+
+	py::class_<suse_strategy>(m,"Suse")
+		.def(py::init([](const selector_type& selector, const std::optional<std::unordered_map<char,double>>& probabilities)
+		{
+			return suse_strategy{selector,convert_probabilities(selector,probabilities)};
+		}),py::arg("selector"),py::arg("probabilities") = std::nullopt,
+			"Creates the SuSe strategy for the given selector. Without probabilities, all symbols of the query are assumed to be equally likely.");
+
+	add_strategy_overloads<fifo_strategy>(selector_class);
+	add_strategy_overloads<seeded_pseudorandom_strategy>(selector_class);
+	add_strategy_overloads<suse_strategy>(selector_class);
+}
@@ -16,8 +16,12 @@ namespace suse
 		T& operator[](std::size_t idx);
 		const T& operator[](std::size_t idx) const;
 
-		void push_back(T value);
+		// copies into the storage of the slot, so buffers of counters are reused instead of reallocated
+		void push_back(const T& value);
+		void push_back(T&& value);
 		void pop_front();
+		// moves the following elements up a slot
+		void erase(std::size_t idx);
 		void clear();
 
 		bool empty() const;
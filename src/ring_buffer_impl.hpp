@@ -4,6 +4,8 @@
 	interface and implementation despite the template.
 */
 
+#include <utility>
+
 namespace suse
 {
 
@@ -25,7 +27,13 @@ const T& ring_buffer<T>::operator[](std::size_t idx) const
 }
 
 template <typename T>
-void ring_buffer<T>::push_back(T value)
+void ring_buffer<T>::push_back(const T& value)
+{
+	buffer_[to_real_index(size_++)] = value;
+}
+
+template <typename T>
+void ring_buffer<T>::push_back(T&& value)
 {
 	buffer_[to_real_index(size_++)] = std::move(value);
 }
@@ -37,6 +45,15 @@ void ring_buffer<T>::pop_front()
 	--size_;
 }
 
+template <typename T>
+void ring_buffer<T>::erase(std::size_t idx)
+{
+	// swapping hands the storage of the erased element to the slot that becomes free
+	for(auto i=idx;i+1<size_;++i)
+		std::swap((*this)[i],(*this)[i+1]);
+	--size_;
+}
+
 template <typename T>
 void ring_buffer<T>::clear()
 {
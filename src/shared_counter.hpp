@@ -0,0 +1,83 @@
+#ifndef SUSE_SHARED_COUNTER_HPP
+#define SUSE_SHARED_COUNTER_HPP
+
+#include "execution_state_counter.hpp"
+
+#include <memory>
+#include <unordered_map>
+#include <utility>
+
+#include <cstddef>
+
+namespace suse
+{
+	template <typename counter_type>
+	class counter_pool;
+
+	// copy-on-write handle to an execution_state_counter, copies share the counter until one of them is modified
+	template <typename counter_type>
+	class shared_counter
+	{
+		public:
+		using value_type = execution_state_counter<counter_type>;
+
+		explicit shared_counter(value_type counter);
+
+		const value_type& operator*() const { return *counter_; }
+		const value_type* operator->() const { return counter_.get(); }
+
+		// copies the counter first if it is shared
+		value_type& modify();
+
+		bool is_shared() const { return counter_.use_count()>1; }
+
+		friend bool operator==(const shared_counter& lhs, const shared_counter& rhs)
+		{
+			return lhs.counter_==rhs.counter_ || *lhs.counter_==*rhs.counter_;
+		}
+
+		private:
+		std::shared_ptr<value_type> counter_;
+
+		explicit shared_counter(std::shared_ptr<value_type> counter):
+			counter_{std::move(counter)}
+		{}
+
+		friend class counter_pool<counter_type>;
+	};
+
+	/*
+		Hands out shared counters, so equal counters are stored once.
+		The pool does not keep the counters alive, counters no handle refers to any more are dropped from time to time.
+	*/
+	template <typename counter_type>
+	class counter_pool
+	{
+		public:
+		using value_type = execution_state_counter<counter_type>;
+
+		shared_counter<counter_type> intern(value_type counter);
+		// lets the handle share an equal counter of the pool instead of its own
+		void intern(shared_counter<counter_type>& counter);
+
+		// an estimate of the nodes and buckets of the hash table, the counters belong to their handles
+		std::size_t index_bytes() const
+		{
+			constexpr auto node_bytes = sizeof(typename decltype(counters_)::value_type)+2*sizeof(void*);
+			return counters_.size()*node_bytes+counters_.bucket_count()*sizeof(void*);
+		}
+
+		private:
+		std::unordered_multimap<std::size_t,std::weak_ptr<value_type>> counters_;
+		std::size_t sweep_at_ = 1024;
+
+		std::shared_ptr<value_type> find(const value_type& counter, std::size_t hash);
+		void insert(const std::shared_ptr<value_type>& counter, std::size_t hash);
+
+		static std::size_t hash(const value_type& counter);
+	};
+}
+
+#include "shared_counter_impl.hpp"
+
+#endif
@@ -0,0 +1,50 @@
+#include "shared_counter.hpp"
+
+#include <doctest/doctest.h>
+
+TEST_SUITE("suse::shared_counter")
+{
+	TEST_CASE("copy on write")
+	{
+		suse::execution_state_counter<int> counter(3);
+		counter[1] = 4;
+
+		suse::shared_counter<int> original{counter};
+		auto copy = original;
+		CHECK(original.is_shared());
+		CHECK(&*copy==&*original);
+
+		copy.modify()[2] = 1;
+		CHECK(!original.is_shared());
+		CHECK(*original==counter);
+		CHECK((*copy)[2]==1);
+
+		copy.modify()[2] = 2;
+		CHECK((*copy)[2]==2);
+	}
+
+	TEST_CASE("pool")
+	{
+		suse::counter_pool<int> pool;
+
+		suse::execution_state_counter<int> counter(3);
+		counter[0] = 1;
+		auto other = counter;
+		other[2] = 5;
+
+		const auto first = pool.intern(counter);
+		const auto second = pool.intern(counter);
+		const auto third = pool.intern(other);
+		CHECK(&*first==&*second);
+		CHECK(&*first!=&*third);
+
+		auto modified = pool.intern(other);
+		modified.modify()[2] = 0;
+		CHECK(*modified==counter);
+		CHECK(&*modified!=&*first);
+
+		pool.intern(modified);
+		CHECK(&*modified==&*first);
+		CHECK((*third)[2]==5);
+	}
+}
@@ -0,0 +1,89 @@
+/*
+	Never include directly!
+	This is included by shared_counter.hpp and only exists to split
+	interface and implementation despite the template.
+*/
+
+#include <algorithm>
+#include <functional>
+#include <utility>
+
+#include <cstdint>
+
+namespace suse
+{
+
+template <typename counter_type>
+shared_counter<counter_type>::shared_counter(value_type counter):
+	counter_{std::make_shared<value_type>(std::move(counter))}
+{}
+
+template <typename counter_type>
+auto shared_counter<counter_type>::modify() -> value_type&
+{
+	if(is_shared())
+		counter_ = std::make_shared<value_type>(*counter_);
+
+	return *counter_;
+}
+
+template <typename counter_type>
+shared_counter<counter_type> counter_pool<counter_type>::intern(value_type counter)
+{
+	const auto counter_hash = hash(counter);
+	if(auto existing = find(counter,counter_hash))
+		return shared_counter<counter_type>{std::move(existing)};
+
+	auto interned = std::make_shared<value_type>(std::move(counter));
+	insert(interned,counter_hash);
+	return shared_counter<counter_type>{std::move(interned)};
+}
+
+template <typename counter_type>
+void counter_pool<counter_type>::intern(shared_counter<counter_type>& counter)
+{
+	const auto counter_hash = hash(*counter);
+	if(auto existing = find(*counter,counter_hash))
+		counter.counter_ = std::move(existing);
+	else
+		insert(counter.counter_,counter_hash);
+}
+
+template <typename counter_type>
+auto counter_pool<counter_type>::find(const value_type& counter, std::size_t hash) -> std::shared_ptr<value_type>
+{
+	// a counter modified since it was interned is only found if it still equals the given one
+	const auto [first,last] = counters_.equal_range(hash);
+	for(auto it=first;it!=last;++it)
+	{
+		if(auto candidate = it->second.lock(); candidate && *candidate==counter)
+			return candidate;
+	}
+
+	return nullptr;
+}
+
+template <typename counter_type>
+void counter_pool<counter_type>::insert(const std::shared_ptr<value_type>& counter, std::size_t hash)
+{
+	if(counters_.size()>=sweep_at_)
+	{
+		std::erase_if(counters_,[](const auto& entry){ return entry.second.expired(); });
+		sweep_at_ = std::max(sweep_at_,2*counters_.size());
+	}
+
+	counters_.emplace(hash,counter);
+}
+
+template <typename counter_type>
+std::size_t counter_pool<counter_type>::hash(const value_type& counter)
+{
+	// the lower 64 bit of each count are enough to tell most counters apart
+	std::size_t result = counter.size();
+	for(const auto& value: counter)
+		result = result*31+std::hash<std::uint64_t>{}(static_cast<std::uint64_t>(value));
+
+	return result;
+}
+
+}
@@ -0,0 +1,108 @@
+#include "checked_counter.hpp"
+#include "eviction_strategies.hpp"
+#include "summary_selector.hpp"
+
+#include <boost/multiprecision/cpp_int.hpp>
+
+#include <doctest/doctest.h>
+
+#include <nanobench.h>
+
+#include <cstdint>
+#include <limits>
+#include <random>
+#include <string>
+#include <utility>
+#include <vector>
+
+TEST_SUITE("suse::summary_selector")
+{
+	TEST_CASE("replay engines")
+	{
+		using counter_type = boost::multiprecision::uint256_t;
+
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,4);
+		std::vector<suse::event> events;
+		for(std::size_t i=0;i<1000;++i)
+			events.push_back({static_cast<char>('a'+type_dist(random_gen)),i});
+
+		for(const std::size_t time_window_size: {50,200})
+		{
+			auto b = ankerl::nanobench::Bench();
+			b.title("time window size "+std::to_string(time_window_size)).relative(true).batch(events.size()).unit("event");
+
+			for(const auto& [name,replay]: {std::pair{"incremental",suse::replay_engine::incremental},std::pair{"matrix",suse::replay_engine::matrix}})
+			{
+				b.run(name, [&]()
+				{
+					suse::summary_selector<counter_type> selector{"a(b|c)*d",250,time_window_size,std::numeric_limits<std::size_t>::max(),replay};
+					for(const auto& e: events)
+						selector.process_event(e,suse::eviction_strategies::fifo);
+
+					ankerl::nanobench::doNotOptimizeAway(selector.number_of_contained_complete_matches());
+				});
+			}
+		}
+	}
+
+	TEST_CASE("time to live")
+	{
+		using counter_type = boost::multiprecision::uint256_t;
+
+		// bursts of 100 events that expire together after the gap to the next burst
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::vector<suse::event> events;
+		for(std::size_t i=0, timestamp=0;i<2000;++i)
+		{
+			timestamp+=(i%100==0)?500:1;
+			events.push_back({static_cast<char>('a'+type_dist(random_gen)),timestamp});
+		}
+
+		auto b = ankerl::nanobench::Bench();
+		b.title("purging bursts").relative(true).batch(events.size()).unit("event");
+
+		for(const auto& [name,replay]: {std::pair{"incremental",suse::replay_engine::incremental},std::pair{"matrix",suse::replay_engine::matrix}})
+		{
+			b.run(name, [&]()
+			{
+				suse::summary_selector<counter_type> selector{"a(b|c)*d",1000,100,150,replay};
+				for(const auto& e: events)
+					selector.process_event(e,suse::eviction_strategies::fifo);
+
+				ankerl::nanobench::doNotOptimizeAway(selector.number_of_contained_complete_matches());
+			});
+		}
+	}
+
+	TEST_CASE("summary sizes")
+	{
+		using counter_type = suse::checked_uint<std::uint64_t>;
+
+		// a short time window, so removing an entry from the cache dominates the cost of an eviction
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::vector<suse::event> events;
+		for(std::size_t i=0;i<110000;++i)
+			events.push_back({static_cast<char>('a'+type_dist(random_gen)),i});
+
+		auto b = ankerl::nanobench::Bench();
+		b.title("random evictions").batch(10000).unit("eviction").epochs(1).epochIterations(1);
+
+		for(const std::size_t summary_size: {100,1000,10000,100000})
+		{
+			suse::summary_selector<counter_type> selector{"a(b|c)*d",summary_size,5};
+			auto strategy = suse::eviction_strategies::seeded_pseudorandom{42};
+			auto it = events.begin();
+			for(;selector.cached_events().size()<summary_size;++it)
+				selector.process_event(*it,strategy);
+
+			b.run("summary size "+std::to_string(summary_size), [&]()
+			{
+				for(auto end=it+10000;it!=end;++it)
+					selector.process_event(*it,strategy);
+			});
+		}
+	}
+}
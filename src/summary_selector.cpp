@@ -1,4 +1,9 @@
+#include "checked_counter.hpp"
+#include "event_stream.hpp"
 #include "eviction_strategies.hpp"
+#include "latency_histogram.hpp"
+#include "log_double.hpp"
+#include "mapped_file.hpp"
 #include "nfa.hpp"
 #include "regex.hpp"
 #include "summary_selector.hpp"
@@ -13,24 +18,54 @@
 #include <fmt/ostream.h>
 #include <fmt/chrono.h>
 
+#include <algorithm>
 #include <array>
+#include <atomic>
+#include <barrier>
+#include <charconv>
 #include <chrono>
+#include <exception>
 #include <filesystem>
 #include <fstream>
+#include <functional>
 #include <iostream>
+#include <memory>
+#include <mutex>
+#include <new>
 #include <numeric>
 #include <optional>
+#include <random>
 #include <ranges>
+#include <span>
 #include <string>
 #include <string_view>
+#include <system_error>
+#include <type_traits>
+#include <thread>
 #include <unordered_map>
 #include <unordered_set>
+#include <utility>
+#include <variant>
 #include <vector>
 
+#include <cstdint>
+
 using nanoseconds = std::chrono::nanoseconds;
-using counter_type = boost::multiprecision::uint128_t;
 
-template <> struct fmt::formatter<counter_type>: fmt::ostream_formatter {}; // enables fmt::print to print values of boost::multiprecision::uint128_t
+// counters start out as the narrowest type requested via --counter-width and are widened when they get close to overflowing
+using narrow_counter_type = suse::checked_uint<std::uint64_t>;
+#ifdef __SIZEOF_INT128__
+using medium_counter_type = suse::checked_uint<suse::native_uint128>;
+#else
+using medium_counter_type = suse::checked_uint<boost::multiprecision::uint128_t>;
+#endif
+using wide_counter_type = boost::multiprecision::uint256_t;
+
+using result_counter_type = wide_counter_type;
+// probabilities are read with 50 digits, the SuSe strategy may compute its benefits with less precision (see --factor-precision)
+using reference_factor_type = boost::multiprecision::cpp_bin_float_50;
+
+template <> struct fmt::formatter<result_counter_type>: fmt::ostream_formatter {}; // enables fmt::print to print values of boost::multiprecision::uint256_t
 
 namespace
 {
@@ -54,13 +89,13 @@ namespace
 		}
 	}
 
-	std::unordered_map<char,boost::multiprecision::cpp_bin_float_50> load_probabilities(const std::filesystem::path& path)
+	std::unordered_map<char,reference_factor_type> load_probabilities(const std::filesystem::path& path)
 	{
 		std::ifstream in{path};
-		std::unordered_map<char,boost::multiprecision::cpp_bin_float_50> probabilities;
+		std::unordered_map<char,reference_factor_type> probabilities;
 		
 		char symbol;
-		boost::multiprecision::cpp_bin_float_50 probability;
+		reference_factor_type probability;
 		while(in>>symbol>>probability)
 			probabilities[symbol] = probability;
 
@@ -68,15 +103,15 @@ namespace
 		return probabilities;
 	}
 
-	std::unordered_map<char,boost::multiprecision::cpp_bin_float_50> generate_uniform_probabilities(const suse::nfa& nfa)
+	std::unordered_map<char,reference_factor_type> generate_uniform_probabilities(const suse::nfa& nfa)
 	{
-		std::unordered_map<char,boost::multiprecision::cpp_bin_float_50> probabilities;
+		std::unordered_map<char,reference_factor_type> probabilities;
 		for(const auto& state: nfa.states())
 			for(const auto& [symbol,_]: state.transitions)
 				if(symbol!=suse::nfa::wildcard_symbol)
 					probabilities[symbol] = {};
 
-		const auto uniform_fraction = boost::multiprecision::cpp_bin_float_50{1} / probabilities.size();
+		const auto uniform_fraction = reference_factor_type{1} / probabilities.size();
 		for(auto& [_,prob]: probabilities)
 			prob = uniform_fraction;
 
@@ -84,95 +119,800 @@ namespace
 		return probabilities;
 	}
 
+	template <typename factor_type>
+	std::unordered_map<char,factor_type> convert_probabilities(const std::unordered_map<char,reference_factor_type>& probabilities)
+	{
+		std::unordered_map<char,factor_type> converted;
+		for(const auto& [symbol,probability]: probabilities)
+			converted.emplace(symbol,static_cast<factor_type>(probability));
+
+		return converted;
+	}
+
+	template <typename callback_type>
+	void with_factor_type(std::string_view factor_precision, callback_type&& callback)
+	{
+		if(factor_precision=="double")
+			callback(std::type_identity<double>{});
+		else if(factor_precision=="long-double")
+			callback(std::type_identity<long double>{});
+		else if(factor_precision=="log-double")
+			callback(std::type_identity<suse::log_double>{});
+		else
+			callback(std::type_identity<reference_factor_type>{});
+	}
+
+	struct factor_accuracy
+	{
+		std::size_t decisions = 0, agreements = 0;
+	};
+
+	// the state of the summary before the event with the timestamp is processed
 	struct summary_observation
 	{
-		counter_type matches;
-		std::size_t timestamp;
+		result_counter_type matches, partial_matches;
+		result_counter_type detected_matches, detected_partial_matches;
+		std::size_t timestamp, cache_size;
 	};
 	
+	// a point of the throughput series, the elapsed time is the time spent processing events of this run
+	struct throughput_point
+	{
+		std::size_t processed_events, timestamp, cache_size;
+		nanoseconds elapsed;
+		double events_per_second; // since the previous point
+	};
+
+	constexpr std::array<std::string_view,7> memory_parts{"cache","cache_changes","cached_counters","per_event_counters","replay_windows","strategy","total"};
+
+	// bytes of each of memory_parts, the average weights each sample with the processing time since the previous one
+	struct memory_statistics
+	{
+		std::array<std::size_t,memory_parts.size()> peak{};
+		std::array<double,memory_parts.size()> weighted_sum{}, last{};
+		nanoseconds sampled_until{0};
+
+		double average(std::size_t part) const
+		{
+			const auto seconds = std::chrono::duration<double>{sampled_until}.count();
+			return seconds>0?weighted_sum[part]/seconds:last[part];
+		}
+	};
+
 	struct run_result
 	{
 		nanoseconds average_latency{0}, max_latency{0}, min_latency = std::chrono::hours{42};
+		suse::latency_histogram latencies;
 		std::vector<summary_observation> observations;
-		counter_type final_matches, final_partial_matches;
-		counter_type detected_matches, detected_partial_matches;
+		std::size_t next_periodic_evaluation = 0;
+		result_counter_type final_matches, final_partial_matches;
+		result_counter_type detected_matches, detected_partial_matches;
 		std::size_t processed_events;
+		std::size_t eviction_batch_size = 1;
+		std::size_t cached_counters = 0, distinct_cached_counters = 0;
+		std::optional<factor_accuracy> accuracy;
+		std::optional<suse::phase_profile> phases;
+
+		nanoseconds processing_time{0};
+		std::vector<throughput_point> throughput_series;
+		throughput_point last_throughput_point{0,0,0,nanoseconds{0},0.0};
+
+		memory_statistics memory;
 	};
-	
-	template <typename strategy_type>
-	auto run(suse::summary_selector<counter_type>& selector, strategy_type& strategy, const std::unordered_set<std::size_t> evaluation_timestamps)
+
+	template <typename counter_type>
+	result_counter_type to_result(const counter_type& value)
 	{
+		return static_cast<result_counter_type>(value);
+	}
+
+	template <typename counter_type>
+	struct counter_engine
+	{
+		std::unique_ptr<suse::summary_selector<counter_type>> selector;
+		std::function<void(suse::summary_selector<counter_type>&, const suse::event&)> process_event;
+		// bytes of the tables of the strategy, not set for strategies without any
+		std::function<std::size_t()> strategy_memory;
+
+		// once any detected counter exceeds this limit, the next event might overflow
+		counter_type headroom_limit;
+	};
+
+	using engine_type = std::variant<counter_engine<narrow_counter_type>,counter_engine<medium_counter_type>,counter_engine<wide_counter_type>>;
+
+	struct strategy_run
+	{
+		std::string name;
+		std::size_t summary_size, time_window_size;
+		bool widen_on_demand;
+		std::shared_ptr<const suse::eviction_strategies::seeded_pseudorandom> pseudorandom;
+		std::shared_ptr<factor_accuracy> accuracy;
+
+		engine_type engine;
+		std::exception_ptr failure;
+
 		run_result result{};
+		nanoseconds runtime{0};
+	};
+
+	// every_events or every_time is set if a throughput series is recorded, with a sidecar its points are written there instead of the report
+	struct throughput_schedule
+	{
+		std::size_t every_events = 0;
+		nanoseconds every_time{0};
+
+		std::ostream* sidecar = nullptr;
+		std::mutex* sidecar_mutex = nullptr;
+
+		bool enabled() const { return every_events>0 || every_time>nanoseconds{0}; }
+	};
+
+	// <N> for every N events or <T>ms for every T milliseconds of processing
+	std::optional<throughput_schedule> parse_throughput_schedule(std::string_view every)
+	{
+		const auto in_ms = every.ends_with("ms");
+		if(in_ms)
+			every.remove_suffix(2);
+
+		std::size_t value = 0;
+		const auto [end,error] = std::from_chars(every.data(),every.data()+every.size(),value);
+		if(error!=std::errc{} || end!=every.data()+every.size() || value==0)
+			return std::nullopt;
+
+		throughput_schedule schedule;
+		if(in_ms)
+			schedule.every_time = std::chrono::milliseconds{value};
+		else
+			schedule.every_events = value;
+		return schedule;
+	}
+
+	/*
+		The summary is observed before processing the first event with one of the timestamps and, with every set, before the first
+		event at or after each multiple of every. With a sidecar the observations are written there as lines of JSON instead of the report.
+	*/
+	struct evaluation_schedule
+	{
+		std::unordered_set<std::size_t> timestamps;
+		std::size_t every = 0;
+
+		std::ostream* sidecar = nullptr;
+		std::mutex* sidecar_mutex = nullptr;
+
+		bool enabled() const { return every>0 || !timestamps.empty(); }
+	};
+
+	// every=<N> for the multiples of N or file=<path> for the timestamps listed in the file, separated by whitespace or commas
+	bool parse_evaluation_points(std::string_view spec, evaluation_schedule& schedule)
+	{
+		const auto parse_number = [](std::string_view number, std::size_t& value)
+		{
+			const auto [end,error] = std::from_chars(number.data(),number.data()+number.size(),value);
+			return error==std::errc{} && end==number.data()+number.size();
+		};
+
+		if(spec.starts_with("every="))
+			return parse_number(spec.substr(6),schedule.every) && schedule.every>0;
+
+		if(!spec.starts_with("file="))
+			return false;
+
+		std::ifstream in{std::string{spec.substr(5)}};
+		if(!in)
+			return false;
+
+		for(std::string token;in>>token;)
+		{
+			for(const auto number: std::views::split(token,','))
+			{
+				std::size_t timestamp = 0;
+				if(number.empty())
+					continue;
+				if(!parse_number({number.begin(),number.end()},timestamp))
+					return false;
+				schedule.timestamps.insert(timestamp);
+			}
+		}
+		return true;
+	}
+
+	struct strategy_context
+	{
+		const std::unordered_map<char,reference_factor_type>& probabilities;
+		std::mutex& random_mutex;
+		std::string_view factor_precision;
+
+		std::optional<std::size_t> seed;
+		suse::eviction_strategies::sampling_method sampling;
+		std::size_t eviction_batch_size;
+
+		const throughput_schedule& throughput;
+		std::size_t memory_every; // events between the samples of the memory usage
+		const evaluation_schedule& evaluation;
+	};
+
+	// a batch size of 1 keeps the single eviction decisions, which draw other random numbers than batches
+	template <typename counter_type, typename strategy_type>
+	void process_event(suse::summary_selector<counter_type>& selector, const suse::event& e, const strategy_type& strategy, std::size_t eviction_batch_size)
+	{
+		if(eviction_batch_size>1)
+			selector.process_event(e,strategy,eviction_batch_size);
+		else
+			selector.process_event(e,strategy);
+	}
+
+	// the sampled strategy is given as sampled:<sample size>
+	std::optional<std::size_t> parse_sample_size(std::string_view strategy)
+	{
+		constexpr std::string_view prefix = "sampled:";
+		if(!strategy.starts_with(prefix))
+			return std::nullopt;
+
+		std::size_t sample_size = 0;
+		const auto number = strategy.substr(prefix.size());
+		const auto [end,error] = std::from_chars(number.data(),number.data()+number.size(),sample_size);
+		if(error!=std::errc{} || end!=number.data()+number.size() || sample_size==0)
+			return std::nullopt;
+
+		return sample_size;
+	}
+
+	// makes the eviction decisions of the SuSe strategy with the requested precision and counts how often the 50 digit reference agrees
+	template <typename counter_type, typename factor_type>
+	struct compared_suse
+	{
+		suse::eviction_strategies::indexed_suse<counter_type,factor_type> strategy;
+		suse::eviction_strategies::suse<counter_type,reference_factor_type> reference;
+		std::shared_ptr<factor_accuracy> accuracy;
+
+		std::optional<std::size_t> select(const suse::summary_selector<counter_type>& selector, const suse::event& e) const
+		{
+			const auto decision = strategy.select(selector,e);
+
+			++accuracy->decisions;
+			if(decision==reference.select(selector,e))
+				++accuracy->agreements;
+
+			return decision;
+		}
+
+		std::vector<std::size_t> select(const suse::summary_selector<counter_type>& selector, const suse::event& e, std::size_t batch_size) const
+		{
+			const auto decision = strategy.select(selector,e,batch_size);
 
-		for(suse::event next_event; std::cin>>next_event;++result.processed_events)
+			++accuracy->decisions;
+			if(decision==reference.select(selector,e,batch_size))
+				++accuracy->agreements;
+
+			return decision;
+		}
+	};
+
+	template <typename counter_type, typename factor_type>
+	void set_suse_strategy(counter_engine<counter_type>& engine, const strategy_run& run, const strategy_context& context)
+	{
+		suse::eviction_strategies::indexed_suse<counter_type,factor_type> strategy{*engine.selector,convert_probabilities<factor_type>(context.probabilities)};
+		if(run.accuracy)
 		{
-			if(evaluation_timestamps.contains(next_event.timestamp))
-				result.observations.push_back({selector.number_of_contained_complete_matches(),next_event.timestamp});
+			const auto compared = std::make_shared<const compared_suse<counter_type,factor_type>>(std::move(strategy),suse::eviction_strategies::suse<counter_type,reference_factor_type>{*engine.selector,context.probabilities},run.accuracy);
+			engine.process_event = [compared,batch_size = context.eviction_batch_size](auto& selector, const auto& e)
+			{
+				process_event(selector,e,*compared,batch_size);
+			};
+			engine.strategy_memory = [compared]{ return compared->strategy.memory_usage()+compared->reference.memory_usage(); };
+		}
+		else
+		{
+			const auto suse = std::make_shared<const decltype(strategy)>(std::move(strategy));
+			engine.process_event = [suse,batch_size = context.eviction_batch_size](auto& selector, const auto& e)
+			{
+				process_event(selector,e,*suse,batch_size);
+			};
+			engine.strategy_memory = [suse]{ return suse->memory_usage(); };
+		}
+	}
+
+	template <typename counter_type>
+	counter_engine<counter_type> make_engine(const strategy_run& run, std::unique_ptr<suse::summary_selector<counter_type>> selector, const strategy_context& context)
+	{
+		counter_engine<counter_type> engine{std::move(selector),{},{},{}};
+
+		if(run.name=="fifo")
+		{
+			engine.process_event = [batch_size = context.eviction_batch_size](auto& selector, const auto& e)
+			{
+				process_event(selector,e,suse::eviction_strategies::fifo,batch_size);
+			};
+		}
+		else if(run.name=="random")
+		{
+			if(run.pseudorandom)
+			{
+				// the generator is shared with the engine this one might be widened to, so the sequence continues
+				engine.process_event = [pseudorandom = run.pseudorandom,batch_size = context.eviction_batch_size](auto& selector, const auto& e)
+				{
+					process_event(selector,e,*pseudorandom,batch_size);
+				};
+			}
+			else
+			{
+				// the unseeded random strategy shares one generator, so all runs using it are serialized
+				engine.process_event = [&random_mutex = context.random_mutex,batch_size = context.eviction_batch_size](auto& selector, const auto& e)
+				{
+					std::scoped_lock lock{random_mutex};
+					process_event(selector,e,suse::eviction_strategies::random,batch_size);
+				};
+			}
+		}
+		else if(const auto sample_size = parse_sample_size(run.name); sample_size)
+		{
+			// after widening, the sampling continues with a generator derived from the seed and the number of processed events
+			const auto seed = static_cast<std::mt19937::result_type>(context.seed.value_or(std::random_device{}())+run.result.processed_events);
+			with_factor_type(context.factor_precision,[&]<typename factor_type>(std::type_identity<factor_type>)
+			{
+				const auto sampled = std::make_shared<const suse::eviction_strategies::sampled_suse<counter_type,factor_type>>(*engine.selector,convert_probabilities<factor_type>(context.probabilities),*sample_size,context.sampling,seed);
+				engine.process_event = [sampled,batch_size = context.eviction_batch_size](auto& selector, const auto& e)
+				{
+					process_event(selector,e,*sampled,batch_size);
+				};
+				engine.strategy_memory = [sampled]{ return sampled->memory_usage(); };
+			});
+		}
+		else
+		{
+			// the precomputed factors only depend on the query and the probabilities, so rebuilding the strategy after widening is exact
+			with_factor_type(context.factor_precision,[&]<typename factor_type>(std::type_identity<factor_type>)
+			{
+				set_suse_strategy<counter_type,factor_type>(engine,run,context);
+			});
+		}
+
+		if constexpr(suse::is_checked_uint<counter_type>)
+		{
+			// one event grows each counter by at most the sum over all transitions, the reported sums add up all states on top of that
+			const auto& automaton = engine.selector->automaton();
+			std::size_t number_of_transitions = 0;
+			for(const auto& state: automaton.states())
+				for(const auto& [_,destination_ids]: state.transitions)
+					number_of_transitions+=destination_ids.size();
+
+			const auto growth = static_cast<typename counter_type::value_type>(automaton.number_of_states()*(number_of_transitions+1));
+			engine.headroom_limit = counter_type{counter_type::max().value()/growth};
+		}
+
+		return engine;
+	}
+
+	template <typename counter_type>
+	bool near_overflow(const counter_engine<counter_type>& engine)
+	{
+		const auto& counts = engine.selector->detected_counts();
+		return std::any_of(counts.begin(),counts.end(),[&](const auto& counter){ return counter>engine.headroom_limit; });
+	}
+
+	template <typename counter_type>
+	void record_throughput(strategy_run& run, const suse::summary_selector<counter_type>& selector, const suse::event& last_event, const throughput_schedule& schedule)
+	{
+		auto& result = run.result;
+		const auto& previous = result.last_throughput_point;
+
+		const auto due = schedule.every_events>0?
+			result.processed_events-previous.processed_events>=schedule.every_events:
+			result.processing_time-previous.elapsed>=schedule.every_time;
+		if(!due)
+			return;
+
+		const auto interval = std::chrono::duration<double>{result.processing_time-previous.elapsed}.count();
+		const throughput_point point
+		{
+			result.processed_events,
+			last_event.timestamp,
+			selector.cached_events().size(),
+			result.processing_time,
+			interval>0?static_cast<double>(result.processed_events-previous.processed_events)/interval:0.0
+		};
+		result.last_throughput_point = point;
+
+		if(!schedule.sidecar)
+		{
+			result.throughput_series.push_back(point);
+			return;
+		}
+
+		const std::lock_guard lock{*schedule.sidecar_mutex};
+		fmt::print(*schedule.sidecar,"{{\"strategy\": \"{}\", \"summary_size\": {}, \"time_window_size\": {}, \"processed_events\": {}, \"timestamp\": {}, \"cache_size\": {}, \"elapsed_ns\": {}, \"events_per_second\": {}}}\n",
+			run.name,run.summary_size,run.time_window_size,point.processed_events,point.timestamp,point.cache_size,point.elapsed.count(),point.events_per_second);
+		schedule.sidecar->flush();
+	}
+
+	template <typename counter_type>
+	void record_observation(strategy_run& run, const suse::summary_selector<counter_type>& selector, const suse::event& next_event, const evaluation_schedule& schedule)
+	{
+		auto& result = run.result;
+		auto due = schedule.timestamps.contains(next_event.timestamp);
+		if(schedule.every>0 && next_event.timestamp>=result.next_periodic_evaluation)
+		{
+			due = true;
+			result.next_periodic_evaluation = (next_event.timestamp/schedule.every+1)*schedule.every;
+		}
+		if(!due)
+			return;
+
+		const summary_observation observation
+		{
+			to_result(selector.number_of_contained_complete_matches()),
+			to_result(selector.number_of_contained_partial_matches()),
+			to_result(selector.number_of_detected_complete_matches()),
+			to_result(selector.number_of_detected_partial_matches()),
+			next_event.timestamp,
+			selector.cached_events().size()
+		};
+
+		if(!schedule.sidecar)
+		{
+			result.observations.push_back(observation);
+			return;
+		}
+
+		const std::lock_guard lock{*schedule.sidecar_mutex};
+		fmt::print(*schedule.sidecar,"{{\"strategy\": \"{}\", \"summary_size\": {}, \"time_window_size\": {}, \"timestamp\": {}, \"matches\": {}, \"partial_matches\": {}, \"detected_matches\": {}, \"detected_partial_matches\": {}, \"cache_size\": {}}}\n",
+			run.name,run.summary_size,run.time_window_size,observation.timestamp,observation.matches,observation.partial_matches,observation.detected_matches,observation.detected_partial_matches,observation.cache_size);
+		schedule.sidecar->flush();
+	}
+
+	template <typename counter_type>
+	void record_memory(run_result& result, const counter_engine<counter_type>& engine)
+	{
+		const auto usage = engine.selector->memory_usage();
+		const auto strategy = engine.strategy_memory?engine.strategy_memory():0;
+		const std::array<std::size_t,memory_parts.size()> bytes{usage.cache,usage.cache_changes,usage.cached_counters,usage.per_event_counters,usage.replay_windows,strategy,usage.total()+strategy};
+
+		auto& memory = result.memory;
+		const auto weight = std::chrono::duration<double>{result.processing_time-memory.sampled_until}.count();
+		for(std::size_t part=0;part<bytes.size();++part)
+		{
+			memory.peak[part] = std::max(memory.peak[part],bytes[part]);
+			memory.weighted_sum[part]+=weight*static_cast<double>(bytes[part]);
+			memory.last[part] = static_cast<double>(bytes[part]);
+		}
+		memory.sampled_until = result.processing_time;
+	}
+
+	template <typename counter_type>
+	void process_batch(strategy_run& run, counter_engine<counter_type>& engine, std::span<const suse::event> events, const strategy_context& context)
+	{
+		auto& selector = *engine.selector;
+		auto& result = run.result;
+
+		for(std::size_t idx=0;idx<events.size();++idx)
+		{
+			const auto& next_event = events[idx];
+			if(context.evaluation.enabled())
+				record_observation(run,selector,next_event,context.evaluation);
 
 			const auto start = std::chrono::steady_clock::now();
-				selector.process_event(next_event,strategy);
+			engine.process_event(selector,next_event);
 			const auto end = std::chrono::steady_clock::now();
 
 			result.average_latency+=end-start;
 			result.max_latency = std::max(result.max_latency,end-start);
 			result.min_latency = std::min(result.min_latency,end-start);
+			result.latencies.record(static_cast<std::uint64_t>((end-start).count()));
+			result.processing_time+=end-start;
+			++result.processed_events;
+
+			if(context.throughput.enabled())
+				record_throughput(run,selector,next_event,context.throughput);
+			if(result.processed_events%context.memory_every==0)
+				record_memory(result,engine);
+
+			if constexpr(suse::is_checked_uint<counter_type>)
+			{
+				if(run.widen_on_demand && near_overflow(engine))
+				{
+					using wider_counter_type = std::conditional_t<std::is_same_v<counter_type,narrow_counter_type>,medium_counter_type,wide_counter_type>;
+
+					auto wider_selector = std::make_unique<suse::summary_selector<wider_counter_type>>(selector);
+					run.engine = make_engine(run,std::move(wider_selector),context);
+					process_batch(run,std::get<counter_engine<wider_counter_type>>(run.engine),events.subspan(idx+1),context);
+					return;
+				}
+			}
 		}
-		result.average_latency/=result.processed_events;
-		result.final_matches = selector.number_of_contained_complete_matches();
-		result.final_partial_matches = selector.number_of_contained_partial_matches();
+	}
 
-		result.detected_matches = selector.number_of_detected_complete_matches();
-		result.detected_partial_matches = selector.number_of_detected_partial_matches();
+	void process_batch(strategy_run& run, std::span<const suse::event> events, const strategy_context& context)
+	{
+		if(run.failure)
+			return;
 
-		fmt::print("Partial Matches: {}, Complete Matches: {}\n",result.final_partial_matches,result.final_matches);
-		return result;
+		const auto batch_start = std::chrono::steady_clock::now();
+		try
+		{
+			std::visit([&](auto& engine){ process_batch(run,engine,events,context); },run.engine);
+		}
+		catch(...)
+		{
+			// nothing may escape, a worker thread would terminate the program and the calling thread would leave the others waiting
+			run.failure = std::current_exception();
+		}
+		run.runtime+=std::chrono::steady_clock::now()-batch_start;
 	}
 
-	void generate_report(const std::filesystem::path& path, nanoseconds init_time, nanoseconds runtime, const run_result& result)
+	/*
+		Pool of worker threads that process each batch for all runs. The calling thread takes part
+		in the work, the runs are handed out one at a time so slow strategies do not stall a thread.
+	*/
+	class batch_dispatcher
+	{
+		public:
+		batch_dispatcher(std::vector<strategy_run>& runs, const strategy_context& context, std::size_t number_of_threads):
+			runs_{&runs},
+			context_{&context},
+			batch_started_(static_cast<std::ptrdiff_t>(number_of_threads)),
+			batch_finished_(static_cast<std::ptrdiff_t>(number_of_threads))
+		{
+			for(std::size_t i=1;i<number_of_threads;++i)
+			{
+				workers_.emplace_back([this]()
+				{
+					for(batch_started_.arrive_and_wait();!stop_;batch_started_.arrive_and_wait())
+					{
+						process_runs();
+						batch_finished_.arrive_and_wait();
+					}
+				});
+			}
+		}
+
+		~batch_dispatcher()
+		{
+			stop_ = true;
+			batch_started_.arrive_and_wait();
+		}
+
+		batch_dispatcher(const batch_dispatcher&) = delete;
+		batch_dispatcher& operator=(const batch_dispatcher&) = delete;
+
+		void process(std::span<const suse::event> batch)
+		{
+			batch_ = batch;
+			next_run_ = 0;
+
+			batch_started_.arrive_and_wait();
+			process_runs();
+			batch_finished_.arrive_and_wait();
+		}
+
+		private:
+		std::vector<strategy_run>* runs_;
+		const strategy_context* context_;
+
+		std::span<const suse::event> batch_;
+		std::atomic<std::size_t> next_run_ = 0;
+		bool stop_ = false;
+
+		std::barrier<> batch_started_, batch_finished_;
+		std::vector<std::jthread> workers_;
+
+		void process_runs()
+		{
+			for(auto run_idx=next_run_++;run_idx<runs_->size();run_idx=next_run_++)
+				process_batch((*runs_)[run_idx],batch_,*context_);
+		}
+	};
+
+	void finish_run(strategy_run& run, bool print_name)
+	{
+		auto& result = run.result;
+
+		if(result.processed_events>0)
+			result.average_latency/=result.processed_events;
+
+		std::visit([&](const auto& engine)
+		{
+			const auto& selector = *engine.selector;
+			result.final_matches = to_result(selector.number_of_contained_complete_matches());
+			result.final_partial_matches = to_result(selector.number_of_contained_partial_matches());
+
+			result.detected_matches = to_result(selector.number_of_detected_complete_matches());
+			result.detected_partial_matches = to_result(selector.number_of_detected_partial_matches());
+
+			// equal counters of cached events share one copy
+			std::unordered_set<const void*> distinct_counters;
+			for(const auto& entry: selector.cached_events())
+				distinct_counters.insert(&*entry.state_counter);
+
+			result.cached_counters = selector.cached_events().size();
+			result.distinct_cached_counters = distinct_counters.size();
+
+			if constexpr(suse::phase_profiling)
+				result.phases = selector.phases();
+
+			record_memory(result,engine);
+		},run.engine);
+
+		if(run.accuracy)
+			result.accuracy = *run.accuracy;
+
+		if(print_name)
+			fmt::print("summary size {}, time window size {}, {}: ",run.summary_size,run.time_window_size,run.name);
+		fmt::print("Partial Matches: {}, Complete Matches: {}",result.final_partial_matches,result.final_matches);
+		if(result.accuracy)
+			fmt::print(", Eviction decisions agreeing with 50 digit factors: {}/{}",result.accuracy->agreements,result.accuracy->decisions);
+		fmt::print("\n");
+	}
+
+	// percentiles and the non-empty buckets, each bucket ranging from its lower bound to the next one
+	void print_latency_histogram(std::ostream& out, std::string_view indent, const suse::latency_histogram& latencies)
+	{
+		constexpr std::array<std::pair<std::string_view,double>,5> percentiles{{{"p50",50},{"p90",90},{"p99",99},{"p99_9",99.9},{"p99_99",99.99}}};
+		for(const auto& [name,percent]: percentiles)
+			fmt::print(out,"{}\t\"{}_latency_ns\": {},\n",indent,name,latencies.percentile(percent));
+
+		std::vector<std::uint64_t> lower_bounds, upper_bounds, counts;
+		for(std::size_t bucket=0;bucket<suse::latency_histogram::bucket_count;++bucket)
+		{
+			if(latencies.count(bucket)==0)
+				continue;
+
+			lower_bounds.push_back(suse::latency_histogram::lower_bound(bucket));
+			upper_bounds.push_back(suse::latency_histogram::upper_bound(bucket));
+			counts.push_back(latencies.count(bucket));
+		}
+
+		fmt::print(out,"{}\t\"latency_bucket_lower_bounds_ns\": [{}],\n",indent,fmt::join(lower_bounds,", "));
+		fmt::print(out,"{}\t\"latency_bucket_upper_bounds_ns\": [{}],\n",indent,fmt::join(upper_bounds,", "));
+		fmt::print(out,"{}\t\"latency_bucket_counts\": [{}],\n",indent,fmt::join(counts,", "));
+	}
+
+	void print_phases(std::ostream& out, std::string_view indent, const suse::phase_profile& phases)
+	{
+		fmt::print(out,"{}\t\"phases\": {{\n",indent);
+		for(std::size_t idx=0;idx<suse::phase_names.size();++idx)
+		{
+			const auto& totals = phases[static_cast<suse::phase>(idx)];
+			fmt::print(out,"{}\t\t\"{}\": {{\"nanoseconds\": {}, \"calls\": {}, \"replays\": {}, \"replayed_events\": {}}}{}\n",
+				indent,suse::phase_names[idx],totals.nanoseconds,totals.calls,totals.replays,totals.replayed_events,idx+1<suse::phase_names.size()?",":"");
+		}
+		fmt::print(out,"{}\t}},\n",indent);
+	}
+
+	void print_throughput_series(std::ostream& out, std::string_view indent, std::span<const throughput_point> series)
+	{
+		const auto column = [&](std::string_view name, auto member)
+		{
+			fmt::print(out,"{}\t\"{}\": [{}],\n",indent,name,fmt::join(std::views::transform(series,member),", "));
+		};
+
+		column("throughput_processed_events",[](const auto& p){ return p.processed_events; });
+		column("throughput_timestamps",[](const auto& p){ return p.timestamp; });
+		column("throughput_cache_sizes",[](const auto& p){ return p.cache_size; });
+		column("throughput_elapsed_ns",[](const auto& p){ return p.elapsed.count(); });
+		column("throughput_events_per_second",[](const auto& p){ return p.events_per_second; });
+	}
+
+	void print_memory(std::ostream& out, std::string_view indent, const memory_statistics& memory)
+	{
+		fmt::print(out,"{}\t\"memory_peak_bytes\": {},\n",indent,memory.peak.back());
+		fmt::print(out,"{}\t\"memory_average_bytes\": {},\n",indent,memory.average(memory_parts.size()-1));
+
+		fmt::print(out,"{}\t\"memory\": {{\n",indent);
+		for(std::size_t part=0;part<memory_parts.size();++part)
+			fmt::print(out,"{}\t\t\"{}\": {{\"peak_bytes\": {}, \"average_bytes\": {}}}{}\n",indent,memory_parts[part],memory.peak[part],memory.average(part),part+1<memory_parts.size()?",":"");
+		fmt::print(out,"{}\t}},\n",indent);
+	}
+
+	void print_result(std::ostream& out, std::string_view indent, nanoseconds init_time, nanoseconds runtime, const run_result& result)
 	{
-		std::ofstream out{path};
 		fmt::print(out,"{{\n");
-		fmt::print(out,"\t\"initialization_time_ns\": {},\n",init_time.count());
-		fmt::print(out,"\t\"runtime_ns\": {},\n",runtime.count());
-		fmt::print(out,"\t\"average_latency_ns\": {},\n",result.average_latency.count());
-		fmt::print(out,"\t\"max_latency_ns\": {},\n",result.max_latency.count());
-		fmt::print(out,"\t\"min_latency_ns\": {},\n",result.min_latency.count());
-		fmt::print(out,"\t\"final_matches\": {},\n",result.final_matches);
-		fmt::print(out,"\t\"final_partial_matches\": {},\n",result.final_partial_matches);
-		fmt::print(out,"\t\"detected_matches\": {},\n",result.detected_matches);
-		fmt::print(out,"\t\"detected_partial_matches\": {},\n",result.detected_partial_matches);
-		fmt::print(out,"\t\"processed_events\": {},\n",result.processed_events);
+		fmt::print(out,"{}\t\"initialization_time_ns\": {},\n",indent,init_time.count());
+		fmt::print(out,"{}\t\"runtime_ns\": {},\n",indent,runtime.count());
+		fmt::print(out,"{}\t\"average_latency_ns\": {},\n",indent,result.average_latency.count());
+		fmt::print(out,"{}\t\"max_latency_ns\": {},\n",indent,result.max_latency.count());
+		fmt::print(out,"{}\t\"min_latency_ns\": {},\n",indent,result.min_latency.count());
+		print_latency_histogram(out,indent,result.latencies);
+		fmt::print(out,"{}\t\"final_matches\": {},\n",indent,result.final_matches);
+		fmt::print(out,"{}\t\"final_partial_matches\": {},\n",indent,result.final_partial_matches);
+		fmt::print(out,"{}\t\"detected_matches\": {},\n",indent,result.detected_matches);
+		fmt::print(out,"{}\t\"detected_partial_matches\": {},\n",indent,result.detected_partial_matches);
+		fmt::print(out,"{}\t\"processed_events\": {},\n",indent,result.processed_events);
+		fmt::print(out,"{}\t\"eviction_batch_size\": {},\n",indent,result.eviction_batch_size);
+		fmt::print(out,"{}\t\"cached_counters\": {},\n",indent,result.cached_counters);
+		fmt::print(out,"{}\t\"distinct_cached_counters\": {},\n",indent,result.distinct_cached_counters);
+		fmt::print(out,"{}\t\"counter_dedup_ratio\": {},\n",indent,result.distinct_cached_counters>0?static_cast<double>(result.cached_counters)/result.distinct_cached_counters:1.0);
+		if(result.accuracy)
+		{
+			fmt::print(out,"{}\t\"eviction_decisions\": {},\n",indent,result.accuracy->decisions);
+			fmt::print(out,"{}\t\"reference_agreements\": {},\n",indent,result.accuracy->agreements);
+		}
+		if(result.phases)
+			print_phases(out,indent,*result.phases);
+		print_memory(out,indent,result.memory);
 
-		const auto observed_timestamps = std::views::transform(result.observations,[](const auto& o)
+		const auto observed = [&](auto member)
 		{
-			return o.timestamp;
-		});
+			return std::views::transform(result.observations,[member](const auto& o){ return o.*member; });
+		};
+
+		if(!result.throughput_series.empty())
+			print_throughput_series(out,indent,result.throughput_series);
 
-		const auto observed_matches = std::views::transform(result.observations,[](const auto& o)
+		fmt::print(out,"{}\t\"observed_partial_matches\": [{}],\n",indent,fmt::join(observed(&summary_observation::partial_matches),", "));
+		fmt::print(out,"{}\t\"observed_detected_matches\": [{}],\n",indent,fmt::join(observed(&summary_observation::detected_matches),", "));
+		fmt::print(out,"{}\t\"observed_detected_partial_matches\": [{}],\n",indent,fmt::join(observed(&summary_observation::detected_partial_matches),", "));
+		fmt::print(out,"{}\t\"observed_cache_sizes\": [{}],\n",indent,fmt::join(observed(&summary_observation::cache_size),", "));
+		fmt::print(out,"{}\t\"observed_timestamps\": [{}],\n",indent,fmt::join(observed(&summary_observation::timestamp),", "));
+		fmt::print(out,"{}\t\"observed_matches\": [{}]\n",indent,fmt::join(observed(&summary_observation::matches),", "));
+		fmt::print(out,"{}}}",indent);
+	}
+
+	std::string report_path(std::string pattern, std::size_t summary_size, std::size_t time_window_size)
+	{
+		const auto replace_all = [&](std::string_view placeholder, std::size_t value)
 		{
-			return o.matches;
-		});
+			const auto replacement = std::to_string(value);
+			for(auto pos=pattern.find(placeholder);pos!=std::string::npos;pos=pattern.find(placeholder,pos+replacement.size()))
+				pattern.replace(pos,placeholder.size(),replacement);
+		};
 
-		fmt::print(out,"\t\"observed_timestamps\": [{}],\n",fmt::join(observed_timestamps,", "));
-		fmt::print(out,"\t\"observed_matches\": [{}]\n",fmt::join(observed_matches,", "));
+		replace_all("{summary_size}",summary_size);
+		replace_all("{time_window_size}",time_window_size);
+		return pattern;
+	}
+
+	// a single strategy produces a flat report, several strategies produce one report object per strategy keyed by its name
+	void generate_report(const std::filesystem::path& path, nanoseconds init_time, std::span<const strategy_run> runs)
+	{
+		std::ofstream out{path};
+		if(runs.size()==1)
+		{
+			print_result(out,"",init_time,runs.front().runtime,runs.front().result);
+			fmt::print(out,"\n");
+			return;
+		}
+
+		fmt::print(out,"{{\n");
+		for(std::size_t i=0;i<runs.size();++i)
+		{
+			fmt::print(out,"\t\"{}\": ",runs[i].name);
+			print_result(out,"\t",init_time,runs[i].runtime,runs[i].result);
+			fmt::print(out,"{}\n",i+1<runs.size()?",":"");
+		}
 		fmt::print(out,"}}\n");
 	}
 }
 
 int main(int argc, char* argv[]) try
 {
+	std::ios_base::sync_with_stdio(false);
+
 	cxxopts::Options options("summary_selector", "Transforms an eventstream to ");
 	options.add_options()
 		("query,q","Regex/Query to evaluate",cxxopts::value<std::string>())
-		("strategy","Eviction strategy. Must be one of suse, fifo or random. Default is suse",cxxopts::value<std::string>()->default_value("suse"))
+		("strategy","Comma separated list of eviction strategies, each one of suse, fifo, random or sampled:<sample size>. sampled:<k> evaluates the SuSe benefit of k sampled cached events only. All strategies process the same stream. Default is suse",cxxopts::value<std::vector<std::string>>()->default_value("suse"))
+		("threads","Number of threads used to run several strategies and configurations in parallel",cxxopts::value<std::size_t>()->default_value("1"))
 		("probabilities-file","For SuSe eviction strategy: file containing the probabilities for each character",cxxopts::value<std::string>())
-		("summary-size,s","Size of the summary cache",cxxopts::value<std::size_t>())
-		("time-window-size,t","Size of one time window",cxxopts::value<std::size_t>())
+		("summary-size,s","Comma separated list of sizes of the summary cache",cxxopts::value<std::vector<std::size_t>>())
+		("time-window-size,t","Comma separated list of sizes of one time window. Every combination of summary size and time window size is run on the same stream",cxxopts::value<std::vector<std::size_t>>())
 		("time-to-live","The maximum amount of time an event stays in the cache",cxxopts::value<std::size_t>()->default_value(std::to_string(std::numeric_limits<std::size_t>::max())))
-		("seed,S","For random eviction stragety: Seed used",cxxopts::value<std::size_t>())
+		("eviction-batch-size","Number of events evicted at once when the cache is full. The strategy selects them in one pass and their removal is replayed once, the freed space takes the following events without another selection. Default is 1",cxxopts::value<std::size_t>()->default_value("1"))
+		("factor-precision","For SuSe eviction strategy: precision of the expected benefits. Must be one of 50-digit, double, long-double or log-double. log-double stores logarithms and does not overflow for very long time windows. Default is 50-digit",cxxopts::value<std::string>()->default_value("50-digit"))
+		("factor-accuracy","For SuSe eviction strategy: additionally make every eviction decision with 50 digit precision and report how often it agrees with the one made with --factor-precision, which must not be 50-digit")
+		("counter-width","Width of the match counters. Must be one of 64, 128 or checked. With 64 and 128, the run is aborted if a counter overflows, they cannot be combined with --replay=matrix. checked starts with 64 bit and widens the counters (to 128 and then 256 bit) when they get close to overflowing. Default is checked",cxxopts::value<std::string>()->default_value("checked"))
+		("replay","How counters are recomputed after an eviction or when an initiating event leaves the time window. Must be one of incremental or matrix. matrix uses products of transition matrices and is faster for large time windows. Default is incremental",cxxopts::value<std::string>()->default_value("incremental"))
+		("input,i","File to read the event stream from instead of stdin. The file is memory-mapped",cxxopts::value<std::string>())
+		("input-format","Format of the event stream. Must be one of text or binary. Default is text",cxxopts::value<std::string>()->default_value("text"))
+		("sampling","For sampled eviction strategy: how the candidates are drawn. Must be one of uniform or stratified (one candidate per age group of the cache). Default is uniform",cxxopts::value<std::string>()->default_value("uniform"))
+		("seed,S","For random and sampled eviction strategies: Seed used",cxxopts::value<std::size_t>())
 		("evaluation-timestamps,e","Timestamps to evaluate at",cxxopts::value<std::vector<std::size_t>>())
+		("evaluation-points","Further points to evaluate at, every=<N> for the first event at or after each multiple of N or file=<path> for a file of timestamps separated by whitespace or commas. Can be combined with --evaluation-timestamps",cxxopts::value<std::vector<std::string>>())
+		("observations-file","Write each evaluation as a line of JSON with the contained and detected complete and partial matches and the number of cached events to this file as soon as it is made instead of keeping them for the report",cxxopts::value<std::string>())
 		("output-nfa","File to write the graphviz-dot representation of the compiled NFA to",cxxopts::value<std::string>())
-		("report,r","File to write results to",cxxopts::value<std::string>())
+		("throughput-every","Record the throughput and the number of cached events every N events (N) or every T milliseconds of processing (Tms) in the report",cxxopts::value<std::string>())
+		("throughput-file","With --throughput-every: write each point as a line of JSON to this file as soon as it is recorded instead of keeping the series for the report, e.g. for long runs",cxxopts::value<std::string>())
+		("memory-every","Number of events between the samples of the memory used by the cache, the counters, the replays and the strategy. The peak and the processing time weighted average of the samples are reported. Default is 1024",cxxopts::value<std::size_t>()->default_value("1024"))
+		("report,r","File to write results to. With several configurations, the placeholders {summary_size} and {time_window_size} are replaced to get one report per configuration",cxxopts::value<std::string>())
 		("help,h","Display this help meassage");
 
 	options.parse_positional("query");
@@ -195,11 +935,65 @@ int main(int argc, char* argv[]) try
 		}
 	}
 
-	const auto strategy = parsed_args["strategy"].template as<std::string>();
+	const auto strategies = parsed_args["strategy"].template as<std::vector<std::string>>();
 	const std::array<std::string_view,3> valid_strategies{"suse","fifo","random"};
-	if(std::find(valid_strategies.begin(),valid_strategies.end(),strategy)==valid_strategies.end())
+	for(std::size_t i=0;i<strategies.size();++i)
+	{
+		const auto known = std::find(valid_strategies.begin(),valid_strategies.end(),strategies[i])!=valid_strategies.end() || parse_sample_size(strategies[i]);
+		if(!known || std::find(strategies.begin(),strategies.begin()+i,strategies[i])!=strategies.begin()+i)
+		{
+			fmt::print(stderr,"{}",fmt::styled("Invalid strategy, aborting...\n",fmt::fg(fmt::color::red)));
+			return 1;
+		}
+	}
+	if(strategies.empty())
+	{
+		fmt::print(stderr,"{}",fmt::styled("No strategy given, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
+
+	const auto sampling = parsed_args["sampling"].template as<std::string>();
+	if(sampling!="uniform" && sampling!="stratified")
+	{
+		fmt::print(stderr,"{}",fmt::styled("Invalid sampling, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
+
+	const auto input_format = suse::parse_input_format(parsed_args["input-format"].template as<std::string>());
+
+	const auto counter_width = parsed_args["counter-width"].template as<std::string>();
+	const std::array<std::string_view,3> valid_counter_widths{"64","128","checked"};
+	if(std::find(valid_counter_widths.begin(),valid_counter_widths.end(),counter_width)==valid_counter_widths.end())
+	{
+		fmt::print(stderr,"{}",fmt::styled("Invalid counter width, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
+
+	const auto replay_name = parsed_args["replay"].template as<std::string>();
+	if(replay_name!="incremental" && replay_name!="matrix")
+	{
+		fmt::print(stderr,"{}",fmt::styled("Invalid replay, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
+	const auto replay = replay_name=="matrix"?suse::replay_engine::matrix:suse::replay_engine::incremental;
+	// the transition matrices wrap around, so only widening before the counters get close to overflowing keeps them exact
+	if(replay==suse::replay_engine::matrix && counter_width!="checked")
 	{
-		fmt::print(stderr,"{}",fmt::styled("Invalid strategy, aborting...\n",fmt::fg(fmt::color::red)));
+		fmt::print(stderr,"{}",fmt::styled("The matrix replay cannot detect overflows with a fixed --counter-width, use --counter-width=checked, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
+
+	const auto factor_precision = parsed_args["factor-precision"].template as<std::string>();
+	const std::array<std::string_view,4> valid_factor_precisions{"50-digit","double","long-double","log-double"};
+	if(std::find(valid_factor_precisions.begin(),valid_factor_precisions.end(),factor_precision)==valid_factor_precisions.end())
+	{
+		fmt::print(stderr,"{}",fmt::styled("Invalid factor precision, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
+	const auto measure_factor_accuracy = parsed_args.count("factor-accuracy")>0;
+	if(measure_factor_accuracy && factor_precision=="50-digit")
+	{
+		fmt::print(stderr,"{}",fmt::styled("--factor-accuracy compares with 50 digit precision and needs another --factor-precision, aborting...\n",fmt::fg(fmt::color::red)));
 		return 1;
 	}
 
@@ -222,58 +1016,185 @@ int main(int argc, char* argv[]) try
 		out<<*nfa;
 	}
 
-	const auto summary_size = parsed_args["summary-size"].template as<std::size_t>();
-	const auto time_window_size = parsed_args["time-window-size"].template as<std::size_t>();
+	const auto summary_sizes = parsed_args["summary-size"].template as<std::vector<std::size_t>>();
+	const auto time_window_sizes = parsed_args["time-window-size"].template as<std::vector<std::size_t>>();
+	const auto number_of_configurations = summary_sizes.size()*time_window_sizes.size();
+	if(number_of_configurations==0)
+	{
+		fmt::print(stderr,"{}",fmt::styled("No summary size or time window size given, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
+
+	if(number_of_configurations>1 && parsed_args.count("report")>0)
+	{
+		const auto report = parsed_args["report"].template as<std::string>();
+		if((summary_sizes.size()>1 && report.find("{summary_size}")==std::string::npos) || (time_window_sizes.size()>1 && report.find("{time_window_size}")==std::string::npos))
+		{
+			fmt::print(stderr,"{}",fmt::styled("The report file needs {summary_size} and {time_window_size} placeholders for several configurations, aborting...\n",fmt::fg(fmt::color::red)));
+			return 1;
+		}
+	}
 	const auto time_to_live = parsed_args["time-to-live"].template as<std::size_t>();
-	const auto evaluation_timestamps = [&]() -> std::unordered_set<std::size_t>
+
+	const auto eviction_batch_size = parsed_args["eviction-batch-size"].template as<std::size_t>();
+	if(eviction_batch_size==0)
 	{
-		if(parsed_args.count("evaluation-timestamps")==0)
-			return {};
-		
-		const auto timestamps = parsed_args["evaluation-timestamps"].template as<std::vector<std::size_t>>();
-		return {timestamps.begin(),timestamps.end()};
-	}();
+		fmt::print(stderr,"{}",fmt::styled("The eviction batch size must be at least 1, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
 
-	const auto start_time = std::chrono::steady_clock::now();
-	
-	suse::summary_selector<counter_type> selector{query,summary_size,time_window_size,time_to_live};
+	const auto memory_every = parsed_args["memory-every"].template as<std::size_t>();
+	if(memory_every==0)
+	{
+		fmt::print(stderr,"{}",fmt::styled("The number of events between memory samples must be at least 1, aborting...\n",fmt::fg(fmt::color::red)));
+		return 1;
+	}
 
-	const auto measured_run = [&](auto& strategy)
+	throughput_schedule throughput;
+	if(parsed_args.count("throughput-every")>0)
 	{
-		const auto processing_start_time = std::chrono::steady_clock::now();
-			const auto result = run(selector,strategy,evaluation_timestamps);
-		const auto processing_end_time = std::chrono::steady_clock::now();	
+		const auto schedule = parse_throughput_schedule(parsed_args["throughput-every"].template as<std::string>());
+		if(!schedule)
+		{
+			fmt::print(stderr,"{}",fmt::styled("Invalid --throughput-every, must be a positive number of events or milliseconds (e.g. 250ms), aborting...\n",fmt::fg(fmt::color::red)));
+			return 1;
+		}
+		throughput = *schedule;
+	}
 
-		if(parsed_args.count("report")>0)
+	std::ofstream throughput_file;
+	std::mutex throughput_file_mutex;
+	if(parsed_args.count("throughput-file")>0 && throughput.enabled())
+	{
+		throughput_file.open(parsed_args["throughput-file"].template as<std::string>());
+		if(!throughput_file)
 		{
-			const auto filename = parsed_args["report"].template as<std::string>();
-			generate_report(filename,processing_start_time-start_time,processing_end_time-processing_start_time,result);
+			fmt::print(stderr,"{}",fmt::styled("Cannot open the --throughput-file, aborting...\n",fmt::fg(fmt::color::red)));
+			return 1;
 		}
-	};
-	
-	if(strategy=="fifo")
+		throughput.sidecar = &throughput_file;
+		throughput.sidecar_mutex = &throughput_file_mutex;
+	}
+
+	evaluation_schedule evaluation;
+	if(parsed_args.count("evaluation-timestamps")>0)
 	{
-		measured_run(suse::eviction_strategies::fifo);
+		const auto timestamps = parsed_args["evaluation-timestamps"].template as<std::vector<std::size_t>>();
+		evaluation.timestamps.insert(timestamps.begin(),timestamps.end());
 	}
-	else if(strategy=="random")
+	if(parsed_args.count("evaluation-points")>0)
 	{
-		if(parsed_args.count("seed")>0)
+		for(const auto& spec: parsed_args["evaluation-points"].template as<std::vector<std::string>>())
 		{
-			const auto seed = parsed_args["seed"].template as<std::size_t>();
-			suse::eviction_strategies::seeded_pseudorandom pseudorandom(seed);
-			measured_run(pseudorandom);
+			if(!parse_evaluation_points(spec,evaluation))
+			{
+				fmt::print(stderr,"{}",fmt::styled(fmt::format("Invalid --evaluation-points {}, must be every=<N> or file=<path> of a readable file of timestamps, aborting...\n",spec),fmt::fg(fmt::color::red)));
+				return 1;
+			}
 		}
+	}
+
+	std::ofstream observations_file;
+	std::mutex observations_file_mutex;
+	if(parsed_args.count("observations-file")>0 && evaluation.enabled())
+	{
+		observations_file.open(parsed_args["observations-file"].template as<std::string>());
+		if(!observations_file)
+		{
+			fmt::print(stderr,"{}",fmt::styled("Cannot open the --observations-file, aborting...\n",fmt::fg(fmt::color::red)));
+			return 1;
+		}
+		evaluation.sidecar = &observations_file;
+		evaluation.sidecar_mutex = &observations_file_mutex;
+	}
+
+	std::optional<suse::mapped_file> input_file;
+	if(parsed_args.count("input")>0)
+		input_file.emplace(parsed_args["input"].template as<std::string>());
+
+	const auto with_events = [&](auto&& callback)
+	{
+		if(input_file)
+			suse::with_event_parser(input_format,input_file->bytes(),callback);
 		else
-			measured_run(suse::eviction_strategies::random);
+			suse::with_event_reader(input_format,std::cin,callback);
+	};
+
+	const auto number_of_threads = std::min(std::max(parsed_args["threads"].template as<std::size_t>(),std::size_t{1}),number_of_configurations*strategies.size());
+
+	const auto probabilities = parsed_args.count("probabilities-file")>0?
+		load_probabilities(parsed_args["probabilities-file"].template as<std::string>()):
+		generate_uniform_probabilities(*nfa); 
+
+	const auto start_time = std::chrono::steady_clock::now();
+
+	std::mutex random_mutex;
+	const strategy_context context
+	{
+		probabilities,
+		random_mutex,
+		factor_precision,
+		parsed_args.count("seed")>0?parsed_args["seed"].template as<std::size_t>():std::optional<std::size_t>{},
+		sampling=="stratified"?suse::eviction_strategies::sampling_method::stratified:suse::eviction_strategies::sampling_method::uniform,
+		eviction_batch_size,
+		throughput,
+		memory_every,
+		evaluation
+	};
+
+	std::vector<strategy_run> runs;
+	for(const auto summary_size: summary_sizes)
+	for(const auto time_window_size: time_window_sizes)
+	for(const auto& strategy: strategies)
+	{
+		strategy_run run{strategy,summary_size,time_window_size,counter_width=="checked",nullptr,nullptr,{},nullptr};
+		run.result.eviction_batch_size = eviction_batch_size;
+		run.result.next_periodic_evaluation = evaluation.every;
+		if(strategy=="random" && parsed_args.count("seed")>0)
+			run.pseudorandom = std::make_shared<const suse::eviction_strategies::seeded_pseudorandom>(parsed_args["seed"].template as<std::size_t>());
+		if(strategy=="suse" && measure_factor_accuracy)
+			run.accuracy = std::make_shared<factor_accuracy>();
+
+		if(counter_width=="128")
+			run.engine = make_engine(run,std::make_unique<suse::summary_selector<medium_counter_type>>(query,summary_size,time_window_size,time_to_live,replay),context);
+		else
+			run.engine = make_engine(run,std::make_unique<suse::summary_selector<narrow_counter_type>>(query,summary_size,time_window_size,time_to_live,replay),context);
+
+		runs.push_back(std::move(run));
 	}
-	else
+
+	const auto processing_start_time = std::chrono::steady_clock::now();
+
+	// every event is parsed once and handed to all runs, batching keeps the synchronisation cost of the threads low
+	constexpr std::size_t batch_size = std::size_t{1}<<12;
+	batch_dispatcher dispatcher{runs,context,number_of_threads};
+
+	with_events([&](auto& events)
 	{
-		const auto probabilities = parsed_args.count("probabilities-file")>0?
-			load_probabilities(parsed_args["probabilities-file"].template as<std::string>()):
-			generate_uniform_probabilities(*nfa); 
-		suse::eviction_strategies::suse suse{selector,probabilities};
+		std::vector<suse::event> batch;
+		batch.reserve(batch_size);
+		for(bool more_events=true;more_events;)
+		{
+			batch.clear();
+			for(suse::event next_event;batch.size()<batch_size && (more_events = events.next(next_event));)
+				batch.push_back(next_event);
+
+			dispatcher.process(batch);
+		}
+	});
 
-		measured_run(suse);
+	for(const auto& run: runs)
+		if(run.failure)
+			std::rethrow_exception(run.failure);
+
+	for(auto& run: runs)
+		finish_run(run,runs.size()>1);
+
+	if(parsed_args.count("report")>0)
+	{
+		const auto filename = parsed_args["report"].template as<std::string>();
+		for(auto first=runs.begin();first!=runs.end();first+=strategies.size())
+			generate_report(report_path(filename,first->summary_size,first->time_window_size),processing_start_time-start_time,{first,strategies.size()});
 	}
 	
 	return 0;
@@ -283,3 +1204,28 @@ catch(const cxxopts::exceptions::exception& e)
 	fmt::print(stderr,"Error parsing arguments: {}\n", e.what());
 	return 1;
 }
+catch(const suse::stream_format_error& e)
+{
+	fmt::print(stderr,"Error reading event stream: {}\n", e.what());
+	return 1;
+}
+catch(const suse::counter_overflow& e)
+{
+	fmt::print(stderr,"{}: {}, use a larger --counter-width\n",fmt::styled("Aborting",fmt::fg(fmt::color::red)),e.what());
+	return 1;
+}
+catch(const suse::counter_underflow& e)
+{
+	fmt::print(stderr,"{}: {}, the counters are inconsistent (e.g. because of events sharing a timestamp)\n",fmt::styled("Aborting",fmt::fg(fmt::color::red)),e.what());
+	return 1;
+}
+catch(const std::system_error& e)
+{
+	fmt::print(stderr,"Error opening input: {}\n", e.what());
+	return 1;
+}
+catch(const std::bad_alloc&)
+{
+	fmt::print(stderr,"{}: out of memory\n",fmt::styled("Aborting",fmt::fg(fmt::color::red)));
+	return 1;
+}
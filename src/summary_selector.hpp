@@ -5,14 +5,21 @@
 #include "event.hpp"
 #include "execution_state_counter.hpp"
 #include "nfa.hpp"
+#include "phase_profile.hpp"
 #include "ring_buffer.hpp"
+#include "shared_counter.hpp"
+#include "tiered_vector.hpp"
+#include "transition_matrix.hpp"
 
+#include <algorithm>
 #include <concepts>
 #include <limits>
 #include <optional>
+#include <ranges>
 #include <span>
 #include <string_view>
 #include <unordered_map>
+#include <utility>
 #include <vector>
 
 #include <cstddef>
@@ -34,25 +41,83 @@ namespace suse
 	template <typename T, typename cache_type>
 	concept eviction_strategy =  callable_eviction_strategy<T,cache_type> || eviction_strategy_object<T,cache_type>; 
 
+	// selects up to batch_size cached events to evict at once, sorted by their index, or none to skip the new event
+	template <typename T, typename cache_type>
+	concept batch_eviction_strategy = requires(const T strategy, const cache_type cache, const event e, std::size_t batch_size)
+	{
+		{ strategy.select(cache,e,batch_size) } -> std::convertible_to<std::vector<std::size_t>>;
+	};
+
+	// a change to the cached entries, the indices refer to the cache at the time of the change
+	struct cache_change
+	{
+		enum class kind { modified, erased, appended };
+
+		kind type;
+		std::size_t begin, end;
+
+		friend bool operator==(const cache_change&, const cache_change&) = default;
+	};
+
+	// bytes held by the parts of a summary_selector, each counter shared by several cache entries is counted once
+	struct selector_memory
+	{
+		std::size_t cache = 0; // the entries and the index of the counter pool, without the counters
+		std::size_t cache_changes = 0; // the log of the changes since the last eviction decision
+		std::size_t cached_counters = 0;
+		std::size_t per_event_counters = 0; // of the active time window
+		std::size_t replay_windows = 0; // the most counters a replay held at once so far, estimated in the dense form
+
+		std::size_t total() const { return cache+cache_changes+cached_counters+per_event_counters+replay_windows; }
+	};
+
+	// how the counters are recomputed when events leave the cache or an initiating event leaves the time window
+	enum class replay_engine
+	{
+		incremental, // advances the counters of all events in the window for each replayed event, O(w²) per replay
+		matrix // applies products of the transition matrices of the replayed events, O(w) per replay
+	};
+
 	template <typename counter_type> 
 	class summary_selector
 	{
 		public:
-		summary_selector(std::string_view query, std::size_t summary_size, std::size_t time_window_size, std::size_t time_to_live = std::numeric_limits<std::size_t>::max());
+		summary_selector(std::string_view query, std::size_t summary_size, std::size_t time_window_size, std::size_t time_to_live = std::numeric_limits<std::size_t>::max(), replay_engine replay = replay_engine::incremental);
+
+		// copies the state of a selector using another counter type, e.g. to switch to wider counters
+		template <typename other_counter_type>
+		explicit summary_selector(const summary_selector<other_counter_type>& other);
 
 		template <eviction_strategy<summary_selector> strategy_type>
 		void process_event(const event& new_event, const strategy_type& strategy);
 		void process_event(const event& new_event);
+		// once the cache is full, evicts up to eviction_batch_size events at once, which leaves room for the following ones
+		template <batch_eviction_strategy<summary_selector> strategy_type>
+		void process_event(const event& new_event, const strategy_type& strategy, std::size_t eviction_batch_size);
 
 		void remove_event(std::size_t cache_index);
+		// replays the entries affected by any of the events once, the indices must be sorted and unique
+		void remove_events(std::span<const std::size_t> cache_indices);
 
-		auto cached_events() const { return std::span{cache_.begin(),cache_.end()}; }
+		auto cached_events() const { return std::ranges::subrange{cache_.begin(),cache_.end()}; }
 		const auto& active_window() const { return active_window_; }
 		const auto& total_counts() const { return total_counter_; }
 		const auto& active_counts() const { return active_window_.total_counter; }
+		const auto& detected_counts() const { return total_detected_counter_; }
+
+		// changes to the state counters and positions of cached entries since the last eviction decision, in the order they happened
+		auto cache_changes() const { return std::span{cache_changes_.begin(),cache_changes_.end()}; }
+		// set once there were more changes than cached entries, cache_changes() is empty then
+		bool cache_changes_dropped() const { return cache_changes_dropped_; }
 
 		auto current_time() const { return current_time_; }
 
+		// all zero unless SUSE_PROFILE_PHASES is defined
+		const auto& phases() const { return phases_; }
+
+		// walks the whole cache, so it is meant to be sampled rather than called per event
+		selector_memory memory_usage() const;
+
 		counter_type number_of_contained_complete_matches() const;
 		counter_type number_of_contained_partial_matches() const;
 		
@@ -63,21 +128,26 @@ namespace suse
 		counter_type number_of_partial_matches(const execution_state_counter<counter_type>& counters) const;
 
 		const auto& automaton() const { return automaton_; }
-		auto time_window_size() const { return active_window_.per_event_counters.capacity(); }
+		auto time_window_size() const { return active_window_.per_event_counters.capacity()-1; }
+		auto replay() const { return replay_; }
 
 		private:
 		nfa automaton_;
 		edgelist per_character_edges_;
 		std::size_t time_to_live_;
+		replay_engine replay_;
 
+		// the counters of entries before the active time window rarely change, equal ones share their storage
 		struct cache_entry
 		{
 			event cached_event;
-			execution_state_counter<counter_type> state_counter;
+			shared_counter<counter_type> state_counter;
 
 			friend auto operator<=>(const cache_entry&, const cache_entry&) = default;
 		};
-		std::vector<cache_entry> cache_;
+		tiered_vector<cache_entry> cache_;
+		counter_pool<counter_type> counter_pool_;
+		using cache_range = std::ranges::subrange<typename tiered_vector<cache_entry>::const_iterator>;
 
 		struct window_info
 		{
@@ -93,15 +163,43 @@ namespace suse
 
 		std::size_t current_time_{0};
 
+		std::vector<cache_change> cache_changes_;
+		bool cache_changes_dropped_ = false;
+
+		// the replays are const members
+		mutable phase_profile phases_;
+		mutable std::size_t largest_replay_window_ = 0;
+
+		void note_replay_window(std::size_t counters) const { largest_replay_window_ = std::max(largest_replay_window_,counters); }
+
 		void add_event(const event& new_event);
 
 		void purge_expired();
 
 		void update_window(window_info& window, std::size_t timestamp);
 		void replay_time_window(window_info& window) const;
-		void replay_time_window(window_info& window, std::span<const cache_entry> events) const;
+		void replay_time_window(window_info& window, cache_range events) const;
 
-		void replay_affected_range(std::size_t removed_idx, std::size_t removed_timestamp);
+		std::vector<execution_state_counter<counter_type>> replay_with_matrices(cache_range events, std::size_t first_needed, execution_state_counter<counter_type>& total_counter) const;
+		void apply_following_transitions(cache_range events, std::span<execution_state_counter<counter_type>> counters) const;
+		std::vector<execution_state_counter<counter_type>> continued_runs(cache_range events, execution_state_counter<counter_type>& runs) const;
+		void subtract_expired_runs(window_info& window, execution_state_counter<counter_type> expired_runs) const;
+
+		void record_change(cache_change change);
+		bool shares_window_with_neighbour(std::size_t cache_idx) const;
+		void remove_oldest();
+
+		// the entries between the oldest and the newest removed event or sharing a window with one of them are replayed
+		struct removed_range
+		{
+			std::size_t oldest_timestamp, newest_timestamp;
+		};
+		bool affected_by(const removed_range& removed, std::size_t timestamp) const;
+
+		std::pair<std::size_t,std::size_t> affected_range_start(std::size_t removed_idx, const removed_range& removed) const;
+		void replay_affected_range(std::size_t removed_idx, removed_range removed);
+		void replay_affected_range_with_matrices(std::size_t removed_idx, removed_range removed);
+		execution_state_counter<counter_type> runs_ending_in(std::size_t first_idx, std::size_t last_idx) const;
 
 		auto create_window_info(std::size_t capacity) const;
 		void reset_counters(window_info& window) const;
@@ -111,6 +209,9 @@ namespace suse
 
 		template <typename T>
 		friend bool operator==(const summary_selector<T>& lhs, const summary_selector<T>& rhs);
+
+		template <typename T>
+		friend class summary_selector;
 	};
 }
 
@@ -1,9 +1,16 @@
+#include "checked_counter.hpp"
+#include "eviction_strategies.hpp"
 #include "summary_selector.hpp"
 
 #include <boost/multiprecision/cpp_int.hpp>
 
 #include <doctest/doctest.h>
 
+#include <algorithm>
+#include <random>
+#include <string>
+#include <vector>
+
 TEST_SUITE("suse::summary_selector")
 {
 	TEST_CASE("simple, irrelevant time window")
@@ -230,4 +237,368 @@ TEST_SUITE("suse::summary_selector")
 
 		REQUIRE(selector==correct_selector);
 	}
+	
+	TEST_CASE("ttl - bursts")
+	{
+		using int_type = boost::multiprecision::uint128_t;
+		const std::string_view input = "BBBABBCBCBBACABABCCCBBACBABBACABBBCDCBCCBAABBABACBADBDCBCBAABBACDABAACBACBADCBCDBBDBBACBABAACBDCABBBABBBACCBCBBCDAACCBBBBAABADACBABCAACAABBBACBBDACBBBCBACACBACBCBBDAABBBABBCDCACABACBABBBBBCCBBACACBBAAACCBBAAABBAAABCACCABCABABABCACBBABBCBABCBCCBCCCAACBAABCCDBDCCBAABCCABBCBBBBBCCBCBABCBBCABCC";
+		const std::size_t time_to_live = 40;
+
+		suse::summary_selector<int_type> correct_selector("A(B*C)*D",input.size(),25);
+		suse::summary_selector<int_type> selector("A(B*C)*D",input.size(),25,time_to_live);
+
+		// bursts of 30 events one time unit apart, separated by gaps that let most of the previous burst expire at once
+		for(std::size_t idx=0, timestamp=0; auto c: input)
+		{
+			CAPTURE(idx);
+
+			timestamp+=(idx++%30==0)?35:1;
+			while(!correct_selector.cached_events().empty() && timestamp-correct_selector.cached_events().front().cached_event.timestamp>time_to_live)
+				correct_selector.remove_event(0);
+
+			correct_selector.process_event({c,timestamp});
+			selector.process_event({c,timestamp});
+
+			REQUIRE(selector==correct_selector);
+		}
+	}
+	
+	TEST_CASE("widening the counters")
+	{
+		using narrow_type = suse::checked_uint<std::uint64_t>;
+		using wide_type = boost::multiprecision::uint128_t;
+		const std::string_view input = "aabbcbcbcacbccbabcdeacbdeabdadedbcbcdacdeacbdacaaacbcabcdbcacbcdacbadcbacdbcacbdabdacbdacbcbcecbacbbcbbcbbcacbdcabcaaaaabddccbacbcadcbbedacccadcbcbcdabdbacdabdacbcbcbcbabcecbadcbecbacbdcbacbcbabdabaadcadcaddcdaaaaabceaaabaeeadbdceadaadcdeaaaacdedcadeaedabcedabaaebdedaaddccdeaceabdebdeadaaabeadabdadbcadcdabeadeadcbede";
+		const std::size_t widen_at = 120;
+
+		suse::summary_selector<wide_type> correct_selector("a*b(c|d)*e",input.size(),53);
+		suse::summary_selector<narrow_type> narrow_selector("a*b(c|d)*e",input.size(),53);
+
+		for(std::size_t idx=0;idx<widen_at;++idx)
+		{
+			correct_selector.process_event({input[idx],idx});
+			narrow_selector.process_event({input[idx],idx});
+		}
+
+		suse::summary_selector<wide_type> selector{narrow_selector};
+		REQUIRE(selector==correct_selector);
+
+		for(std::size_t idx=widen_at;idx<input.size();++idx)
+		{
+			correct_selector.process_event({input[idx],idx});
+			selector.process_event({input[idx],idx});
+		}
+
+		REQUIRE(selector==correct_selector);
+		CHECK(selector.number_of_contained_complete_matches()==correct_selector.number_of_contained_complete_matches());
+	}
+
+	TEST_CASE("matrix replay")
+	{
+		using int_type = suse::checked_uint<std::uint64_t>;
+		const std::string_view input = "BBBABBCBCBBACABABCCCBBACBABBACABBBCDCBCCBAABBABACBADBDCBCBAABBACDABAACBACBADCBCDBBDBBACBABAACBDCABBBABBBACCBCBBCDAACCBBBBAABADACBABCAACAABBBACBBDACBBBCBACACBACBCBBDAABBBABBCDCACABACBABBBBBCCBBACACBBAAACCBBAAABBAAABCACCABCABABABCACBBABBCBABCBCCBCCCAACBAABCCDBDCCBAABCCABBCBBBBBCCBCBABCBBCABCCBABAAABABBBBBACBBBBBCABBCBBACCCAABBABCDCBADBAABAABBBBCDBBACCBCBBCBABCDBBBBBCCAAACCBBCBCBCCAABADBABAACBBDDACBBABCABABABADACCBBBBABBBBBBCBBCBACABDABACACDCBBABBCBDBBBBBBBBDCABAACBCBBBCABCBBACCCBBCCBCBABAAABADBBCBABABBCCBABBBABCACCBBACBBDBBCABCCADBCCBBCBBACCBCABAAACCABAACBBBBDCBDBCACBBBBAACC";
+
+		const auto check_replay = [&](std::size_t summary_size, std::size_t time_window_size, std::size_t time_to_live, const auto& strategy)
+		{
+			suse::summary_selector<int_type> incremental_selector("A(B*C)*D",summary_size,time_window_size,time_to_live);
+			suse::summary_selector<int_type> matrix_selector("A(B*C)*D",summary_size,time_window_size,time_to_live,suse::replay_engine::matrix);
+			const auto incremental_strategy = strategy, matrix_strategy = strategy;
+
+			for(std::size_t idx=0; auto c: input)
+			{
+				CAPTURE(idx);
+
+				incremental_selector.process_event({c,idx},incremental_strategy);
+				matrix_selector.process_event({c,idx},matrix_strategy);
+				++idx;
+
+				REQUIRE(matrix_selector==incremental_selector);
+			}
+
+			for(std::size_t i=0;i<matrix_selector.cached_events().size();++i)
+			{
+				incremental_selector.remove_event(i);
+				matrix_selector.remove_event(i);
+			}
+
+			REQUIRE(matrix_selector==incremental_selector);
+		};
+
+		SUBCASE("fifo") { check_replay(100,30,std::numeric_limits<std::size_t>::max(),suse::eviction_strategies::fifo); }
+		SUBCASE("random") { check_replay(80,50,std::numeric_limits<std::size_t>::max(),suse::eviction_strategies::seeded_pseudorandom{42}); }
+		SUBCASE("ttl") { check_replay(150,40,120,suse::eviction_strategies::seeded_pseudorandom{7}); }
+		SUBCASE("expiry only") { check_replay(input.size(),30,std::numeric_limits<std::size_t>::max(),suse::eviction_strategies::fifo); }
+	}
+
+	TEST_CASE("long query")
+	{
+		using int_type = boost::multiprecision::uint128_t;
+		const std::string_view query = "(ab|cd)*(ef|gh)(ij|kl)*(mn|op)(qr|st)*(uv|wx)";
+
+		std::mt19937 random_gen{42};
+		std::uniform_int_distribution<int> type_dist(0,23);
+		std::string input;
+		for(std::size_t i=0;i<300;++i)
+			input.push_back(static_cast<char>('a'+type_dist(random_gen)));
+
+		for(const auto replay: {suse::replay_engine::incremental,suse::replay_engine::matrix})
+		{
+			for(const std::size_t to_delete: {0,57,150,299})
+			{
+				CAPTURE(to_delete);
+
+				suse::summary_selector<int_type> correct_selector(query,input.size(),40,std::numeric_limits<std::size_t>::max(),replay);
+				suse::summary_selector<int_type> selector(query,input.size(),40,std::numeric_limits<std::size_t>::max(),replay);
+
+				for(std::size_t idx=0; auto c: input)
+				{
+					if(idx!=to_delete)
+						correct_selector.process_event({c,idx});
+					selector.process_event({c,idx++});
+				}
+				selector.remove_event(to_delete);
+
+				correct_selector.process_event({'x',input.size()+10});
+				selector.process_event({'x',input.size()+10});
+
+				REQUIRE(selector==correct_selector);
+				CHECK(std::ranges::any_of(selector.cached_events(),[](const auto& entry){ return entry.state_counter->is_sparse(); }));
+			}
+		}
+	}
+
+	TEST_CASE("remove several")
+	{
+		using int_type = boost::multiprecision::uint128_t;
+
+		std::mt19937 random_gen{3};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::string input;
+		for(std::size_t i=0;i<300;++i)
+			input.push_back("ABCD"[type_dist(random_gen)]);
+
+		for(const auto replay: {suse::replay_engine::incremental,suse::replay_engine::matrix})
+		{
+			for(const std::vector<std::size_t> to_delete: {std::vector<std::size_t>{3,4,5},{10,30,31,57},{0,1,7,20},{50,299},{280,285,290,299},{0,1,2}})
+			{
+				CAPTURE(to_delete);
+
+				suse::summary_selector<int_type> correct_selector("A(B*C)*D",input.size(),25,std::numeric_limits<std::size_t>::max(),replay);
+				suse::summary_selector<int_type> selector("A(B*C)*D",input.size(),25,std::numeric_limits<std::size_t>::max(),replay);
+
+				for(std::size_t idx=0; auto c: input)
+				{
+					if(!std::ranges::binary_search(to_delete,idx))
+						correct_selector.process_event({c,idx});
+					selector.process_event({c,idx++});
+				}
+				selector.remove_events(to_delete);
+
+				correct_selector.process_event({'x',input.size()+10});
+				selector.process_event({'x',input.size()+10});
+
+				REQUIRE(selector==correct_selector);
+			}
+		}
+	}
+
+	TEST_CASE("remove several scattered")
+	{
+		using int_type = suse::checked_uint<std::uint64_t>;
+
+		std::mt19937 random_gen{11};
+		std::uniform_int_distribution<int> type_dist(0,3);
+		std::vector<suse::event> input;
+		for(std::size_t i=0;i<400;++i)
+			input.push_back({"ABCD"[type_dist(random_gen)],i});
+
+		for(const auto replay: {suse::replay_engine::incremental,suse::replay_engine::matrix})
+		{
+			// the removed events are more than a window apart, so some entries only share one with a newer removed event
+			for(const std::vector<std::size_t> to_delete: {std::vector<std::size_t>{3,12},{5,20,21,40},{8,15,16,29,33}})
+			{
+				CAPTURE(to_delete);
+
+				const std::size_t time_window_size = 5;
+				suse::summary_selector<int_type> correct_selector("A(B*C)*D",50,time_window_size,std::numeric_limits<std::size_t>::max(),replay);
+				suse::summary_selector<int_type> selector("A(B*C)*D",50,time_window_size,std::numeric_limits<std::size_t>::max(),replay);
+
+				for(std::size_t i=0;i<50;++i)
+				{
+					if(!std::ranges::binary_search(to_delete,i))
+						correct_selector.process_event(input[i]);
+					selector.process_event(input[i]);
+				}
+				selector.remove_events(to_delete);
+
+				correct_selector.process_event({'x',60});
+				selector.process_event({'x',60});
+				REQUIRE(selector==correct_selector);
+			}
+
+			// random batches hit victims anywhere in the cache, the counters are compared to a selector built from the cached events after every event
+			for(const std::size_t eviction_batch_size: {2,4})
+			{
+				CAPTURE(eviction_batch_size);
+
+				const std::size_t summary_size = 20, time_window_size = 5;
+				const suse::eviction_strategies::seeded_pseudorandom strategy{1};
+				suse::summary_selector<int_type> selector("A(B*C)*D",summary_size,time_window_size,std::numeric_limits<std::size_t>::max(),replay);
+				for(std::size_t i=0;i<input.size();++i)
+				{
+					selector.process_event(input[i],strategy,eviction_batch_size);
+
+					suse::summary_selector<int_type> correct_selector("A(B*C)*D",summary_size,time_window_size,std::numeric_limits<std::size_t>::max(),replay);
+					for(const auto& entry: selector.cached_events())
+						correct_selector.process_event(entry.cached_event);
+
+					REQUIRE(selector==correct_selector);
+				}
+			}
+		}
+	}
+
+	TEST_CASE("fifo eviction")
+	{
+		using int_type = suse::checked_uint<std::uint64_t>;
+
+		// gaps in the timestamps leave events sharing no window with the others, the 'x' events are part of no run
+		std::mt19937 random_gen{7};
+		std::uniform_int_distribution<int> type_dist(0,4), gap_dist(0,40);
+		std::vector<suse::event> input;
+		for(std::size_t i=0, timestamp=0;i<600;++i)
+		{
+			timestamp+=gap_dist(random_gen)<38?1:25;
+			input.push_back({"ABCDx"[type_dist(random_gen)],timestamp});
+		}
+
+		for(const auto replay: {suse::replay_engine::incremental,suse::replay_engine::matrix})
+		{
+			for(const std::size_t time_window_size: {5,20,60})
+			{
+				CAPTURE(time_window_size);
+
+				const std::size_t summary_size = 40;
+				suse::summary_selector<int_type> selector("A(B*C)*D",summary_size,time_window_size,std::numeric_limits<std::size_t>::max(),replay);
+				for(std::size_t i=0;i<input.size();++i)
+				{
+					selector.process_event(input[i],suse::eviction_strategies::fifo);
+					if(i%50!=49)
+						continue;
+
+					suse::summary_selector<int_type> correct_selector("A(B*C)*D",summary_size,time_window_size,std::numeric_limits<std::size_t>::max(),replay);
+					for(auto j=i+1-summary_size;j<=i;++j)
+						correct_selector.process_event(input[j]);
+
+					REQUIRE(selector==correct_selector);
+				}
+			}
+		}
+	}
+
+	TEST_CASE("phase profile")
+	{
+		using int_type = suse::checked_uint<std::uint64_t>;
+
+		suse::summary_selector<int_type> selector("A(B*C)*D",20,8);
+		for(std::size_t i=0;i<200;++i)
+			selector.process_event({"ABCD"[i%4],i},suse::eviction_strategies::fifo);
+
+		const auto& phases = selector.phases();
+		if constexpr(suse::phase_profiling)
+		{
+			REQUIRE(phases[suse::phase::update_window].calls==200);
+			REQUIRE(phases[suse::phase::select].calls==180);
+			REQUIRE(phases[suse::phase::evict].calls==180);
+			REQUIRE(phases[suse::phase::add_event].calls==200);
+			REQUIRE(phases[suse::phase::evict].replays>0);
+			REQUIRE(phases[suse::phase::evict].replayed_events>=phases[suse::phase::evict].replays);
+			REQUIRE(phases[suse::phase::add_event].replays==0);
+		}
+		else
+		{
+			for(std::size_t idx=0;idx<suse::phase_names.size();++idx)
+			{
+				const auto& totals = phases[static_cast<suse::phase>(idx)];
+				REQUIRE(totals.calls==0);
+				REQUIRE(totals.nanoseconds==0);
+				REQUIRE(totals.replayed_events==0);
+			}
+		}
+	}
+
+	TEST_CASE("memory usage")
+	{
+		using int_type = suse::checked_uint<std::uint64_t>;
+
+		suse::summary_selector<int_type> small("A(B*C)*D",20,8), large("A(B*C)*D",200,8);
+		const auto empty = large.memory_usage();
+		REQUIRE(empty.cached_counters==0);
+		REQUIRE(empty.replay_windows==0);
+		REQUIRE(empty.per_event_counters>=8*sizeof(suse::execution_state_counter<int_type>));
+
+		std::mt19937 random_gen{3};
+		std::uniform_int_distribution<int> type_dist(0,4);
+		for(std::size_t i=0;i<400;++i)
+		{
+			const suse::event e{"ABCDx"[type_dist(random_gen)],i};
+			small.process_event(e,suse::eviction_strategies::fifo);
+			large.process_event(e,suse::eviction_strategies::fifo);
+		}
+
+		const auto small_usage = small.memory_usage(), large_usage = large.memory_usage();
+		REQUIRE(small_usage.cached_counters>0);
+		REQUIRE(small_usage.cached_counters<large_usage.cached_counters);
+		REQUIRE(small_usage.per_event_counters==large_usage.per_event_counters);
+		REQUIRE(small_usage.replay_windows>0);
+		REQUIRE(small_usage.cache_changes>0);
+		REQUIRE(small_usage.cache_changes<=small.cached_events().size()*sizeof(suse::cache_change)*2);
+		REQUIRE(small_usage.total()==small_usage.cache+small_usage.cache_changes+small_usage.cached_counters+small_usage.per_event_counters+small_usage.replay_windows);
+
+		// the counters of the 'x' events are zero and shared, so they are counted once
+		const auto zero_counters = [](const auto& selector)
+		{
+			std::size_t zero_counters = 0;
+			for(const auto& entry: selector.cached_events())
+				zero_counters+=entry.state_counter->is_zero();
+			return zero_counters;
+		};
+		REQUIRE(zero_counters(large)>1);
+		REQUIRE(large_usage.cached_counters<large.cached_events().size()*(sizeof(suse::execution_state_counter<int_type>)+large.automaton().number_of_states()*sizeof(int_type)));
+	}
+
+	TEST_CASE("shared counters")
+	{
+		using int_type = boost::multiprecision::uint128_t;
+		const std::string_view input = "xaxxbxxcxdxxxaxbxxxdxxaxxcxxd";
+
+		suse::summary_selector<int_type> selector("a(b|c)*d",input.size(),3);
+		for(std::size_t idx=0; auto c: input)
+			selector.process_event({c,idx++});
+
+		// the events not extending any run all have zero counters
+		const auto& cached = selector.cached_events();
+		const auto zero_counters = std::ranges::count_if(cached,[](const auto& entry){ return entry.state_counter->is_zero(); });
+		REQUIRE(zero_counters>1);
+		CHECK(std::ranges::all_of(cached,[&](const auto& entry){ return !entry.state_counter->is_zero() || &*entry.state_counter==&*cached[0].state_counter; }));
+	}
+
+	TEST_CASE("cache changes are bounded")
+	{
+		using int_type = suse::checked_uint<std::uint64_t>;
+
+		// the cache stays below its capacity, so there is no eviction decision clearing the changes
+		suse::summary_selector<int_type> selector("A(B*C)*D",100,10,30);
+		for(std::size_t i=0;i<1000;++i)
+		{
+			selector.process_event({"ABCD"[i%4],i});
+			REQUIRE(selector.cache_changes().size()<=selector.cached_events().size());
+		}
+		CHECK(selector.cache_changes_dropped());
+
+		suse::summary_selector<int_type> full_selector("A(B*C)*D",10,10,std::numeric_limits<std::size_t>::max());
+		for(std::size_t i=0;i<20;++i)
+			full_selector.process_event({"ABCD"[i%4],i},suse::eviction_strategies::fifo);
+		CHECK(!full_selector.cache_changes_dropped());
+		CHECK(!full_selector.cache_changes().empty());
+	}
 }
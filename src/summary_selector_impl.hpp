@@ -6,22 +6,48 @@
 
 #include "regex.hpp"
 
+#include <algorithm>
 #include <cassert>
+#include <deque>
+#include <unordered_set>
 
 namespace suse
 {
 
 template <typename counter_type>
-summary_selector<counter_type>::summary_selector(std::string_view query, std::size_t summary_size, std::size_t time_window_size, std::size_t time_to_live):
+summary_selector<counter_type>::summary_selector(std::string_view query, std::size_t summary_size, std::size_t time_window_size, std::size_t time_to_live, replay_engine replay):
 	automaton_{parse_regex(query)},
 	per_character_edges_{compute_edges_per_character(automaton_)},
 	time_to_live_{time_to_live},
-	cache_{},
+	replay_{replay},
+	cache_{summary_size},
 	total_counter_{automaton_.number_of_states()},
 	total_detected_counter_{automaton_.number_of_states()},
 	active_window_{create_window_info(time_window_size)}
+{}
+
+template <typename counter_type>
+template <typename other_counter_type>
+summary_selector<counter_type>::summary_selector(const summary_selector<other_counter_type>& other):
+	automaton_{other.automaton_},
+	per_character_edges_{other.per_character_edges_},
+	time_to_live_{other.time_to_live_},
+	replay_{other.replay_},
+	cache_{other.cache_.capacity()},
+	total_counter_{other.total_counter_},
+	total_detected_counter_{other.total_detected_counter_},
+	active_window_{create_window_info(other.time_window_size())},
+	current_time_{other.current_time_},
+	phases_{other.phases_},
+	largest_replay_window_{other.largest_replay_window_}
 {
-	cache_.reserve(summary_size);
+	for(const auto& entry: other.cache_)
+		cache_.push_back({entry.cached_event,counter_pool_.intern(execution_state_counter<counter_type>{*entry.state_counter})});
+
+	active_window_.total_counter = execution_state_counter<counter_type>{other.active_window_.total_counter};
+	active_window_.start_idx = other.active_window_.start_idx;
+	for(std::size_t i=0;i<other.active_window_.per_event_counters.size();++i)
+		active_window_.per_event_counters.push_back(execution_state_counter<counter_type>{other.active_window_.per_event_counters[i]});
 }
 
 template <typename counter_type>
@@ -48,6 +74,33 @@ counter_type summary_selector<counter_type>::number_of_detected_partial_matches(
 	return number_of_partial_matches(total_detected_counter_);
 }
 
+template <typename counter_type>
+selector_memory summary_selector<counter_type>::memory_usage() const
+{
+	using counter_t = execution_state_counter<counter_type>;
+
+	selector_memory memory;
+	memory.cache = cache_.storage_bytes()+counter_pool_.index_bytes();
+	memory.cache_changes = cache_changes_.capacity()*sizeof(cache_change);
+
+	// make_shared places the counter next to the reference counts and the vtable pointer of its control block
+	constexpr auto control_block_bytes = sizeof(void*)+2*sizeof(int);
+	std::unordered_set<const counter_t*> counted;
+	for(const auto& entry: cache_)
+	{
+		if(counted.insert(&*entry.state_counter).second)
+			memory.cached_counters+=control_block_bytes+sizeof(counter_t)+entry.state_counter->heap_bytes();
+	}
+
+	// the slots past the end keep their storage for reuse, the indices wrap around to them
+	const auto& per_event_counters = active_window_.per_event_counters;
+	for(std::size_t i=0;i<per_event_counters.capacity();++i)
+		memory.per_event_counters+=sizeof(counter_t)+per_event_counters[i].heap_bytes();
+
+	memory.replay_windows = largest_replay_window_*(sizeof(counter_t)+automaton_.number_of_states()*sizeof(counter_type));
+	return memory;
+}
+
 template <typename counter_type>
 counter_type summary_selector<counter_type>::number_of_complete_matches(const execution_state_counter<counter_type>& counter) const
 {
@@ -83,8 +136,14 @@ template <eviction_strategy<summary_selector<counter_type>> strategy_type>
 void summary_selector<counter_type>::process_event(const event& new_event, const strategy_type& strategy)
 {
 	current_time_ = new_event.timestamp;
-	update_window(active_window_,new_event.timestamp);
-	purge_expired();
+	{
+		const auto timed = phases_.enter(phase::update_window);
+		update_window(active_window_,new_event.timestamp);
+	}
+	{
+		const auto timed = phases_.enter(phase::purge_expired);
+		purge_expired();
+	}
 
 	const auto select_idx_to_evict = [&]() -> std::optional<std::size_t>
 	{
@@ -96,12 +155,61 @@ void summary_selector<counter_type>::process_event(const event& new_event, const
 
 	if(cache_.size()==cache_.capacity())
 	{
-		if(auto to_remove = select_idx_to_evict(); to_remove)
+		const auto to_remove = [&]
+		{
+			const auto timed = phases_.enter(phase::select);
+			return select_idx_to_evict();
+		}();
+		cache_changes_.clear();
+		cache_changes_dropped_ = false;
+
+		if(to_remove)
+		{
+			const auto timed = phases_.enter(phase::evict);
 			remove_event(*to_remove);
+		}
 	}
 
 	if(cache_.size()<cache_.capacity())
+	{
+		const auto timed = phases_.enter(phase::add_event);
 		add_event(new_event);
+	}
+}
+
+template <typename counter_type>
+template <batch_eviction_strategy<summary_selector<counter_type>> strategy_type>
+void summary_selector<counter_type>::process_event(const event& new_event, const strategy_type& strategy, std::size_t eviction_batch_size)
+{
+	current_time_ = new_event.timestamp;
+	{
+		const auto timed = phases_.enter(phase::update_window);
+		update_window(active_window_,new_event.timestamp);
+	}
+	{
+		const auto timed = phases_.enter(phase::purge_expired);
+		purge_expired();
+	}
+
+	if(cache_.size()==cache_.capacity())
+	{
+		const auto to_remove = [&]
+		{
+			const auto timed = phases_.enter(phase::select);
+			return strategy.select(*this,new_event,eviction_batch_size);
+		}();
+		cache_changes_.clear();
+		cache_changes_dropped_ = false;
+
+		const auto timed = phases_.enter(phase::evict);
+		remove_events(to_remove);
+	}
+
+	if(cache_.size()<cache_.capacity())
+	{
+		const auto timed = phases_.enter(phase::add_event);
+		add_event(new_event);
+	}
 }
 
 template <typename counter_type>
@@ -114,13 +222,23 @@ template <typename counter_type>
 void summary_selector<counter_type>::remove_event(std::size_t cache_index)
 {
 	assert(cache_index<cache_.size());
+
+	const auto in_active_window = cache_index>=active_window_.start_idx;
+	// no other counter contains runs through an event that is part of none or shares no time window with another one
+	const auto independent = cache_[cache_index].state_counter->is_zero() || (!in_active_window && !shares_window_with_neighbour(cache_index));
+	if(cache_index==0 && !independent)
+	{
+		remove_oldest();
+		return;
+	}
 	
-	total_counter_-=cache_[cache_index].state_counter;
+	total_counter_-=*cache_[cache_index].state_counter;
 	const auto removed_timestamp = timestamp_at(cache_index);
-	if(cache_index<active_window_.start_idx)
+	if(!in_active_window)
 		--active_window_.start_idx;
 
-	cache_.erase(cache_.begin()+cache_index);
+	cache_.erase(cache_index);
+	record_change({cache_change::kind::erased,cache_index,cache_index+1});
 
 	if(cache_.empty())
 	{
@@ -129,42 +247,231 @@ void summary_selector<counter_type>::remove_event(std::size_t cache_index)
 		return;
 	}
 
-	replay_affected_range(cache_index, removed_timestamp);
+	if(independent)
+	{
+		if(in_active_window)
+			active_window_.per_event_counters.erase(cache_index-active_window_.start_idx);
+		return;
+	}
+
+	replay_affected_range(cache_index,{removed_timestamp,removed_timestamp});
 	if(in_shared_window(current_time_,removed_timestamp))
-		replay_time_window(active_window_,std::span{cache_.begin()+active_window_.start_idx,cache_.end()});
+		replay_time_window(active_window_,cache_range{cache_.begin()+active_window_.start_idx,cache_.end()});
+}
+
+template <typename counter_type>
+void summary_selector<counter_type>::remove_events(std::span<const std::size_t> cache_indices)
+{
+	assert(std::ranges::is_sorted(cache_indices) && std::ranges::adjacent_find(cache_indices)==cache_indices.end());
+
+	// the oldest events leave without a replay
+	std::size_t removed_oldest = 0;
+	for(;removed_oldest<cache_indices.size() && cache_indices[removed_oldest]==removed_oldest;++removed_oldest)
+		remove_event(0);
+
+	cache_indices = cache_indices.subspan(removed_oldest);
+	if(cache_indices.size()<=1)
+	{
+		if(!cache_indices.empty())
+			remove_event(cache_indices.front()-removed_oldest);
+		return;
+	}
+
+	/*
+		A run may contain several of the removed events, so their counters do not add up to the runs the total loses.
+		Every such run ends between the first removed event and the last entry sharing a window with the last one,
+		so the total loses the difference between the runs ending there before and after the removal.
+	*/
+	const auto first_idx = cache_indices.front()-removed_oldest, last_idx = cache_indices.back()-removed_oldest;
+	const removed_range removed{timestamp_at(first_idx),timestamp_at(last_idx)};
+	auto affected_end = last_idx+1;
+	while(affected_end<cache_.size() && in_shared_window(removed.newest_timestamp,timestamp_at(affected_end)))
+		++affected_end;
+
+	total_counter_-=runs_ending_in(first_idx,affected_end);
+
+	const auto in_active_window = last_idx>=active_window_.start_idx;
+	for(auto it=cache_indices.rbegin();it!=cache_indices.rend();++it)
+	{
+		const auto cache_index = *it-removed_oldest;
+		if(cache_index<active_window_.start_idx)
+			--active_window_.start_idx;
+
+		cache_.erase(cache_index);
+		record_change({cache_change::kind::erased,cache_index,cache_index+1});
+	}
+
+	if(cache_.empty())
+	{
+		active_window_.start_idx = 0;
+		reset_counters(active_window_);
+		return;
+	}
+
+	replay_affected_range(first_idx,removed);
+	total_counter_+=runs_ending_in(first_idx,affected_end-cache_indices.size());
+	if(in_active_window)
+		replay_time_window(active_window_,cache_range{cache_.begin()+active_window_.start_idx,cache_.end()});
 }
 
 template <typename counter_type>
-void summary_selector<counter_type>::replay_affected_range(std::size_t removed_idx, std::size_t removed_timestamp)
+auto summary_selector<counter_type>::runs_ending_in(std::size_t first_idx, std::size_t last_idx) const -> execution_state_counter<counter_type>
 {
+	// only the total of the window is needed, so it is replayed when an initiator leaves instead of tracking every event
+	auto ended_runs = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	if(first_idx>=last_idx)
+		return ended_runs;
+
+	const auto& initial_state = automaton_.states()[automaton_.initial_state_id()];
+	auto window_start_idx = first_idx;
+	while(window_start_idx>0 && in_shared_window(timestamp_at(first_idx),timestamp_at(window_start_idx-1)))
+		--window_start_idx;
+
+	auto window_total_counter = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	replay_with_matrices(cache_range{cache_.begin()+window_start_idx,cache_.begin()+first_idx},first_idx-window_start_idx,window_total_counter);
+
+	phases_.count_replay(last_idx-first_idx);
+	auto global_counter_change = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	for(auto idx=first_idx;idx<last_idx;++idx)
+	{
+		bool removed_initiator = false;
+		for(;!in_shared_window(timestamp_at(idx),timestamp_at(window_start_idx));++window_start_idx)
+		{
+			const auto type = cache_[window_start_idx].cached_event.type;
+			removed_initiator |= initial_state.transitions.contains(type) || initial_state.transitions.contains(nfa::wildcard_symbol);
+		}
+
+		if(removed_initiator)
+			replay_with_matrices(cache_range{cache_.begin()+window_start_idx,cache_.begin()+idx},idx-window_start_idx,window_total_counter);
+
+		advance(window_total_counter,per_character_edges_,cache_[idx].cached_event.type,global_counter_change);
+		window_total_counter+=global_counter_change;
+		ended_runs+=global_counter_change;
+	}
+
+	return ended_runs;
+}
+
+template <typename counter_type>
+void summary_selector<counter_type>::record_change(cache_change change)
+{
+	// without evictions the log would grow with every event, beyond the cache size rebuilding an index is cheaper than updating it
+	if(cache_changes_dropped_)
+		return;
+
+	if(cache_changes_.size()>=cache_.size())
+	{
+		cache_changes_.clear();
+		cache_changes_dropped_ = true;
+		return;
+	}
+
+	cache_changes_.push_back(change);
+}
+
+template <typename counter_type>
+bool summary_selector<counter_type>::shares_window_with_neighbour(std::size_t cache_idx) const
+{
+	// the cache is ordered by time, so the closest events are the neighbours
+	const auto timestamp = timestamp_at(cache_idx);
+	return (cache_idx>0 && in_shared_window(timestamp_at(cache_idx-1),timestamp))
+		|| (cache_idx+1<cache_.size() && in_shared_window(timestamp,timestamp_at(cache_idx+1)));
+}
+
+template <typename counter_type>
+void summary_selector<counter_type>::remove_oldest()
+{
+	/*
+		Every run through the oldest event starts with it. Instead of replaying the events sharing a window with it,
+		the runs starting with it are continued over them and each counter loses the ones passing its event.
+	*/
+	auto removed_runs = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	removed_runs[automaton_.initial_state_id()] = 1;
+	removed_runs = advance(removed_runs,per_character_edges_,cache_[0].cached_event.type);
+
+	std::size_t affected_end = 1;
+	while(affected_end<cache_.size() && in_shared_window(timestamp_at(0),timestamp_at(affected_end)))
+		++affected_end;
+
+	const auto lost_runs = continued_runs(cache_range{cache_.begin()+1,cache_.begin()+affected_end},removed_runs);
+	for(std::size_t i=0;i<lost_runs.size();++i)
+	{
+		if(!lost_runs[i].is_zero())
+			cache_[i+1].state_counter.modify()-=lost_runs[i];
+	}
+
+	// the whole window shares one with its oldest event, so its counters lose the same runs
+	if(active_window_.start_idx==0)
+	{
+		active_window_.total_counter-=removed_runs;
+		active_window_.per_event_counters.pop_front();
+		for(std::size_t i=0;i<active_window_.per_event_counters.size();++i)
+			active_window_.per_event_counters[i]-=lost_runs[i];
+	}
+	else
+		--active_window_.start_idx;
+
+	total_counter_-=*cache_[0].state_counter;
+	cache_.erase(0);
+	record_change({cache_change::kind::erased,0,1});
+	if(affected_end>1)
+		record_change({cache_change::kind::modified,0,affected_end-1});
+}
+
+template <typename counter_type>
+std::pair<std::size_t,std::size_t> summary_selector<counter_type>::affected_range_start(std::size_t removed_idx, const removed_range& removed) const
+{
+	// the first entry at most one window before the oldest removed event, which might only share a window with a newer one
 	auto replay_start_idx = removed_idx<time_window_size()?0:removed_idx-time_window_size();
-	while(replay_start_idx<cache_.size() && !in_shared_window(removed_timestamp,timestamp_at(replay_start_idx)))
+	while(replay_start_idx<cache_.size() && timestamp_at(replay_start_idx)<removed.oldest_timestamp && !in_shared_window(removed.oldest_timestamp,timestamp_at(replay_start_idx)))
 		++replay_start_idx;
 
+	if(replay_start_idx==cache_.size() || !affected_by(removed,timestamp_at(replay_start_idx)))
+		return {cache_.size(),cache_.size()};
+
 	const auto replay_start_timestamp = timestamp_at(replay_start_idx);
 
 	auto time_window_replay_start_idx = replay_start_idx<time_window_size()?0:replay_start_idx-time_window_size();
 	while(time_window_replay_start_idx<cache_.size() && !in_shared_window(replay_start_timestamp,timestamp_at(time_window_replay_start_idx)))
 		++time_window_replay_start_idx;
 
+	return {replay_start_idx,time_window_replay_start_idx};
+}
+
+template <typename counter_type>
+void summary_selector<counter_type>::replay_affected_range(std::size_t removed_idx, removed_range removed)
+{
+	if(replay_==replay_engine::matrix)
+	{
+		replay_affected_range_with_matrices(removed_idx,removed);
+		return;
+	}
+
+	const auto [replay_start_idx,time_window_replay_start_idx] = affected_range_start(removed_idx,removed);
+
 	auto replay_window = create_window_info(time_window_size());
 	replay_window.start_idx = time_window_replay_start_idx;
-	const auto relevant_prefix = std::span{cache_.begin()+replay_window.start_idx,cache_.begin()+replay_start_idx};
+	note_replay_window(replay_window.per_event_counters.capacity()+1);
+	const auto relevant_prefix = cache_range{cache_.begin()+replay_window.start_idx,cache_.begin()+replay_start_idx};
 	replay_time_window(replay_window,relevant_prefix);
 
 	const auto is_relevant = [&](std::size_t idx)
 	{
-		const auto affected = in_shared_window(removed_timestamp,timestamp_at(idx));
-		const auto in_affecting_window = in_shared_window(removed_timestamp,timestamp_at(replay_window.start_idx));
+		const auto affected = affected_by(removed,timestamp_at(idx));
+		const auto in_affecting_window = affected_by(removed,timestamp_at(replay_window.start_idx));
 
 		return affected || in_affecting_window;
 	};
 	
-	for(std::size_t idx = replay_start_idx; idx<cache_.size() && is_relevant(idx); ++idx)
+	auto global_counter_change = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	auto local_change = execution_state_counter<counter_type>{automaton_.number_of_states()};
+
+	std::size_t idx = replay_start_idx;
+	for(; idx<cache_.size() && is_relevant(idx); ++idx)
 	{
 		update_window(replay_window,timestamp_at(idx));
 		
-		auto global_counter_change = advance(replay_window.total_counter,per_character_edges_,cache_[idx].cached_event.type);
+		advance(replay_window.total_counter,per_character_edges_,cache_[idx].cached_event.type,global_counter_change);
 		replay_window.total_counter+=global_counter_change;
 
 		const auto active_window_size = idx - replay_window.start_idx;
@@ -172,16 +479,126 @@ void summary_selector<counter_type>::replay_affected_range(std::size_t removed_i
 		{
 			const auto cache_idx = replay_window.start_idx + i;
 			
-			const auto local_change = advance(replay_window.per_event_counters[i],per_character_edges_,cache_[idx].cached_event.type);
-			if(cache_idx>=replay_start_idx && in_shared_window(removed_timestamp,timestamp_at(cache_idx)))
-				cache_[cache_idx].state_counter+=local_change;
+			advance(replay_window.per_event_counters[i],per_character_edges_,cache_[idx].cached_event.type,local_change);
+			if(local_change.is_zero())
+				continue;
+
+			if(cache_idx>=replay_start_idx && affected_by(removed,timestamp_at(cache_idx)))
+				cache_[cache_idx].state_counter.modify()+=local_change;
 			replay_window.per_event_counters[i]+=local_change;
 		}
 		
 		replay_window.per_event_counters.push_back(global_counter_change);
-		if(in_shared_window(removed_timestamp,timestamp_at(idx)))
-			cache_[idx].state_counter = std::move(global_counter_change);
+		if(affected_by(removed,timestamp_at(idx)))
+			cache_[idx].state_counter = counter_pool_.intern(global_counter_change);
 	}
+
+	phases_.count_replay(idx-replay_start_idx);
+	if(idx>replay_start_idx)
+		record_change({cache_change::kind::modified,replay_start_idx,idx});
+}
+
+template <typename counter_type>
+void summary_selector<counter_type>::replay_affected_range_with_matrices(std::size_t removed_idx, removed_range removed)
+{
+	/*
+		Same replay as above, but only the total counter of the window and the per event counters of the affected
+		entries are tracked. Until the window is replayed again, the per event counter of an entry only changes by
+		the transitions of the following events. So the queued transitions are applied once an entry leaves the window
+		instead of advancing every per event counter for every replayed event.
+	*/
+	const auto [replay_start_idx,time_window_replay_start_idx] = affected_range_start(removed_idx,removed);
+	const auto& initial_state = automaton_.states()[automaton_.initial_state_id()];
+
+	auto window_start_idx = time_window_replay_start_idx;
+	auto window_total_counter = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	replay_with_matrices(cache_range{cache_.begin()+window_start_idx,cache_.begin()+replay_start_idx},replay_start_idx-window_start_idx,window_total_counter);
+
+	struct affected_entry
+	{
+		std::size_t cache_idx, base_idx;
+		execution_state_counter<counter_type> per_event_counter; // after the event at base_idx
+	};
+	std::deque<affected_entry> affected_entries;
+
+	transition_queue<wrapping_counter_t<counter_type>> transitions{per_character_edges_,automaton_.number_of_states()};
+	auto transitions_start_idx = replay_start_idx;
+
+	const auto add_changes = [&](const affected_entry& entry)
+	{
+		for(;transitions_start_idx<=entry.base_idx;++transitions_start_idx)
+			transitions.pop_front();
+
+		auto change = transitions.apply(entry.per_event_counter);
+		change-=entry.per_event_counter;
+		if(!change.is_zero())
+			cache_[entry.cache_idx].state_counter.modify()+=change;
+	};
+
+	const auto is_relevant = [&](std::size_t idx)
+	{
+		return affected_by(removed,timestamp_at(idx)) || affected_by(removed,timestamp_at(window_start_idx));
+	};
+
+	std::size_t idx = replay_start_idx;
+	for(; idx<cache_.size() && is_relevant(idx); ++idx)
+	{
+		bool removed_initiator = false;
+		for(;window_start_idx<idx && !in_shared_window(timestamp_at(idx),timestamp_at(window_start_idx));++window_start_idx)
+		{
+			const auto type = cache_[window_start_idx].cached_event.type;
+			removed_initiator |= initial_state.transitions.contains(type) || initial_state.transitions.contains(nfa::wildcard_symbol);
+
+			if(!affected_entries.empty() && affected_entries.front().cache_idx==window_start_idx)
+			{
+				add_changes(affected_entries.front());
+				affected_entries.pop_front();
+			}
+		}
+
+		if(removed_initiator)
+		{
+			for(const auto& entry: affected_entries)
+				add_changes(entry);
+
+			const auto first_affected_idx = affected_entries.empty()?idx:affected_entries.front().cache_idx;
+			auto per_event_counters = replay_with_matrices(cache_range{cache_.begin()+window_start_idx,cache_.begin()+idx},first_affected_idx-window_start_idx,window_total_counter);
+			for(auto& entry: affected_entries)
+			{
+				entry.per_event_counter = std::move(per_event_counters[entry.cache_idx-first_affected_idx]);
+				entry.base_idx = idx-1;
+			}
+
+			transitions.clear();
+			transitions_start_idx = idx;
+		}
+
+		const auto type = cache_[idx].cached_event.type;
+		auto global_counter_change = advance(window_total_counter,per_character_edges_,type);
+		window_total_counter+=global_counter_change;
+
+		if(affected_entries.empty())
+		{
+			transitions.clear();
+			transitions_start_idx = idx+1;
+		}
+		else
+			transitions.push_back(type);
+
+		if(affected_by(removed,timestamp_at(idx)))
+		{
+			cache_[idx].state_counter = counter_pool_.intern(global_counter_change);
+			affected_entries.push_back({idx,idx,std::move(global_counter_change)});
+			note_replay_window(affected_entries.size()+1);
+		}
+	}
+
+	for(const auto& entry: affected_entries)
+		add_changes(entry);
+
+	phases_.count_replay(idx-replay_start_idx);
+	if(idx>replay_start_idx)
+		record_change({cache_change::kind::modified,replay_start_idx,idx});
 }
 
 template <typename counter_type>
@@ -192,18 +609,28 @@ void summary_selector<counter_type>::add_event(const event& new_event)
 	total_counter_+=global_counter_change;
 	total_detected_counter_+=global_counter_change;
 
+	// the changes of the window entries only pass through this counter, so advancing them allocates nothing
+	auto local_change = execution_state_counter<counter_type>{automaton_.number_of_states()};
 	const auto active_window_size = cache_.size() - active_window_.start_idx;
 	for(std::size_t i=0; i<active_window_size;++i)
 	{
 		const auto cache_idx = active_window_.start_idx + i;
 		
-		const auto local_change = advance(active_window_.per_event_counters[i],per_character_edges_,new_event.type);
-		cache_[cache_idx].state_counter+=local_change;
+		advance(active_window_.per_event_counters[i],per_character_edges_,new_event.type,local_change);
+		if(local_change.is_zero())
+			continue;
+
+		cache_[cache_idx].state_counter.modify()+=local_change;
 		active_window_.per_event_counters[i]+=local_change;
 	}
 	
 	active_window_.per_event_counters.push_back(global_counter_change);
-	cache_.emplace_back(new_event,std::move(global_counter_change));
+	global_counter_change.shrink_to_fit(); // sparse counters of long queries keep only their occupied states
+	cache_.emplace_back(new_event,counter_pool_.intern(std::move(global_counter_change)));
+
+	if(active_window_size>0)
+		record_change({cache_change::kind::modified,active_window_.start_idx,cache_.size()-1});
+	record_change({cache_change::kind::appended,cache_.size()-1,cache_.size()});
 }
 
 template <typename counter_type>
@@ -211,19 +638,32 @@ void summary_selector<counter_type>::purge_expired()
 {
 	std::size_t purge_until = 0;
 	while(purge_until<cache_.size() && current_time()-cache_[purge_until].cached_event.timestamp>time_to_live_)
-	{
-		total_counter_-=cache_[purge_until].state_counter;
-		const auto removed_timestamp = timestamp_at(purge_until);
-		cache_[purge_until].cached_event.timestamp = std::numeric_limits<std::size_t>::max(); //dirty hack to make the replay ignore this event
-		std::fill(cache_[purge_until].state_counter.begin(),cache_[purge_until].state_counter.end(),0);
-		replay_affected_range(purge_until+1, removed_timestamp);
 		++purge_until;
-	}
 
 	if(purge_until==0)
 		return;
-	
-	cache_.erase(cache_.begin(),cache_.begin()+purge_until);
+
+	// the purged events are the oldest ones, so every run containing one of them starts with one of them
+	auto runs = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	auto extended_runs = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	for(std::size_t i=0;i<purge_until;++i)
+	{
+		runs*=0;
+		runs[automaton_.initial_state_id()] = 1;
+		advance(runs,per_character_edges_,cache_[i].cached_event.type,extended_runs);
+		std::swap(runs,extended_runs);
+		for(auto j=i+1;j<cache_.size() && in_shared_window(timestamp_at(i),timestamp_at(j));++j)
+		{
+			advance(runs,per_character_edges_,cache_[j].cached_event.type,extended_runs);
+			runs+=extended_runs;
+		}
+
+		total_counter_-=runs;
+	}
+
+	const auto last_purged_timestamp = timestamp_at(purge_until-1);
+	cache_.erase(0,purge_until);
+	record_change({cache_change::kind::erased,0,purge_until});
 
 	if(cache_.empty())
 	{
@@ -232,12 +672,16 @@ void summary_selector<counter_type>::purge_expired()
 		return;
 	}
 
+	// every entry sharing a window with a purged event shares one with the last of them, so a single replay covers all
+	if(in_shared_window(last_purged_timestamp,timestamp_at(0)))
+		replay_affected_range(0,{last_purged_timestamp,last_purged_timestamp});
+
 	if(purge_until<active_window_.start_idx)
 		active_window_.start_idx-=purge_until;
 	else
 	{
 		active_window_.start_idx = cache_.size()>time_window_size()?cache_.size()-time_window_size():0;
-		replay_time_window(active_window_,std::span{cache_.begin()+active_window_.start_idx,cache_.end()});
+		replay_time_window(active_window_,cache_range{cache_.begin()+active_window_.start_idx,cache_.end()});
 	}
 }
 
@@ -246,40 +690,152 @@ void summary_selector<counter_type>::update_window(window_info& window, std::siz
 {
 	const auto& initial_state = automaton_.states()[automaton_.initial_state_id()];
 
+	// the runs among the expired events, the matrix replay only subtracts the ones starting with an expired initiator
+	execution_state_counter<counter_type> expired_runs{automaton_.number_of_states()}, extended_runs{automaton_.number_of_states()};
+	expired_runs[automaton_.initial_state_id()] = 1;
+
 	bool removed_initiator = false;
 	while(!window.per_event_counters.empty() && !in_shared_window(timestamp,timestamp_at(window.start_idx)))
 	{
+		// the counter of an entry leaving the window stays the same until the next replay, so it may share an equal one
+		counter_pool_.intern(cache_[window.start_idx].state_counter);
 		const auto type = cache_[window.start_idx++].cached_event.type;
 		removed_initiator |= initial_state.transitions.contains(type) || initial_state.transitions.contains(nfa::wildcard_symbol);
+		if(replay_==replay_engine::matrix)
+		{
+			advance(expired_runs,per_character_edges_,type,extended_runs);
+			expired_runs+=extended_runs;
+		}
 		window.per_event_counters.pop_front();
 	}
 
-	if(removed_initiator)
+	if(!removed_initiator)
+		return;
+
+	if(replay_==replay_engine::matrix)
+	{
+		expired_runs[automaton_.initial_state_id()]-=1;
+		subtract_expired_runs(window,std::move(expired_runs));
+	}
+	else
 		replay_time_window(window);
 }
 
+template <typename counter_type>
+auto summary_selector<counter_type>::continued_runs(cache_range events, execution_state_counter<counter_type>& runs) const -> std::vector<execution_state_counter<counter_type>>
+{
+	/*
+		The runs are advanced over the events, each event gets the ones it extends, advanced by the events following it.
+		Events extending none of these runs keep a zero counter without applying a transition matrix.
+		Afterwards, runs also contains all the extended ones.
+	*/
+	phases_.count_replay(events.size());
+	std::vector<execution_state_counter<counter_type>> extended_runs;
+	extended_runs.reserve(events.size());
+	note_replay_window(events.size()+1);
+	for(const auto& entry: events)
+	{
+		auto extended = advance(runs,per_character_edges_,entry.cached_event.type);
+		runs+=extended;
+		extended_runs.push_back(std::move(extended));
+	}
+
+	apply_following_transitions(events,extended_runs);
+	return extended_runs;
+}
+
+template <typename counter_type>
+void summary_selector<counter_type>::subtract_expired_runs(window_info& window, execution_state_counter<counter_type> expired_runs) const
+{
+	// instead of replaying the window, the runs starting with an expired initiator are continued over the remaining events
+	const cache_range events{cache_.begin()+window.start_idx,cache_.begin()+window.start_idx+window.per_event_counters.size()};
+
+	const auto lost_runs = continued_runs(events,expired_runs);
+	window.total_counter-=expired_runs;
+	for(std::size_t i=0;i<lost_runs.size();++i)
+		window.per_event_counters[i]-=lost_runs[i];
+}
+
 template <typename counter_type>
 void summary_selector<counter_type>::replay_time_window(window_info& window) const
 {
-	replay_time_window(window,std::span{cache_.begin()+window.start_idx,window.per_event_counters.size()});
+	replay_time_window(window,cache_range{cache_.begin()+window.start_idx,cache_.begin()+window.start_idx+window.per_event_counters.size()});
 }
 
 template <typename counter_type>
-void summary_selector<counter_type>::replay_time_window(window_info& window, std::span<const cache_entry> events) const
+void summary_selector<counter_type>::replay_time_window(window_info& window, cache_range events) const
 {
+	if(replay_==replay_engine::matrix)
+	{
+		auto per_event_counters = replay_with_matrices(events,0,window.total_counter);
+		window.per_event_counters.clear();
+		for(const auto& counter: per_event_counters)
+			window.per_event_counters.push_back(counter);
+
+		return;
+	}
+
 	reset_counters(window);
+	phases_.count_replay(events.size());
 
+	auto global_counter_change = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	auto local_change = execution_state_counter<counter_type>{automaton_.number_of_states()};
 	for(std::size_t i=0;i<events.size();++i)
 	{
 		const auto to_readd = events[i].cached_event.type;
-		auto global_counter_change = advance(window.total_counter,per_character_edges_,to_readd);
+		advance(window.total_counter,per_character_edges_,to_readd,global_counter_change);
 		window.total_counter+=global_counter_change;
 		for(std::size_t j=0;j<i;++j)
 		{
-			const auto local_change = advance(window.per_event_counters[j],per_character_edges_,to_readd);
+			advance(window.per_event_counters[j],per_character_edges_,to_readd,local_change);
 			window.per_event_counters[j]+=local_change;
 		}
-		window.per_event_counters.push_back(std::move(global_counter_change));
+		window.per_event_counters.push_back(global_counter_change);
+	}
+}
+
+template <typename counter_type>
+std::vector<execution_state_counter<counter_type>> summary_selector<counter_type>::replay_with_matrices(cache_range events, std::size_t first_needed, execution_state_counter<counter_type>& total_counter) const
+{
+	// the per event counter of an event is its global change advanced by all following events, i.e. multiplied with their transition matrix
+	total_counter*=0;
+	total_counter[automaton_.initial_state_id()] = 1;
+	phases_.count_replay(events.size());
+
+	std::vector<execution_state_counter<counter_type>> per_event_counters;
+	per_event_counters.reserve(events.size()-first_needed);
+	note_replay_window(events.size()-first_needed+1);
+	auto global_counter_change = execution_state_counter<counter_type>{automaton_.number_of_states()};
+	for(std::size_t i=0;i<events.size();++i)
+	{
+		advance(total_counter,per_character_edges_,events[i].cached_event.type,global_counter_change);
+		total_counter+=global_counter_change;
+		if(i>=first_needed)
+			per_event_counters.push_back(global_counter_change);
+	}
+
+	apply_following_transitions(cache_range{events.begin()+first_needed,events.end()},per_event_counters);
+	return per_event_counters;
+}
+
+template <typename counter_type>
+void summary_selector<counter_type>::apply_following_transitions(cache_range events, std::span<execution_state_counter<counter_type>> counters) const
+{
+	assert(events.size()==counters.size());
+
+	// the products of the transitions following each event are built from the back, down to the first counter that changes
+	std::size_t first_nonzero = 0;
+	while(first_nonzero<counters.size() && counters[first_nonzero].is_zero())
+		++first_nonzero;
+
+	auto following = transition_matrix<wrapping_counter_t<counter_type>>::identity(automaton_.number_of_states());
+	for(auto i=counters.size();i-->first_nonzero;)
+	{
+		auto& counter = counters[i];
+		if(!counter.is_zero())
+			counter = following.apply(counter);
+		if(i>first_nonzero)
+			following.prepend(per_character_edges_,events[i].cached_event.type);
 	}
 }
 
@@ -289,7 +845,8 @@ auto summary_selector<counter_type>::create_window_info(std::size_t window_size)
 	window_info wnd
 	{
 		execution_state_counter<counter_type>{automaton_.number_of_states()},
-		ring_buffer<execution_state_counter<counter_type>>{window_size,execution_state_counter<counter_type>{automaton_.number_of_states()}},
+		// both ends are part of a window, so it holds up to window_size+1 events
+		ring_buffer<execution_state_counter<counter_type>>{window_size+1,execution_state_counter<counter_type>{automaton_.number_of_states()}},
 		0
 	};
 
@@ -316,7 +873,7 @@ std::size_t summary_selector<counter_type>::timestamp_at(std::size_t cache_idx)
 template <typename counter_type>
 bool summary_selector<counter_type>::in_shared_window(std::size_t timestamp0, std::size_t timestamp1) const
 {
-	const auto time_window_size = active_window_.per_event_counters.capacity();
+	const auto time_window_size = this->time_window_size();
 
 	if(timestamp1>timestamp0)
 		std::swap(timestamp0,timestamp1);
@@ -324,6 +881,13 @@ bool summary_selector<counter_type>::in_shared_window(std::size_t timestamp0, st
 	return timestamp0-timestamp1<=time_window_size;
 }
 
+template <typename counter_type>
+bool summary_selector<counter_type>::affected_by(const removed_range& removed, std::size_t timestamp) const
+{
+	return (removed.oldest_timestamp<=timestamp && timestamp<=removed.newest_timestamp)
+		|| in_shared_window(removed.oldest_timestamp,timestamp) || in_shared_window(removed.newest_timestamp,timestamp);
+}
+
 template <typename counter_type>
 bool operator==(const summary_selector<counter_type>& lhs, const summary_selector<counter_type>& rhs)
 {
@@ -0,0 +1,134 @@
+#ifndef SUSE_TIERED_VECTOR_HPP
+#define SUSE_TIERED_VECTOR_HPP
+
+#include <compare>
+#include <iterator>
+#include <optional>
+#include <type_traits>
+#include <vector>
+
+#include <cstddef>
+
+namespace suse
+{
+	/*
+		Sequence with index access that erases from the middle without shifting all later elements.
+		The elements are split into blocks of equal size, all but the last one full, and each block is a ring.
+		Erasing shifts the shorter part of one block and then moves a single element from the front of each following
+		block to the end of the one before it, which only rotates the following block.
+		With blocks of about the square root of the capacity, this costs O(sqrt(capacity)) instead of O(size).
+	*/
+	template <typename T>
+	class tiered_vector
+	{
+		template <bool is_const>
+		class basic_iterator;
+
+		public:
+		using value_type = T;
+		using iterator = basic_iterator<false>;
+		using const_iterator = basic_iterator<true>;
+
+		// the capacity is only used to choose the block size, the vector grows beyond it like a std::vector
+		explicit tiered_vector(std::size_t capacity = 0);
+
+		T& operator[](std::size_t idx) { return *storage_[slot_of(idx)]; }
+		const T& operator[](std::size_t idx) const { return *storage_[slot_of(idx)]; }
+
+		T& front() { return (*this)[0]; }
+		const T& front() const { return (*this)[0]; }
+		T& back() { return (*this)[size_-1]; }
+		const T& back() const { return (*this)[size_-1]; }
+
+		void push_back(T value);
+		template <typename... Args>
+		T& emplace_back(Args&&... args);
+
+		void erase(std::size_t idx);
+		void erase(std::size_t first, std::size_t last);
+		void clear();
+
+		bool empty() const { return size_==0; }
+		std::size_t size() const { return size_; }
+		std::size_t capacity() const { return capacity_; }
+		// the slots of all blocks and the block offsets, without storage owned by the elements
+		std::size_t storage_bytes() const { return storage_.capacity()*sizeof(std::optional<T>)+block_starts_.capacity()*sizeof(std::size_t); }
+
+		iterator begin() { return {this,0}; }
+		iterator end() { return {this,size_}; }
+		const_iterator begin() const { return {this,0}; }
+		const_iterator end() const { return {this,size_}; }
+
+		private:
+		std::vector<std::optional<T>> storage_; // the blocks one after another, slots past the end are empty
+		std::vector<std::size_t> block_starts_;
+		std::size_t size_ = 0;
+		std::size_t capacity_;
+		std::size_t block_shift_, block_mask_;
+
+		std::size_t block_size() const { return block_mask_+1; }
+		std::size_t slot_of(std::size_t idx) const
+		{
+			const auto block_idx = idx>>block_shift_;
+			return (block_idx<<block_shift_)+((block_starts_[block_idx]+idx)&block_mask_);
+		}
+
+		std::optional<T>& slot_for_append();
+		void pop_back();
+
+		template <bool is_const>
+		class basic_iterator
+		{
+			using container_type = std::conditional_t<is_const,const tiered_vector,tiered_vector>;
+
+			public:
+			using iterator_category = std::random_access_iterator_tag;
+			using value_type = T;
+			using difference_type = std::ptrdiff_t;
+			using pointer = std::conditional_t<is_const,const T*,T*>;
+			using reference = std::conditional_t<is_const,const T&,T&>;
+
+			basic_iterator() = default;
+			basic_iterator(container_type* container, std::size_t idx):
+				container_{container},
+				idx_{idx}
+			{}
+
+			operator basic_iterator<true>() const requires (!is_const) { return {container_,idx_}; }
+
+			reference operator*() const { return (*container_)[idx_]; }
+			pointer operator->() const { return &**this; }
+			reference operator[](difference_type n) const { return (*container_)[idx_+n]; }
+
+			basic_iterator& operator++() { ++idx_; return *this; }
+			basic_iterator operator++(int) { auto copy = *this; ++idx_; return copy; }
+			basic_iterator& operator--() { --idx_; return *this; }
+			basic_iterator operator--(int) { auto copy = *this; --idx_; return copy; }
+
+			basic_iterator& operator+=(difference_type n) { idx_+=n; return *this; }
+			basic_iterator& operator-=(difference_type n) { idx_-=n; return *this; }
+
+			friend basic_iterator operator+(basic_iterator it, difference_type n) { return it+=n; }
+			friend basic_iterator operator+(difference_type n, basic_iterator it) { return it+=n; }
+			friend basic_iterator operator-(basic_iterator it, difference_type n) { return it-=n; }
+			friend difference_type operator-(const basic_iterator& lhs, const basic_iterator& rhs)
+			{
+				return static_cast<difference_type>(lhs.idx_)-static_cast<difference_type>(rhs.idx_);
+			}
+
+			friend bool operator==(const basic_iterator& lhs, const basic_iterator& rhs) { return lhs.idx_==rhs.idx_; }
+			friend auto operator<=>(const basic_iterator& lhs, const basic_iterator& rhs) { return lhs.idx_<=>rhs.idx_; }
+
+			private:
+			container_type* container_ = nullptr;
+			std::size_t idx_ = 0;
+		};
+	};
+
+	template <typename T>
+	bool operator==(const tiered_vector<T>& lhs, const tiered_vector<T>& rhs);
+}
+
+#include "tiered_vector_impl.hpp"
+
+#endif
@@ -0,0 +1,53 @@
+#include "tiered_vector.hpp"
+
+#include <doctest/doctest.h>
+
+#include <algorithm>
+#include <random>
+#include <ranges>
+#include <vector>
+
+TEST_SUITE("suse::tiered_vector")
+{
+	TEST_CASE("erase")
+	{
+		static_assert(std::ranges::random_access_range<const suse::tiered_vector<int>>);
+
+		std::mt19937 random_gen{42};
+		std::vector<int> expected;
+		suse::tiered_vector<int> vector(300);
+
+		for(int value=0;value<2000;++value)
+		{
+			CAPTURE(value);
+
+			expected.push_back(value);
+			vector.push_back(value);
+
+			if(expected.size()>300)
+			{
+				const auto idx = std::uniform_int_distribution<std::size_t>(0,expected.size()-1)(random_gen);
+				expected.erase(expected.begin()+idx);
+				vector.erase(idx);
+			}
+
+			if(value%500==0)
+			{
+				const auto count = std::min<std::size_t>(value%1000==0?3:200,expected.size());
+				expected.erase(expected.begin(),expected.begin()+count);
+				vector.erase(0,count);
+			}
+
+			REQUIRE(vector.size()==expected.size());
+			REQUIRE(std::ranges::equal(vector,expected));
+		}
+
+		vector.erase(10,vector.size());
+		expected.resize(10);
+		CHECK(std::ranges::equal(vector,expected));
+
+		vector.clear();
+		CHECK(vector.empty());
+		CHECK(vector.begin()==vector.end());
+	}
+}
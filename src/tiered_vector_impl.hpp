@@ -0,0 +1,135 @@
+/*
+	Never include directly!
+	This is included by tiered_vector.hpp and only exists to split
+	interface and implementation despite the template.
+*/
+
+#include <algorithm>
+#include <cassert>
+#include <utility>
+
+namespace suse
+{
+
+template <typename T>
+tiered_vector<T>::tiered_vector(std::size_t capacity):
+	capacity_{capacity},
+	block_shift_{4}
+{
+	while((std::size_t{1}<<(2*block_shift_))<capacity)
+		++block_shift_;
+
+	block_mask_ = (std::size_t{1}<<block_shift_)-1;
+}
+
+template <typename T>
+void tiered_vector<T>::push_back(T value)
+{
+	slot_for_append() = std::move(value);
+	++size_;
+}
+
+template <typename T>
+template <typename... Args>
+T& tiered_vector<T>::emplace_back(Args&&... args)
+{
+	auto& element = slot_for_append().emplace(std::forward<Args>(args)...);
+	++size_;
+	return element;
+}
+
+template <typename T>
+void tiered_vector<T>::erase(std::size_t idx)
+{
+	assert(idx<size_);
+
+	// close the gap with the shorter part of the block, either way its last slot is free afterwards
+	const auto block_idx = idx>>block_shift_;
+	const auto block_begin = block_idx<<block_shift_;
+	const auto offset = idx&block_mask_;
+	if(offset<block_size()/2)
+	{
+		for(auto i=offset;i>0;--i)
+			(*this)[block_begin+i] = std::move((*this)[block_begin+i-1]);
+		block_starts_[block_idx] = (block_starts_[block_idx]+1)&block_mask_;
+	}
+	else
+	{
+		const auto block_end = std::min(block_begin+block_size(),size_);
+		for(auto i=idx;i+1<block_end;++i)
+			(*this)[i] = std::move((*this)[i+1]);
+	}
+
+	// refill every block from the front of the following one, whose free slot then is its last one
+	for(auto i=block_idx+1;i<block_starts_.size();++i)
+	{
+		const auto block_end = i<<block_shift_;
+		(*this)[block_end-1] = std::move((*this)[block_end]);
+		block_starts_[i] = (block_starts_[i]+1)&block_mask_;
+	}
+
+	pop_back();
+}
+
+template <typename T>
+void tiered_vector<T>::erase(std::size_t first, std::size_t last)
+{
+	assert(first<=last && last<=size_);
+
+	const auto count = last-first;
+	if(count*block_starts_.size()<size_-first)
+	{
+		for(std::size_t i=0;i<count;++i)
+			erase(first);
+
+		return;
+	}
+
+	// erasing many elements at once, so shifting all later ones is cheaper
+	for(auto i=first;i+count<size_;++i)
+		(*this)[i] = std::move((*this)[i+count]);
+
+	for(std::size_t i=0;i<count;++i)
+		pop_back();
+}
+
+template <typename T>
+void tiered_vector<T>::clear()
+{
+	storage_.clear();
+	block_starts_.clear();
+	size_ = 0;
+}
+
+template <typename T>
+std::optional<T>& tiered_vector<T>::slot_for_append()
+{
+	if((size_&block_mask_)==0)
+	{
+		storage_.resize(storage_.size()+block_size());
+		block_starts_.push_back(0);
+	}
+
+	return storage_[slot_of(size_)];
+}
+
+template <typename T>
+void tiered_vector<T>::pop_back()
+{
+	assert(size_>0);
+
+	storage_[slot_of(--size_)].reset();
+	if((size_&block_mask_)==0)
+	{
+		storage_.resize(storage_.size()-block_size());
+		block_starts_.pop_back();
+	}
+}
+
+template <typename T>
+bool operator==(const tiered_vector<T>& lhs, const tiered_vector<T>& rhs)
+{
+	return std::equal(lhs.begin(),lhs.end(),rhs.begin(),rhs.end());
+}
+
+}
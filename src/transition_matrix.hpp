@@ -0,0 +1,104 @@
+#ifndef SUSE_TRANSITION_MATRIX_HPP
+#define SUSE_TRANSITION_MATRIX_HPP
+
+#include "checked_counter.hpp"
+#include "edgelist.hpp"
+#include "execution_state_counter.hpp"
+
+#include <type_traits>
+#include <vector>
+
+#include <cstddef>
+
+namespace suse
+{
+	/*
+		Entries of transition matrices over many events grow far beyond the counters they are applied to
+		(e.g. the ways from a state no counter is in), so they are computed with wrap around arithmetic.
+		Counters computed with them are still exact as long as the counters themselves fit.
+	*/
+	template <typename counter_type>
+	struct wrapping_counter
+	{
+		using type = counter_type;
+	};
+
+	template <typename counter_type> requires std::is_integral_v<counter_type>
+	struct wrapping_counter<counter_type>
+	{
+		using type = std::make_unsigned_t<counter_type>;
+	};
+
+	template <typename T>
+	struct wrapping_counter<checked_uint<T>>
+	{
+		using type = T;
+	};
+
+	template <typename counter_type>
+	using wrapping_counter_t = typename wrapping_counter<counter_type>::type;
+
+	/*
+		Linear map of the execution state counters over a sequence of events.
+		The entry (to,from) counts the ways to get from state from to state to by taking some of the events.
+	*/
+	template <typename value_type>
+	class transition_matrix
+	{
+		public:
+		static transition_matrix identity(std::size_t number_of_states);
+
+		// the events of this matrix followed by one with the given symbol
+		transition_matrix& append(const edgelist& edges, char symbol);
+		// an event with the given symbol followed by the events of this matrix
+		transition_matrix& prepend(const edgelist& edges, char symbol);
+
+		template <typename counter_type>
+		execution_state_counter<counter_type> apply(const execution_state_counter<counter_type>& counter) const;
+
+		std::size_t number_of_states() const { return number_of_states_; }
+		const value_type& operator()(std::size_t to, std::size_t from) const { return entries_[to*number_of_states_+from]; }
+
+		friend bool operator==(const transition_matrix&, const transition_matrix&) = default;
+
+		private:
+		explicit transition_matrix(std::size_t number_of_states);
+
+		value_type& at(std::size_t to, std::size_t from) { return entries_[to*number_of_states_+from]; }
+
+		std::size_t number_of_states_;
+		std::vector<value_type> entries_;
+	};
+
+	/*
+		Queue of events that applies the transitions of all queued events at once. Like a queue built from two stacks,
+		the older part keeps the products from each event to its end and the newer part keeps one product,
+		so pushing and popping cost amortized O(1) matrix updates.
+	*/
+	template <typename value_type>
+	class transition_queue
+	{
+		public:
+		transition_queue(const edgelist& edges, std::size_t number_of_states);
+
+		void push_back(char symbol);
+		void pop_front();
+		void clear();
+
+		bool empty() const;
+		std::size_t size() const;
+
+		template <typename counter_type>
+		execution_state_counter<counter_type> apply(const execution_state_counter<counter_type>& counter) const;
+
+		private:
+		const edgelist* edges_;
+		std::vector<transition_matrix<value_type>> older_; // the oldest event is at the back
+		std::vector<char> newer_symbols_;
+		transition_matrix<value_type> newer_;
+	};
+}
+
+#include "transition_matrix_impl.hpp"
+
+#endif
@@ -0,0 +1,110 @@
+#include "transition_matrix.hpp"
+
+#include "checked_counter.hpp"
+#include "regex.hpp"
+
+#include <doctest/doctest.h>
+
+#include <cstdint>
+#include <deque>
+#include <string_view>
+
+TEST_SUITE("suse::transition_matrix")
+{
+	TEST_CASE("matrix equals advancing")
+	{
+		const auto sample = suse::parse_regex("a(b|c)*d?e");
+		const auto edges = suse::compute_edges_per_character(sample);
+		const std::string_view input = "abcbdcabedacbbe";
+
+		auto appended = suse::transition_matrix<unsigned>::identity(sample.number_of_states());
+		auto prepended = appended;
+		for(std::size_t i=0;i<input.size();++i)
+		{
+			appended.append(edges,input[i]);
+			prepended.prepend(edges,input[input.size()-1-i]);
+		}
+		CHECK(appended==prepended);
+
+		for(std::size_t state=0;state<sample.number_of_states();++state)
+		{
+			CAPTURE(state);
+
+			auto counter = suse::execution_state_counter<int>(sample.number_of_states());
+			counter[state] = 1;
+			const auto applied = appended.apply(counter);
+
+			for(auto c: input)
+				counter+=advance(counter,edges,c);
+
+			CHECK(applied==counter);
+		}
+	}
+
+	TEST_CASE("wrapping entries")
+	{
+		using counter_type = suse::checked_uint<std::uint8_t>;
+		static_assert(std::is_same_v<suse::wrapping_counter_t<counter_type>,std::uint8_t>);
+
+		// the entries from the initial state wrap around, the ones used by a counter past the 'a' do not
+		const auto sample = suse::parse_regex("ab*");
+		const auto edges = suse::compute_edges_per_character(sample);
+
+		auto start = suse::execution_state_counter<counter_type>(sample.number_of_states());
+		start[sample.initial_state_id()] = 1;
+		start = advance(start,edges,'a');
+
+		auto matrix = suse::transition_matrix<std::uint8_t>::identity(sample.number_of_states());
+		auto expected = start;
+		for(int i=0;i<7;++i)
+		{
+			matrix.prepend(edges,'a');
+			matrix.append(edges,'b');
+			expected+=advance(expected,edges,'b');
+		}
+
+		CHECK(matrix.apply(start)==expected);
+
+		counter_type sum = 0;
+		for(const auto& counter: expected)
+			sum+=counter;
+		CHECK(sum==128);
+	}
+
+	TEST_CASE("queue")
+	{
+		const auto sample = suse::parse_regex("a(b|c)*d?e");
+		const auto edges = suse::compute_edges_per_character(sample);
+		const std::string_view input = "abcbdcabedacbbeabcbcbdcbbe";
+
+		suse::transition_queue<unsigned> queue{edges,sample.number_of_states()};
+		std::deque<char> expected;
+
+		auto initial = suse::execution_state_counter<int>(sample.number_of_states());
+		initial[sample.initial_state_id()] = 1;
+
+		for(std::size_t idx=0;auto c: input)
+		{
+			CAPTURE(idx++);
+
+			queue.push_back(c);
+			expected.push_back(c);
+			if(idx%3==0)
+			{
+				queue.pop_front();
+				expected.pop_front();
+			}
+
+			auto counter = initial;
+			for(auto e: expected)
+				counter+=advance(counter,edges,e);
+
+			REQUIRE(queue.size()==expected.size());
+			REQUIRE(queue.apply(initial)==counter);
+		}
+
+		queue.clear();
+		CHECK(queue.empty());
+		CHECK(queue.apply(initial)==initial);
+	}
+}
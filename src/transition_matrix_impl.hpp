@@ -0,0 +1,154 @@
+/*
+	Never include directly!
+	This is included by transition_matrix.hpp and only exists to split
+	interface and implementation despite the template.
+*/
+
+#include "nfa.hpp"
+
+#include <cassert>
+
+namespace suse
+{
+
+template <typename value_type>
+transition_matrix<value_type>::transition_matrix(std::size_t number_of_states):
+	number_of_states_{number_of_states},
+	entries_(number_of_states*number_of_states,value_type{0})
+{}
+
+template <typename value_type>
+transition_matrix<value_type> transition_matrix<value_type>::identity(std::size_t number_of_states)
+{
+	transition_matrix result{number_of_states};
+	for(std::size_t i=0;i<number_of_states;++i)
+		result.at(i,i) = 1;
+
+	return result;
+}
+
+template <typename value_type>
+transition_matrix<value_type>& transition_matrix<value_type>::append(const edgelist& edges, char symbol)
+{
+	// (I + A) * M: the row of each target gains the row of the source
+	const auto previous = entries_;
+	const auto add_for = [&](auto s)
+	{
+		for(const auto& e: edges.edges_for(s))
+			for(std::size_t from=0;from<number_of_states_;++from)
+				at(e.to,from)+=previous[e.from*number_of_states_+from];
+	};
+
+	add_for(symbol);
+	add_for(nfa::wildcard_symbol);
+
+	return *this;
+}
+
+template <typename value_type>
+transition_matrix<value_type>& transition_matrix<value_type>::prepend(const edgelist& edges, char symbol)
+{
+	// M * (I + A): the column of each source gains the column of the target
+	const auto previous = entries_;
+	const auto add_for = [&](auto s)
+	{
+		for(const auto& e: edges.edges_for(s))
+			for(std::size_t to=0;to<number_of_states_;++to)
+				at(to,e.from)+=previous[to*number_of_states_+e.to];
+	};
+
+	add_for(symbol);
+	add_for(nfa::wildcard_symbol);
+
+	return *this;
+}
+
+template <typename value_type>
+template <typename counter_type>
+execution_state_counter<counter_type> transition_matrix<value_type>::apply(const execution_state_counter<counter_type>& counter) const
+{
+	assert(counter.size()==number_of_states_);
+
+	std::vector<value_type> values(number_of_states_);
+	for(std::size_t from=0;from<number_of_states_;++from)
+		values[from] = static_cast<value_type>(counter[from]);
+
+	execution_state_counter<counter_type> result{number_of_states_};
+	for(std::size_t to=0;to<number_of_states_;++to)
+	{
+		value_type sum{0};
+		for(std::size_t from=0;from<number_of_states_;++from)
+			sum+=(*this)(to,from)*values[from];
+
+		result[to] = static_cast<counter_type>(sum);
+	}
+
+	return result;
+}
+
+template <typename value_type>
+transition_queue<value_type>::transition_queue(const edgelist& edges, std::size_t number_of_states):
+	edges_{&edges},
+	newer_{transition_matrix<value_type>::identity(number_of_states)}
+{}
+
+template <typename value_type>
+void transition_queue<value_type>::push_back(char symbol)
+{
+	newer_symbols_.push_back(symbol);
+	newer_.append(*edges_,symbol);
+}
+
+template <typename value_type>
+void transition_queue<value_type>::pop_front()
+{
+	assert(!empty());
+
+	if(older_.empty())
+	{
+		auto product = transition_matrix<value_type>::identity(newer_.number_of_states());
+		for(auto it=newer_symbols_.rbegin();it!=newer_symbols_.rend();++it)
+			older_.push_back(product.prepend(*edges_,*it));
+
+		newer_symbols_.clear();
+		newer_ = transition_matrix<value_type>::identity(newer_.number_of_states());
+	}
+
+	older_.pop_back();
+}
+
+template <typename value_type>
+void transition_queue<value_type>::clear()
+{
+	older_.clear();
+	if(!newer_symbols_.empty())
+	{
+		newer_symbols_.clear();
+		newer_ = transition_matrix<value_type>::identity(newer_.number_of_states());
+	}
+}
+
+template <typename value_type>
+bool transition_queue<value_type>::empty() const
+{
+	return size()==0;
+}
+
+template <typename value_type>
+std::size_t transition_queue<value_type>::size() const
+{
+	return older_.size()+newer_symbols_.size();
+}
+
+template <typename value_type>
+template <typename counter_type>
+execution_state_counter<counter_type> transition_queue<value_type>::apply(const execution_state_counter<counter_type>& counter) const
+{
+	auto result = older_.empty()?counter:older_.back().apply(counter);
+	if(!newer_symbols_.empty())
+		result = newer_.apply(result);
+
+	return result;
+}
+
+}
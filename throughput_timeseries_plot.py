@@ -0,0 +1,59 @@
+import argparse
+import json
+
+import matplotlib.pyplot as plt
+
+def load_series(path):
+	"""(strategy, configuration) -> list of points, from a --report JSON or a --throughput-file NDJSON of summary_selector"""
+	series = dict()
+	with open(path) as f:
+		if path.endswith('.ndjson') or path.endswith('.jsonl'):
+			for line in f:
+				point = json.loads(line)
+				key = (point["strategy"], f"|S|={point['summary_size']}, W={point['time_window_size']}")
+				series.setdefault(key, []).append(point)
+			return series
+
+		report = json.load(f)
+
+	reports = report.items() if "runtime_ns" not in report else [("", report)]
+	for strategy, run in reports:
+		columns = ["processed_events", "timestamps", "cache_sizes", "elapsed_ns", "events_per_second"]
+		keys = ["processed_events", "timestamp", "cache_size", "elapsed_ns", "events_per_second"]
+		points = zip(*[run.get(f"throughput_{column}", []) for column in columns])
+		series[(strategy, "")] = [dict(zip(keys, values)) for values in points]
+	return series
+
+def main():
+	parser = argparse.ArgumentParser(description='Throughput and number of cached events over the processed events of summary_selector runs with --throughput-every')
+	parser.add_argument('input', type=str, help='Report JSON or --throughput-file NDJSON (.ndjson or .jsonl)')
+	parser.add_argument('--x', default='processed_events', choices=['processed_events', 'timestamp', 'elapsed_ns'])
+	parser.add_argument('--output', default='throughput_timeseries.pdf', type=str)
+	args = parser.parse_args()
+
+	series = load_series(args.input)
+	if not any(series.values()):
+		raise SystemExit(f"{args.input} contains no throughput series, run summary_selector with --throughput-every")
+
+	fig, (throughput_ax, cache_ax) = plt.subplots(2, 1, sharex=True, figsize=(8, 6))
+	for (strategy, configuration), points in series.items():
+		label = ", ".join(part for part in [strategy, configuration] if part) or None
+		x = [point[args.x] for point in points]
+		throughput_ax.plot(x, [point["events_per_second"] for point in points], linewidth=2, label=label)
+		cache_ax.step(x, [point["cache_size"] for point in points], where='post', linewidth=2, label=label)
+
+	throughput_ax.set_ylabel('Events per second')
+	throughput_ax.set_yscale('log')
+	throughput_ax.grid()
+	if any(strategy or configuration for strategy, configuration in series):
+		throughput_ax.legend(framealpha=0.66)
+
+	cache_ax.set_ylabel('Cached events')
+	cache_ax.set_xlabel({'processed_events': 'Processed events', 'timestamp': 'Timestamp', 'elapsed_ns': 'Processing time (ns)'}[args.x])
+	cache_ax.grid()
+
+	plt.tight_layout()
+	plt.savefig(args.output, format=args.output.rsplit('.', 1)[-1])
+
+if __name__ == "__main__":
+	main()